@@ -0,0 +1,73 @@
+"""
+Server-side aggregation vs. pulling raw history and reducing on the client.
+
+Fills one city with `--days` of readings every 30 seconds, then compares:
+
+1. raw: stream every row (NDJSON export) and compute hourly avg/min/max in Python
+2. aggregate: `WeatherRepository.get_weather_aggregate` with 1h buckets
+
+Reports wall time and payload size for each.
+
+Usage:
+    python -m benchmarks.aggregate_vs_raw --days 30
+"""
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.common import Timer, bench_database
+from src.weather.repository import WeatherRepository
+
+CITY = "BenchCity"
+
+
+async def main(days: int) -> None:
+    rows = days * 24 * 120
+    async with bench_database() as engine:
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                """
+                INSERT INTO weather_data (city, country, temperature, humidity, pressure, fetched_at)
+                SELECT :city, 'XX', 10 + 10 * sin(g / 1000.0), 40 + g % 50, 1000 + g % 30,
+                       now() - make_interval(secs => g * 30)
+                FROM generate_series(1, :rows) AS g
+                """
+            ), {"city": CITY, "rows": rows})
+            await conn.execute(text("ANALYZE weather_data"))
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        print(f"{rows:,} raw rows for {CITY}")
+
+        async with session_maker() as session:
+            repo = WeatherRepository(session)
+            with Timer() as timer:
+                payload_bytes = 0
+                hourly = defaultdict(list)
+                async for record in repo.stream_weather_history(CITY):
+                    payload_bytes += len(record.model_dump_json()) + 1
+                    hourly[record.fetched_at.replace(minute=0, second=0, microsecond=0)].append(record.temperature)
+                reduced = {hour: (sum(v) / len(v), min(v), max(v)) for hour, v in hourly.items()}
+            print(f"{'raw + client reduce':<22} {timer.elapsed * 1000:9.1f} ms  payload={payload_bytes / 1024:10.1f} KiB"
+                  f"  buckets={len(reduced)}")
+
+        async with session_maker() as session:
+            repo = WeatherRepository(session)
+            with Timer() as timer:
+                aggregate = await repo.get_weather_aggregate(
+                    CITY, timedelta(hours=1), ["temperature"], ["avg", "min", "max"]
+                )
+                payload_bytes = len(aggregate.model_dump_json())
+            print(f"{'server aggregate':<22} {timer.elapsed * 1000:9.1f} ms  payload={payload_bytes / 1024:10.1f} KiB"
+                  f"  buckets={len(aggregate.buckets)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.days))
@@ -0,0 +1,57 @@
+"""
+Insert throughput benchmark for WeatherRepository.
+
+Compares the per-row `create_weather_record` path (add/commit/refresh) with
+`create_weather_records_bulk` at batch sizes 1, 100 and 10 000 against a local
+Postgres (a temporary `<POSTGRES_DB>_bench` database is created and dropped).
+
+Usage:
+    python -m benchmarks.bulk_insert --rows 20000
+"""
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.common import Timer, bench_database
+from src.weather.entity import WeatherEntity
+from src.weather.repository import WeatherRepository
+
+
+def make_entities(count: int) -> list[WeatherEntity]:
+    return [
+        WeatherEntity(city=f"City{i % 1000}", country="XX", temperature=i % 40, humidity=i % 100, pressure=1000)
+        for i in range(count)
+    ]
+
+
+async def main(rows: int) -> None:
+    async with bench_database() as engine:
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+        single_rows = min(rows, 2000)
+        async with session_maker() as session:
+            repo = WeatherRepository(session)
+            with Timer() as timer:
+                for entity in make_entities(single_rows):
+                    await repo.create_weather_record(entity)
+        print(f"{'per-row create':<22} {single_rows / timer.elapsed:>10,.0f} rows/s  (n={single_rows})")
+
+        for batch_size in (1, 100, 10_000):
+            total = single_rows if batch_size == 1 else rows
+            entities = make_entities(total)
+            async with session_maker() as session:
+                repo = WeatherRepository(session)
+                with Timer() as timer:
+                    for start in range(0, total, batch_size):
+                        await repo.create_weather_records_bulk(entities[start:start + batch_size])
+            print(f"{f'bulk batch={batch_size}':<22} {total / timer.elapsed:>10,.0f} rows/s  (n={total})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.rows))
@@ -0,0 +1,57 @@
+"""Helpers shared by the database benchmarks."""
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.config import settings
+from src.database import Base
+import src.weather.models  # noqa: F401  (registers models on Base.metadata)
+
+BENCH_DB_NAME = f"{settings.POSTGRES_DB}_bench"
+BENCH_DATABASE_URL = settings.DATABASE_URL.replace(settings.POSTGRES_DB, BENCH_DB_NAME)
+
+
+async def _admin_execute(*statements: str) -> None:
+    conn = await asyncpg.connect(
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        database="postgres",
+    )
+    try:
+        for statement in statements:
+            await conn.execute(statement)
+    finally:
+        await conn.close()
+
+
+@asynccontextmanager
+async def bench_database(**engine_kwargs) -> AsyncGenerator[AsyncEngine, None]:
+    """Creates a throwaway benchmark database with the app schema and drops it afterwards."""
+    await _admin_execute(
+        f"DROP DATABASE IF EXISTS {BENCH_DB_NAME} WITH (FORCE)",
+        f"CREATE DATABASE {BENCH_DB_NAME}",
+    )
+    engine = create_async_engine(BENCH_DATABASE_URL, **engine_kwargs)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield engine
+    finally:
+        await engine.dispose()
+        await _admin_execute(f"DROP DATABASE IF EXISTS {BENCH_DB_NAME} WITH (FORCE)")
+
+
+class Timer:
+    """Context manager measuring elapsed wall time in seconds."""
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.started
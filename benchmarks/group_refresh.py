@@ -0,0 +1,125 @@
+"""
+Refresh benchmark: one upstream call per city vs. the OpenWeatherMap group endpoint.
+
+Starts a local stub of OpenWeatherMap's `/weather` and `/group` endpoints (each
+call answers after a fixed delay), tracks `--cities` cities in a throwaway
+database and runs `fetch_and_save` over all of them:
+
+1. `by-name`: the previous behaviour, one `/weather?q=` call per city
+2. `resolve`: grouped mode on a cold registry; cities are fetched by name once,
+   which stores their OpenWeatherMap IDs on tracked_cities
+3. `grouped`: grouped mode with the stored IDs, so cities go 20 per `/group` call
+
+Usage:
+    python -m benchmarks.group_refresh --cities 1000 --upstream-ms 20
+"""
+import argparse
+import asyncio
+import logging
+import socket
+import threading
+import time
+import zlib
+from collections import Counter
+from urllib.parse import parse_qs
+
+import orjson
+import uvicorn
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import src.cities.models  # noqa: F401  (registers tracked_cities on Base.metadata)
+from benchmarks.common import bench_database
+from src.cities.repository import TrackedCityRepository
+from src.http_client import create_http_client
+from src.weather import tasks
+from src.weather.cache import WeatherCache
+from src.weather.client import OpenWeatherClient
+
+
+class StubOpenWeatherMap:
+    """ASGI stub of `/weather?q=` and `/group?id=` that counts calls per endpoint."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls: Counter[str] = Counter()
+        self.names: dict[int, str] = {}
+
+    def city(self, name: str) -> dict:
+        city_id = zlib.crc32(name.encode()) & 0xFFFFFF  # OpenWeatherMap IDs are well inside int32
+        self.names[city_id] = name
+        return {
+            "id": city_id,
+            "name": name,
+            "sys": {"country": "XX"},
+            "main": {"temp": 10.0 + city_id % 20, "humidity": 50, "pressure": 1000},
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        path = scope["path"].rsplit("/", 1)[-1]
+        query = parse_qs(scope["query_string"].decode())
+        self.calls[path] += 1
+        await asyncio.sleep(self.delay)
+        if path == "group":
+            ids = [int(city_id) for city_id in query["id"][0].split(",")]
+            items = [self.city(self.names[city_id]) for city_id in ids if city_id in self.names]
+            body = {"cnt": len(items), "list": items}
+        else:
+            body = self.city(query["q"][0])
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": orjson.dumps(body)})
+
+
+def start_stub_server(app: StubOpenWeatherMap) -> tuple[uvicorn.Server, str]:
+    """Runs the stub upstream in a background thread and returns its base URL."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def main(cities: int, upstream_delay: float) -> None:
+    stub = StubOpenWeatherMap(upstream_delay)
+    server, base_url = start_stub_server(stub)
+    names = [f"City{i}" for i in range(cities)]
+    # Keep the latest-weather cache in process; the benchmark has no Redis
+    cache = WeatherCache(redis=None)
+    tasks.get_weather_cache = lambda: cache
+
+    try:
+        async with bench_database() as engine, create_http_client() as http_client:
+            session_maker = async_sessionmaker(engine, expire_on_commit=False)
+            async with session_maker() as session:
+                await TrackedCityRepository(session).track_cities(dict.fromkeys(names, 60))
+            client = OpenWeatherClient(http_client, api_key="bench", base_url=base_url)
+
+            for label, grouped in (("by-name", False), ("resolve", True), ("grouped", True)):
+                stub.calls.clear()
+                summary = await tasks.fetch_and_save(client, session_maker, names, grouped=grouped)
+                calls = ", ".join(f"/{path}={count}" for path, count in sorted(stub.calls.items()))
+                print(
+                    f"{label:<8} cities={summary['cities']:5d} updated={summary['updated']:5d}"
+                    f"  upstream calls={sum(stub.calls.values()):5d} ({calls})"
+                    f"  fetch={summary['fetch_ms']:8.1f} ms  total={summary['total_ms']:8.1f} ms"
+                )
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=1000)
+    parser.add_argument("--upstream-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.cities, args.upstream_ms / 1000))
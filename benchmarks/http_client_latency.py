@@ -0,0 +1,106 @@
+"""
+Latency benchmark: per-call httpx.AsyncClient vs. the shared pooled client.
+
+Starts a local stub of the OpenWeatherMap `/weather` endpoint and measures
+p50/p99 latency of `OpenWeatherClient.get_weather` in both modes.
+
+Usage:
+    python -m benchmarks.http_client_latency --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from src.http_client import create_http_client
+from src.weather.client import OpenWeatherClient
+
+STUB_PAYLOAD = (
+    b'{"name": "London", "sys": {"country": "GB"},'
+    b' "main": {"temp": 15.5, "humidity": 72, "pressure": 1012}}'
+)
+
+
+async def stub_upstream(scope, receive, send):
+    """Minimal ASGI app answering every request like OpenWeatherMap `/weather`."""
+    if scope["type"] != "http":
+        return
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": STUB_PAYLOAD})
+
+
+def start_stub_server() -> tuple[uvicorn.Server, str]:
+    """Runs the stub upstream in a background thread and returns its base URL."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(stub_upstream, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+class PerCallClient:
+    """Reproduces the previous behaviour: a fresh AsyncClient for every call."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    async def get_weather(self, city: str):
+        async with httpx.AsyncClient() as http_client:
+            client = OpenWeatherClient(http_client, api_key="bench", base_url=self.base_url)
+            return await client.get_weather(city)
+
+
+async def run(client, total: int, concurrency: int) -> list[float]:
+    """Issues `total` lookups with at most `concurrency` in flight; returns latencies in ms."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one_call():
+        async with semaphore:
+            start = time.perf_counter()
+            await client.get_weather("London")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one_call() for _ in range(total)))
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{label:<12} p50={quantiles[49]:7.2f} ms  p99={quantiles[98]:7.2f} ms  n={len(latencies)}")
+
+
+async def main(total: int, concurrency: int) -> None:
+    server, base_url = start_stub_server()
+    try:
+        report("per-call", await run(PerCallClient(base_url), total, concurrency))
+
+        async with create_http_client() as http_client:
+            shared = OpenWeatherClient(http_client, api_key="bench", base_url=base_url)
+            await shared.get_weather("warmup")
+            report("shared-pool", await run(shared, total, concurrency))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,106 @@
+"""
+"Latest weather for city" lookup benchmark over a large history table.
+
+Fills `weather_data` with millions of rows spread over many cities, then
+measures `get_latest_weather`-style lookups three ways:
+
+1. ORDER BY fetched_at DESC LIMIT 1 with only the old single-column city index
+2. the same query with the composite (city, fetched_at DESC) index
+3. a primary-key lookup in the maintained `weather_latest` table
+
+Usage:
+    python -m benchmarks.latest_lookup --rows 2000000 --cities 500
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from benchmarks.common import Timer, bench_database
+from src.weather.models import WeatherData
+from src.weather.repository import WeatherRepository
+
+HISTORY_QUERY = (
+    select(WeatherData)
+    .where(WeatherData.city == text(":city"))
+    .order_by(WeatherData.fetched_at.desc())
+    .limit(1)
+)
+
+
+async def fill(engine: AsyncEngine, rows: int, cities: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            """
+            INSERT INTO weather_data (city, country, temperature, humidity, pressure, fetched_at)
+            SELECT 'City' || (g % :cities), 'XX', (g % 40)::float, g % 100, 1000,
+                   now() - make_interval(secs => g * 30)
+            FROM generate_series(1, :rows) AS g
+            """
+        ), {"rows": rows, "cities": cities})
+        await conn.execute(text(
+            """
+            INSERT INTO weather_latest (city, weather_id, country, temperature, humidity, pressure, fetched_at)
+            SELECT DISTINCT ON (city) city, id, country, temperature, humidity, pressure, fetched_at
+            FROM weather_data ORDER BY city, fetched_at DESC, id DESC
+            """
+        ))
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE weather_data"))
+        await conn.execute(text("VACUUM ANALYZE weather_latest"))
+
+
+async def measure(label: str, lookup, cities: int, lookups: int) -> None:
+    latencies = []
+    for _ in range(lookups):
+        city = f"City{random.randrange(cities)}"
+        with Timer() as timer:
+            await lookup(city)
+        latencies.append(timer.elapsed * 1000)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{label:<28} p50={quantiles[49]:8.3f} ms  p99={quantiles[98]:8.3f} ms")
+
+
+async def main(rows: int, cities: int, lookups: int) -> None:
+    async with bench_database() as engine:
+        print(f"filling {rows:,} rows over {cities} cities...")
+        await fill(engine, rows, cities)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def history_lookup(city: str):
+            async with session_maker() as session:
+                await session.execute(HISTORY_QUERY, {"city": city})
+
+        async def latest_lookup(city: str):
+            async with session_maker() as session:
+                await WeatherRepository(session).get_latest_weather(city)
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_weather_data_city_fetched_at"))
+            await conn.execute(text("CREATE INDEX ix_weather_data_city ON weather_data (city)"))
+            await conn.execute(text("ANALYZE weather_data"))
+        await measure("city index + sort", history_lookup, cities, lookups)
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_weather_data_city"))
+            await conn.execute(text(
+                "CREATE INDEX ix_weather_data_city_fetched_at ON weather_data (city, fetched_at DESC)"
+            ))
+            await conn.execute(text("ANALYZE weather_data"))
+        await measure("composite index", history_lookup, cities, lookups)
+
+        await measure("weather_latest PK lookup", latest_lookup, cities, lookups)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--cities", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.rows, args.cities, args.lookups))
@@ -0,0 +1,104 @@
+"""
+Throughput benchmark: requests/sec with logging disabled, synchronous, queued and sampled.
+
+Serves a trivial `/weather/{city}` route in-process (httpx ASGITransport) behind
+RequestContextMiddleware; every request binds the city and logs one success line,
+like a cache miss served from the upstream. The sink is /dev/null or, with
+`--write-latency-us`, a stream whose writes block for that long, to mimic a
+backpressured stdout pipe.
+
+Usage:
+    python -m benchmarks.logging_throughput --requests 5000 --concurrency 50 --write-latency-us 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+import structlog
+from fastapi import FastAPI
+from structlog.contextvars import bind_contextvars
+
+from src import utils
+
+bench_logger = structlog.get_logger()
+
+
+class SlowStream:
+    """Write sink where every write blocks for a fixed time."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.sink = open(os.devnull, "w")
+
+    def write(self, text: str) -> int:
+        time.sleep(self.latency)
+        return self.sink.write(text)
+
+    def flush(self) -> None:
+        self.sink.flush()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/weather/{city}")
+    async def get_weather(city: str):
+        bind_contextvars(city=city)
+        bench_logger.info("Successfully fetched weather data", city=city, sample=True)
+        return {"city": city, "temperature": 15.5}
+
+    app.add_middleware(utils.RequestContextMiddleware)
+    return app
+
+
+async def run(app: FastAPI, total: int, concurrency: int) -> float:
+    """Issues `total` requests with at most `concurrency` in flight; returns requests/sec."""
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one_call(i: int):
+            async with semaphore:
+                await client.get(f"/weather/city{i}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_call(i) for i in range(total)))
+        return total / (time.perf_counter() - started)
+
+
+MODES = {
+    # label: setup_logging kwargs
+    "disabled": {"level": "WARNING", "queue_size": 0},
+    "sync-json": {"queue_size": 0, "serializer": "json"},
+    "sync-orjson": {"queue_size": 0, "serializer": "orjson"},
+    "queue-orjson": {"queue_size": 10_000, "serializer": "orjson"},
+    "queue-sampled": {"queue_size": 10_000, "serializer": "orjson", "sample_rate": 0.1},
+}
+
+
+async def main(total: int, concurrency: int, write_latency: float) -> None:
+    global bench_logger
+    stream = SlowStream(write_latency) if write_latency > 0 else open(os.devnull, "w")
+    app = build_app()
+    for label, kwargs in MODES.items():
+        utils.setup_logging(stream=stream, **kwargs)
+        # Loggers cache their processors on first use; take a fresh one per mode
+        bench_logger = structlog.get_logger()
+        await run(app, 200, concurrency)
+        rps = await run(app, total, concurrency)
+        handler = logging.getLogger().handlers[0]
+        dropped = getattr(handler, "dropped", 0)
+        print(f"{label:<14} {rps:9.0f} req/s  dropped={dropped}")
+    utils.stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--write-latency-us", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.write_latency_us / 1_000_000))
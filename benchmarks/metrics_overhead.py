@@ -0,0 +1,75 @@
+"""
+Overhead benchmark: request latency with and without MetricsMiddleware.
+
+Serves a trivial `/weather/{city}` route in-process (httpx ASGITransport, no
+network, no database) so that the middleware is the only difference between the
+two runs, then times the bare cost of one histogram observation.
+
+Usage:
+    python -m benchmarks.metrics_overhead --requests 5000
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from src.metrics import HTTP_REQUEST_DURATION, MetricsMiddleware
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/weather/{city}")
+    async def get_weather(city: str):
+        return {"city": city, "temperature": 15.5}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def run(app: FastAPI, total: int) -> list[float]:
+    """Issues `total` sequential requests; returns latencies in microseconds."""
+    latencies: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(100):
+            await client.get(f"/weather/warmup{i}")
+        for i in range(total):
+            start = time.perf_counter()
+            await client.get(f"/weather/city{i}")
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> float:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{label:<14} p50={quantiles[49]:8.1f} us  p99={quantiles[98]:8.1f} us  n={len(latencies)}")
+    return quantiles[49]
+
+
+def observe_cost(total: int) -> float:
+    """Average cost of one labelled histogram observation, in microseconds."""
+    start = time.perf_counter()
+    for _ in range(total):
+        HTTP_REQUEST_DURATION.labels("GET", "/bench", "200").observe(0.001)
+    return (time.perf_counter() - start) / total * 1_000_000
+
+
+async def main(total: int) -> None:
+    plain = report("plain", await run(build_app(instrumented=False), total))
+    instrumented = report("instrumented", await run(build_app(instrumented=True), total))
+    print(f"middleware overhead at p50: {instrumented - plain:+.1f} us ({(instrumented / plain - 1) * 100:+.1f}%)")
+    print(f"histogram observe: {observe_cost(total * 10):.2f} us per call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.requests))
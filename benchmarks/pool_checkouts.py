@@ -0,0 +1,142 @@
+"""
+Load test: DB pool checkouts and connection hold time per request.
+
+Drives the real app in-process (httpx ASGITransport) against a throwaway
+database with a small pool and a stub upstream that answers after a delay.
+Two workloads:
+
+1. `miss`: every request is a batch read of unseen cities, i.e. DB lookup,
+   upstream fetch, bulk insert
+2. `hit`: the same cities again, answered from the cache
+
+For each it reports pool checkouts per request, the mean time a connection was
+held, the peak number checked out at once and requests/sec. Run it on two
+revisions to compare before and after a change.
+
+Usage:
+    python -m benchmarks.pool_checkouts --requests 500 --concurrency 50 --pool-size 5 --upstream-ms 50
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.common import bench_database
+from src.cities.popularity import PopularityTracker, get_popularity_tracker
+from src.database import get_async_session
+from src.http_client import get_http_client
+from src.main import app
+from src.weather.cache import WeatherCache, get_weather_cache
+from src.weather.ratelimit import UpstreamRateLimiter, get_upstream_rate_limiter
+
+
+class PoolProbe:
+    """Counts checkouts and measures how long connections stay checked out."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak = 0
+        self.held = 0.0
+        self._since: dict[int, float] = {}
+
+    def attach(self, pool) -> None:
+        event.listen(pool, "checkout", self.on_checkout)
+        event.listen(pool, "checkin", self.on_checkin)
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+        self.checked_out += 1
+        self.peak = max(self.peak, self.checked_out)
+        self._since[id(connection_record)] = time.perf_counter()
+
+    def on_checkin(self, dbapi_connection, connection_record) -> None:
+        started = self._since.pop(id(connection_record), None)
+        if started is not None:
+            self.checked_out -= 1
+            self.held += time.perf_counter() - started
+
+    def reset(self) -> None:
+        self.checkouts, self.peak, self.held = 0, self.checked_out, 0.0
+
+
+def make_upstream(delay: float) -> httpx.AsyncClient:
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={
+            "name": request.url.params["q"],
+            "sys": {"country": "XX"},
+            "main": {"temp": 10.0, "humidity": 50, "pressure": 1000},
+        })
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+
+
+async def run(client: httpx.AsyncClient, total: int, concurrency: int) -> float:
+    """Issues `total` batch reads with at most `concurrency` in flight; returns requests/sec."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call(i: int):
+        async with semaphore:
+            response = await client.get("/weather/", params={"cities": f"BenchA{i},BenchB{i}"})
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+def report(label: str, probe: PoolProbe, total: int, rps: float) -> None:
+    mean_hold_ms = probe.held / probe.checkouts * 1000 if probe.checkouts else 0.0
+    print(
+        f"{label:<5} checkouts/request={probe.checkouts / total:5.2f}  mean hold={mean_hold_ms:7.1f} ms"
+        f"  peak checked out={probe.peak:3d}  {rps:8.1f} req/s"
+    )
+
+
+async def main(total: int, concurrency: int, pool_size: int, upstream_delay: float) -> None:
+    async with bench_database(pool_size=pool_size, max_overflow=0, pool_timeout=60) as engine:
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        probe = PoolProbe()
+        probe.attach(engine.sync_engine.pool)
+
+        async def bench_session() -> AsyncGenerator[AsyncSession, None]:
+            async with session_maker() as session:
+                yield session
+
+        http_client = make_upstream(upstream_delay)
+        cache = WeatherCache(redis=None)
+        limiter = UpstreamRateLimiter(redis=None, calls_per_minute=10**7, daily_budget=10**9)
+        popularity = PopularityTracker(redis=None)
+        app.dependency_overrides.update({
+            get_async_session: bench_session,
+            get_http_client: lambda: http_client,
+            get_weather_cache: lambda: cache,
+            get_upstream_rate_limiter: lambda: limiter,
+            get_popularity_tracker: lambda: popularity,
+        })
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                for label in ("miss", "hit"):
+                    probe.reset()
+                    rps = await run(client, total, concurrency)
+                    report(label, probe, total, rps)
+        finally:
+            app.dependency_overrides.clear()
+            await http_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--upstream-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.requests, args.concurrency, args.pool_size, args.upstream_ms / 1000))
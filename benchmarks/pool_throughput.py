@@ -0,0 +1,77 @@
+"""
+Pool throughput benchmark: latest-weather lookups at 1-64 concurrent clients.
+
+Each client repeatedly opens a session, reads one city's latest row through
+`WeatherRepository.get_latest_weather` and closes the session, like a request
+that misses the cache. The engine uses the settings-driven pool options
+(`engine_options`), once with prepared statements cached per connection and
+once in PgBouncer-compatible mode, where nothing is reused.
+
+Usage:
+    python -m benchmarks.pool_throughput --seconds 3 --cities 200
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from benchmarks.common import bench_database
+from src.config import settings
+from src.database import engine_options
+from src.weather.entity import WeatherEntity
+from src.weather.repository import WeatherRepository
+
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32, 64)
+
+
+async def fill(engine: AsyncEngine, cities: int) -> None:
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        await WeatherRepository(session).create_weather_records_bulk([
+            WeatherEntity(city=f"City{i}", country="XX", temperature=10.0, humidity=50, pressure=1000)
+            for i in range(cities)
+        ])
+
+
+async def run(engine: AsyncEngine, clients: int, cities: int, seconds: float) -> tuple[float, float]:
+    """Runs `clients` lookup loops for `seconds`; returns lookups/sec and p99 latency in ms."""
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    deadline = time.perf_counter() + seconds
+    latencies: list[float] = []
+
+    async def client() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            async with session_maker() as session:
+                await WeatherRepository(session).get_latest_weather(f"City{random.randrange(cities)}")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+    return len(latencies) / elapsed, p99
+
+
+async def main(seconds: float, cities: int) -> None:
+    print(f"pool_size={settings.DB_POOL_SIZE} max_overflow={settings.DB_MAX_OVERFLOW} "
+          f"pre_ping={settings.DB_POOL_PRE_PING} statement_cache={settings.DB_STATEMENT_CACHE_SIZE}")
+    for label, pgbouncer in (("cached", False), ("pgbouncer", True)):
+        async with bench_database(**engine_options(pgbouncer)) as engine:
+            await fill(engine, cities)
+            for clients in CONCURRENCY_LEVELS:
+                rate, p99 = await run(engine, clients, cities, seconds)
+                print(f"{label:<10} clients={clients:3d}  {rate:9.0f} lookups/s  p99={p99:7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--cities", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.seconds, args.cities))
@@ -1 +1,2 @@
-from src.weather.models import *
\ No newline at end of file
+from src.weather.models import *
+from src.cities.models import *
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""composite (city, fetched_at DESC) index and weather_latest table
+
+Revision ID: b7c4e2f19a31
+Revises: 39a1912ca943
+Create Date: 2026-10-17 10:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c4e2f19a31'
+down_revision: Union[str, Sequence[str], None] = '39a1912ca943'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build the index without blocking writes on a large history table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_weather_data_city_fetched_at',
+            'weather_data',
+            ['city', sa.text('fetched_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # Superseded by the composite index (city is its leading column)
+        op.drop_index(op.f('ix_weather_data_city'), table_name='weather_data', postgresql_concurrently=True)
+
+    op.create_table('weather_latest',
+    sa.Column('city', sa.String(length=100), nullable=False),
+    sa.Column('weather_id', sa.Integer(), nullable=False),
+    sa.Column('country', sa.String(length=10), nullable=False),
+    sa.Column('temperature', sa.Float(), nullable=False),
+    sa.Column('humidity', sa.Integer(), nullable=False),
+    sa.Column('pressure', sa.Integer(), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('city')
+    )
+    op.execute(
+        """
+        INSERT INTO weather_latest (city, weather_id, country, temperature, humidity, pressure, fetched_at)
+        SELECT DISTINCT ON (city) city, id, country, temperature, humidity, pressure, fetched_at
+        FROM weather_data
+        ORDER BY city, fetched_at DESC, id DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('weather_latest')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_weather_data_city'), 'weather_data', ['city'], unique=False, postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_weather_data_city_fetched_at', table_name='weather_data', postgresql_concurrently=True
+        )
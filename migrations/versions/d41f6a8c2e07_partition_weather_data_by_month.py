@@ -0,0 +1,120 @@
+"""partition weather_data by month on fetched_at, add hourly rollups
+
+Revision ID: d41f6a8c2e07
+Revises: b7c4e2f19a31
+Create Date: 2026-10-17 13:40:05.771942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f6a8c2e07'
+down_revision: Union[str, Sequence[str], None] = 'b7c4e2f19a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions created up front beyond the current month; the
+# maintenance task keeps extending this window afterwards.
+MONTHS_AHEAD = 3
+
+
+def _weather_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('weather_data_id_seq'::regclass)"), nullable=False),
+        sa.Column('city', sa.String(length=100), nullable=False),
+        sa.Column('country', sa.String(length=10), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=False),
+        sa.Column('humidity', sa.Integer(), nullable=False),
+        sa.Column('pressure', sa.Integer(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('weather_data', 'weather_data_legacy')
+    op.execute('ALTER TABLE weather_data_legacy RENAME CONSTRAINT weather_data_pkey TO weather_data_legacy_pkey')
+    op.execute('ALTER INDEX ix_weather_data_id RENAME TO ix_weather_data_legacy_id')
+    op.execute('ALTER INDEX ix_weather_data_city_fetched_at RENAME TO ix_weather_data_legacy_city_fetched_at')
+
+    op.create_table('weather_data',
+    *_weather_columns(),
+    sa.PrimaryKeyConstraint('id', 'fetched_at'),
+    postgresql_partition_by='RANGE (fetched_at)'
+    )
+    # Hand the id sequence over before the legacy table (its owner) is dropped
+    op.execute('ALTER SEQUENCE weather_data_id_seq OWNED BY weather_data.id')
+
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month date := date_trunc(
+                'month', coalesce((SELECT min(fetched_at) FROM weather_data_legacy), now()) AT TIME ZONE 'UTC'
+            )::date;
+            last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF weather_data FOR VALUES FROM (%L) TO (%L)',
+                    'weather_data_p' || to_char(month, 'YYYY_MM'),
+                    month::timestamp AT TIME ZONE 'UTC',
+                    (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$;
+        """
+    )
+    op.execute('CREATE TABLE weather_data_default PARTITION OF weather_data DEFAULT')
+
+    op.execute(
+        """
+        INSERT INTO weather_data (id, city, country, temperature, humidity, pressure, fetched_at)
+        SELECT id, city, country, temperature, humidity, pressure, fetched_at FROM weather_data_legacy
+        """
+    )
+    op.drop_table('weather_data_legacy')
+    op.create_index(op.f('ix_weather_data_id'), 'weather_data', ['id'], unique=False)
+    op.create_index('ix_weather_data_city_fetched_at', 'weather_data', ['city', sa.text('fetched_at DESC')], unique=False)
+
+    op.create_table('weather_data_hourly',
+    sa.Column('city', sa.String(length=100), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('country', sa.String(length=10), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.Column('temperature_avg', sa.Float(), nullable=False),
+    sa.Column('temperature_min', sa.Float(), nullable=False),
+    sa.Column('temperature_max', sa.Float(), nullable=False),
+    sa.Column('humidity_avg', sa.Float(), nullable=False),
+    sa.Column('pressure_avg', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('city', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('weather_data_hourly')
+
+    op.create_table('weather_data_plain',
+    *_weather_columns(),
+    sa.PrimaryKeyConstraint('id', name='weather_data_plain_pkey')
+    )
+    op.execute(
+        """
+        INSERT INTO weather_data_plain (id, city, country, temperature, humidity, pressure, fetched_at)
+        SELECT id, city, country, temperature, humidity, pressure, fetched_at FROM weather_data
+        """
+    )
+    op.execute('ALTER SEQUENCE weather_data_id_seq OWNED BY weather_data_plain.id')
+    # Drops every partition along with the parent
+    op.drop_table('weather_data')
+
+    op.rename_table('weather_data_plain', 'weather_data')
+    op.execute('ALTER TABLE weather_data RENAME CONSTRAINT weather_data_plain_pkey TO weather_data_pkey')
+    op.create_index(op.f('ix_weather_data_id'), 'weather_data', ['id'], unique=False)
+    op.create_index('ix_weather_data_city_fetched_at', 'weather_data', ['city', sa.text('fetched_at DESC')], unique=False)
@@ -0,0 +1,30 @@
+"""last_checked_at on weather_latest
+
+Revision ID: e5a93c0d7f12
+Revises: ada6aa4890ea
+Create Date: 2026-10-17 20:41:09.713254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a93c0d7f12'
+down_revision: Union[str, Sequence[str], None] = 'ada6aa4890ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('weather_latest', sa.Column('last_checked_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE weather_latest SET last_checked_at = fetched_at")
+    op.alter_column('weather_latest', 'last_checked_at', nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('weather_latest', 'last_checked_at')
@@ -1,5 +1,11 @@
+import time
+
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_process_init, worker_process_shutdown
+
 from src.config import settings
+from src.metrics import TASK_DURATION, mark_process_dead
+from src.worker_runtime import init_worker_runtime, shutdown_worker_runtime
 
 celery_app = Celery(
     "weather_worker",
@@ -9,9 +15,48 @@ celery_app = Celery(
 )
 
 celery_app.conf.beat_schedule = {
-    "fetch-weather-every-hour": {
+    "refresh-due-cities": {
         "task": "src.weather.tasks.update_weather_data",
-        "schedule": settings.UPDATE_INTERVAL_SECONDS,
+        "schedule": settings.SCHEDULER_TICK_SECONDS,
+    },
+    "retune-refresh-intervals": {
+        "task": "src.weather.tasks.retune_refresh_intervals",
+        "schedule": settings.POPULARITY_RETUNE_SECONDS,
+    },
+    "maintain-weather-partitions-daily": {
+        "task": "src.weather.tasks.maintain_weather_partitions",
+        "schedule": settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
     },
 }
-celery_app.conf.timezone = "UTC"
\ No newline at end of file
+celery_app.conf.timezone = "UTC"
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Starts the per-process async runtime (event loop, DB pool, HTTP client) once the worker child has started."""
+    init_worker_runtime()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    """Closes the per-process async runtime before the worker child exits."""
+    shutdown_worker_runtime()
+    mark_process_dead()
+
+
+# Start times of the tasks running in this process, by task id
+_task_started: dict[str, float] = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    """Notes when a task starts running."""
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def stop_task_timer(task_id=None, task=None, state=None, **kwargs):
+    """Records the task's run time by name and final state."""
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
@@ -0,0 +1,11 @@
+from fastapi import Depends
+from typing import Annotated
+
+from src.cities.repository import TrackedCityRepository
+ITrackedCityRepository: type[TrackedCityRepository] = Annotated[TrackedCityRepository, Depends()]
+
+from src.cities.popularity import PopularityTracker, get_popularity_tracker
+IPopularityTracker: type[PopularityTracker] = Annotated[PopularityTracker, Depends(get_popularity_tracker)]
+
+from src.cities.service import TrackedCityService
+ITrackedCityService: type[TrackedCityService] = Annotated[TrackedCityService, Depends()]
@@ -0,0 +1,11 @@
+from src.exceptions import Conflict, NotFound
+
+
+class TrackedCityNotFound(NotFound):
+    """Exception raised when a tracked city does not exist."""
+    pass
+
+
+class TrackedCityAlreadyExists(Conflict):
+    """Exception raised when a city is already tracked."""
+    pass
@@ -0,0 +1,31 @@
+from datetime import datetime
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, false, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class TrackedCity(Base):
+    """A city refreshed by the scheduler, with its own cadence."""
+
+    __tablename__ = "tracked_cities"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100), unique=True)
+    refresh_interval_seconds: Mapped[int] = mapped_column(Integer)
+    priority: Mapped[int] = mapped_column(Integer, default=0)  # Higher is claimed first
+    enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Interval follows read demand; opt-in, so rows that predate the flag keep their interval
+    adaptive: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
+    next_due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    owm_city_id: Mapped[int | None] = mapped_column(Integer, nullable=True)  # Learned on the first fetch by name
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # The scheduler only ever scans enabled cities by due time
+        Index("ix_tracked_cities_next_due_at", "next_due_at", postgresql_where=enabled.is_(True)),
+    )
+
+    def __repr__(self) -> str:
+        return f"<TrackedCity(name={self.name}, every={self.refresh_interval_seconds}s)>"
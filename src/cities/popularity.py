@@ -0,0 +1,227 @@
+import asyncio
+import contextlib
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.redis_client import get_redis
+from src.utils import logger
+
+
+@dataclass(frozen=True, slots=True)
+class CityDemand:
+    city: str
+    reads_per_hour: float
+    refresh_interval_seconds: int
+
+
+def demand_interval(
+        rate: float,
+        freshness_slo: float = settings.FRESHNESS_SLO_SECONDS,
+        max_interval: float = settings.MAX_REFRESH_INTERVAL_SECONDS
+) -> int:
+    """
+    Picks the refresh interval that keeps a city fresh at the lowest upstream cost.
+
+    Polling every `1 / rate` seconds costs about as many upstream calls as fetching
+    on every read, but keeps reads served from a warm cache. Polling faster than the
+    freshness SLO buys nothing; cities read less often than `max_interval` are left
+    to on-demand fetches.
+
+    Args:
+        rate (float): Estimated reads per second.
+        freshness_slo (float): Maximum acceptable data age for hot cities, in seconds.
+        max_interval (float): Interval used for cold cities, in seconds.
+
+    Returns:
+        int: Refresh interval in seconds.
+    """
+    if rate <= 0:
+        return int(max_interval)
+    return int(min(max(1 / rate, freshness_slo), max_interval))
+
+
+class PopularityTracker:
+    """
+    Time-decayed read counter per city.
+
+    Reads are counted in fixed time windows, kept in-process and, when a Redis client
+    is given, in one shared sorted set per window. Rates weight each window by
+    0.5 ** (age / half_life), so recent reads dominate and idle cities fade away.
+
+    Recording a read never touches Redis: counts accumulate in process and a
+    background task (see `start`) adds them to the shared sets every `flush_interval`.
+    """
+
+    def __init__(
+            self,
+            redis: Redis | None = None,
+            half_life: float = settings.POPULARITY_HALF_LIFE_SECONDS,
+            window: int = settings.POPULARITY_WINDOW_SECONDS,
+            key_prefix: str = "weather:popularity:",
+            flush_interval: float = settings.POPULARITY_FLUSH_INTERVAL_SECONDS,
+    ):
+        """
+        Initializes the PopularityTracker.
+
+        Args:
+            redis (Redis | None): Shared Redis client. If None, counts are per process.
+            half_life (float): Seconds after which a read counts half as much.
+            window (int): Width of a counting window in seconds.
+            key_prefix (str): Prefix for Redis keys.
+            flush_interval (float): Seconds between pushes of the in-process counts to Redis.
+        """
+        self.redis = redis
+        self.half_life = half_life
+        self.window = window
+        self.key_prefix = key_prefix
+        # Windows older than four half-lives weigh under 1/16 and are dropped
+        self.windows = max(1, math.ceil(4 * half_life / window))
+        self.flush_interval = flush_interval
+        self._local: dict[int, Counter[str]] = {}
+        self._unflushed: dict[int, Counter[str]] = {}
+        self._task: asyncio.Task | None = None
+
+    def record(self, *cities: str, now: float | None = None) -> None:
+        """
+        Counts one read of each given city, in process only.
+
+        Args:
+            *cities (str): City names as stored (the upstream's canonical spelling).
+            now (float | None): Unix time of the read; defaults to the current time.
+        """
+        if not cities:
+            return
+        index = int((now or time.time()) // self.window)
+        self._local.setdefault(index, Counter()).update(cities)
+        for stale in [i for i in self._local if i <= index - self.windows]:
+            del self._local[stale]
+        if self.redis is not None:
+            self._unflushed.setdefault(index, Counter()).update(cities)
+
+    def start(self) -> None:
+        """Starts pushing counts to Redis in the background. Called on app startup."""
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stops the background task and pushes the remaining counts. Called on app shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Adds the counts recorded since the last flush to the shared sets; on Redis errors they are dropped."""
+        if self.redis is None or not self._unflushed:
+            return
+        unflushed, self._unflushed = self._unflushed, {}
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for index, counts in unflushed.items():
+                    key = f"{self.key_prefix}{index}"
+                    for city, count in counts.items():
+                        pipe.zincrby(key, count, city)
+                    pipe.expire(key, self.windows * self.window)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Popularity counter unavailable", error=str(e))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def local_rates(self, now: float | None = None) -> dict[str, float]:
+        """Returns decayed reads per second per city, from this process' counts only."""
+        return self._rates(dict(self._local), now or time.time())
+
+    async def shared_rates(self, now: float | None = None) -> dict[str, float]:
+        """
+        Returns decayed reads per second per city, across all processes.
+
+        Raises:
+            RedisError: If Redis is not configured or unreachable.
+        """
+        if self.redis is None:
+            raise RedisError("Popularity tracker has no Redis client")
+        now = now or time.time()
+        current = int(now // self.window)
+        indexes = range(current - self.windows + 1, current + 1)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for index in indexes:
+                pipe.zrange(f"{self.key_prefix}{index}", 0, -1, withscores=True)
+            results = await pipe.execute()
+
+        counts = {}
+        for index, members in zip(indexes, results):
+            counts[index] = Counter({
+                (member.decode() if isinstance(member, bytes) else member): score for member, score in members
+            })
+        return self._rates(counts, now)
+
+    async def rates(self, now: float | None = None) -> dict[str, float]:
+        """Returns shared rates, falling back to this process' counts if Redis is unavailable."""
+        if self.redis is not None:
+            try:
+                return await self.shared_rates(now)
+            except RedisError as e:
+                logger.warning("Popularity counters unavailable, using local counts", error=str(e))
+        return self.local_rates(now)
+
+    def _rates(self, counts: dict[int, Counter[str]], now: float) -> dict[str, float]:
+        """Weights per-window counts by their age and divides by the equally weighted time covered."""
+        current = int(now // self.window)
+        reads: Counter[str] = Counter()
+        covered = 0.0
+        for index in range(current - self.windows + 1, current + 1):
+            start = index * self.window
+            duration = min(self.window, now - start)
+            weight = 0.5 ** ((now - start - duration / 2) / self.half_life)
+            covered += weight * duration
+            for city, count in counts.get(index, {}).items():
+                reads[city] += weight * count
+        return {city: value / covered for city, value in reads.items() if value > 0}
+
+    def clear(self) -> None:
+        """Drops the in-process counts."""
+        self._local.clear()
+        self._unflushed.clear()
+
+
+def hot_set(rates: dict[str, float], limit: int = settings.POPULARITY_HOT_SET_SIZE) -> list[CityDemand]:
+    """
+    Returns the most-read cities with their demand-driven refresh intervals.
+
+    Args:
+        rates (dict[str, float]): Reads per second per city.
+        limit (int): Maximum number of cities.
+
+    Returns:
+        list[CityDemand]: Cities by descending read rate.
+    """
+    top = sorted(rates.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [CityDemand(city, round(rate * 3600, 2), demand_interval(rate)) for city, rate in top]
+
+
+_popularity_tracker: PopularityTracker | None = None
+
+
+def get_popularity_tracker() -> PopularityTracker:
+    """Dependency for getting the process-wide popularity tracker.
+
+    Returns:
+        PopularityTracker: The shared tracker, backed by Redis if POPULARITY_REDIS_ENABLED.
+    """
+    global _popularity_tracker
+    if _popularity_tracker is None:
+        redis = get_redis() if settings.POPULARITY_REDIS_ENABLED else None
+        _popularity_tracker = PopularityTracker(redis=redis)
+    return _popularity_tracker
@@ -0,0 +1,266 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import String, any_, bindparam, select, delete, update, func
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+
+from src.cities.models import TrackedCity
+from src.cities.schemas import TrackedCityCreate, TrackedCityUpdate, TrackedCityResponse
+from src.cities.exceptions import TrackedCityNotFound, TrackedCityAlreadyExists
+
+from src.database import ISession, read_only
+
+OWM_IDS_BY_NAMES = select(TrackedCity.name, TrackedCity.owm_city_id).where(
+    TrackedCity.name == any_(bindparam("names", type_=ARRAY(String))),
+    TrackedCity.owm_city_id.is_not(None),
+)
+SET_OWM_CITY_ID = (
+    update(TrackedCity.__table__)
+    .where(TrackedCity.name == bindparam("city_name"))
+    .values(owm_city_id=bindparam("owm_city_id"))
+)
+
+
+class TrackedCityRepository:
+    """Data access for the tracked-city registry."""
+
+    def __init__(self, session: ISession):
+        self.session = session
+
+    async def create_city(self, data: TrackedCityCreate) -> TrackedCityResponse:
+        """
+        Starts tracking a city; it is due immediately.
+
+        Args:
+            data (TrackedCityCreate): The city to track.
+
+        Returns:
+            TrackedCityResponse: The created city.
+
+        Raises:
+            TrackedCityAlreadyExists: If the city is already tracked.
+        """
+        city = TrackedCity(**data.model_dump())
+        self.session.add(city)
+        try:
+            await self.session.flush()
+        except IntegrityError:
+            await self.session.rollback()
+            raise TrackedCityAlreadyExists(f"City '{data.name}' is already tracked.")
+        await self.session.refresh(city)
+        dto = TrackedCityResponse.model_validate(city)
+        await self.session.commit()
+        return dto
+
+    @read_only
+    async def list_cities(self) -> list[TrackedCityResponse]:
+        """
+        Lists tracked cities, most urgent first.
+
+        Returns:
+            list[TrackedCityResponse]: All tracked cities ordered by priority and due time.
+        """
+        query = select(TrackedCity).order_by(TrackedCity.priority.desc(), TrackedCity.next_due_at, TrackedCity.id)
+        result = await self.session.scalars(query)
+        return [TrackedCityResponse.model_validate(city) for city in result]
+
+    @read_only
+    async def get_city(self, city_id: int) -> TrackedCityResponse:
+        """
+        Retrieves a tracked city.
+
+        Args:
+            city_id (int): The ID of the tracked city.
+
+        Returns:
+            TrackedCityResponse: The tracked city.
+
+        Raises:
+            TrackedCityNotFound: If the city does not exist.
+        """
+        city = await self.session.get(TrackedCity, city_id)
+        if city is None:
+            raise TrackedCityNotFound(f"Tracked city with ID {city_id} not found.")
+        return TrackedCityResponse.model_validate(city)
+
+    async def update_city(self, city_id: int, data: TrackedCityUpdate) -> TrackedCityResponse:
+        """
+        Updates a tracked city's cadence, priority or schedule.
+
+        Args:
+            city_id (int): The ID of the tracked city.
+            data (TrackedCityUpdate): The fields to change.
+
+        Returns:
+            TrackedCityResponse: The updated city.
+
+        Raises:
+            TrackedCityNotFound: If the city does not exist.
+        """
+        values = data.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get_city(city_id)
+
+        query = update(TrackedCity).where(TrackedCity.id == city_id).values(**values).returning(TrackedCity)
+        city = (await self.session.execute(query)).scalar_one_or_none()
+        if city is None:
+            await self.session.rollback()
+            raise TrackedCityNotFound(f"Tracked city with ID {city_id} not found.")
+        dto = TrackedCityResponse.model_validate(city)
+        await self.session.commit()
+        return dto
+
+    async def delete_city(self, city_id: int) -> None:
+        """
+        Stops tracking a city. Its stored weather history is kept.
+
+        Args:
+            city_id (int): The ID of the tracked city.
+
+        Raises:
+            TrackedCityNotFound: If the city does not exist.
+        """
+        query = delete(TrackedCity).where(TrackedCity.id == city_id).returning(TrackedCity.id)
+        if (await self.session.execute(query)).scalar_one_or_none() is None:
+            await self.session.rollback()
+            raise TrackedCityNotFound(f"Tracked city with ID {city_id} not found.")
+        await self.session.commit()
+
+    async def claim_due_cities(self, now: datetime, limit: int) -> list[str]:
+        """
+        Claims the cities that are due and schedules their next refresh.
+
+        Due rows are locked with FOR UPDATE SKIP LOCKED and rescheduled in the same
+        statement, so concurrent schedulers claim disjoint sets of cities.
+
+        Args:
+            now (datetime): Claim time.
+            limit (int): Maximum number of cities to claim, most urgent first.
+
+        Returns:
+            list[str]: Names of the claimed cities, by descending priority.
+        """
+        due = (
+            select(TrackedCity.id)
+            .where(TrackedCity.enabled.is_(True), TrackedCity.next_due_at <= now)
+            .order_by(TrackedCity.priority.desc(), TrackedCity.next_due_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            update(TrackedCity)
+            .where(TrackedCity.id.in_(due.scalar_subquery()))
+            .values(
+                next_due_at=now + func.make_interval(0, 0, 0, 0, 0, 0, TrackedCity.refresh_interval_seconds),
+                last_claimed_at=now,
+            )
+            .returning(TrackedCity.name, TrackedCity.priority)
+        )
+        rows = (await self.session.execute(query)).all()
+        await self.session.commit()
+        return [name for name, _ in sorted(rows, key=lambda row: -row.priority)]
+
+    async def release_claimed_cities(self, names: Sequence[str]) -> int:
+        """
+        Makes claimed cities due again at the time they were claimed, for a refresh that did not run.
+
+        Args:
+            names (Sequence[str]): Names of cities claimed by `claim_due_cities`.
+
+        Returns:
+            int: Number of cities released.
+        """
+        if not names:
+            return 0
+        query = (
+            update(TrackedCity)
+            .where(TrackedCity.name.in_(names), TrackedCity.last_claimed_at.is_not(None))
+            .values(next_due_at=TrackedCity.last_claimed_at)
+            .returning(TrackedCity.id)
+        )
+        released = len((await self.session.execute(query)).all())
+        await self.session.commit()
+        return released
+
+    @read_only
+    async def get_owm_city_ids(self, names: Sequence[str]) -> dict[str, int]:
+        """
+        Looks up the resolved OpenWeatherMap IDs of tracked cities.
+
+        Args:
+            names (Sequence[str]): Names of tracked cities.
+
+        Returns:
+            dict[str, int]: OpenWeatherMap ID per name, for the cities that have one.
+        """
+        if not names:
+            return {}
+        rows = await self.session.execute(OWM_IDS_BY_NAMES, {"names": list(names)})
+        return {name: owm_city_id for name, owm_city_id in rows.all()}
+
+    async def set_owm_city_ids(self, ids: dict[str, int]) -> None:
+        """
+        Stores resolved OpenWeatherMap IDs; names that are not tracked are ignored.
+
+        Args:
+            ids (dict[str, int]): OpenWeatherMap ID per city name.
+        """
+        if not ids:
+            return
+        await self.session.execute(
+            SET_OWM_CITY_ID, [{"city_name": name, "owm_city_id": owm_city_id} for name, owm_city_id in ids.items()]
+        )
+        await self.session.commit()
+
+    async def apply_intervals(self, intervals: dict[int, int], now: datetime) -> None:
+        """
+        Sets new refresh intervals and pulls next_due_at forward where the new interval is shorter.
+
+        Args:
+            intervals (dict[int, int]): New interval in seconds per tracked city ID.
+            now (datetime): Reference time for cities that were never claimed.
+        """
+        if not intervals:
+            return
+        interval = func.make_interval(0, 0, 0, 0, 0, 0, bindparam("interval"))
+        query = (
+            update(TrackedCity.__table__)
+            .where(TrackedCity.id == bindparam("city_id"))
+            .values(
+                refresh_interval_seconds=bindparam("interval"),
+                next_due_at=func.least(
+                    TrackedCity.next_due_at,
+                    func.coalesce(TrackedCity.last_claimed_at, now) + interval,
+                ),
+            )
+        )
+        await self.session.execute(
+            query, [{"city_id": city_id, "interval": seconds} for city_id, seconds in intervals.items()]
+        )
+        await self.session.commit()
+
+    async def track_cities(self, intervals: dict[str, int]) -> list[str]:
+        """
+        Starts tracking the given cities as adaptive, skipping names that are already tracked.
+
+        Args:
+            intervals (dict[str, int]): Refresh interval in seconds per city name.
+
+        Returns:
+            list[str]: Names of the cities that were added.
+        """
+        if not intervals:
+            return []
+        query = (
+            pg_insert(TrackedCity)
+            .values([
+                {"name": name, "refresh_interval_seconds": seconds, "priority": 0, "enabled": True, "adaptive": True}
+                for name, seconds in intervals.items()
+            ])
+            .on_conflict_do_nothing(index_elements=[TrackedCity.name])
+            .returning(TrackedCity.name)
+        )
+        added = list((await self.session.scalars(query)).all())
+        await self.session.commit()
+        return added
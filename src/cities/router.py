@@ -0,0 +1,105 @@
+from fastapi import APIRouter, status
+
+from src.cities.dependencies import ITrackedCityService
+from src.cities.schemas import TrackedCityCreate, TrackedCityUpdate, TrackedCityResponse, CityDemandResponse
+
+router = APIRouter(prefix="/cities", tags=["Tracked cities"])
+
+
+@router.post("/", response_model=TrackedCityResponse, status_code=status.HTTP_201_CREATED)
+async def create_city(
+    city: TrackedCityCreate,
+    service: ITrackedCityService
+):
+    """
+    Starts tracking a city. It is refreshed on the next scheduler tick.
+
+    Args:
+        city (TrackedCityCreate): The city, its refresh interval and priority.
+        service (ITrackedCityService): The tracked-city service.
+
+    Returns:
+        TrackedCityResponse: The created city.
+    """
+    return await service.create_city(city)
+
+
+@router.get("/", response_model=list[TrackedCityResponse])
+async def list_cities(service: ITrackedCityService):
+    """
+    Lists tracked cities, highest priority and earliest due first.
+
+    Args:
+        service (ITrackedCityService): The tracked-city service.
+
+    Returns:
+        list[TrackedCityResponse]: The tracked cities.
+    """
+    return await service.list_cities()
+
+
+@router.get("/hot", response_model=list[CityDemandResponse])
+async def get_hot_cities(service: ITrackedCityService):
+    """
+    Lists the most-read cities with their decayed read rate and demand-driven refresh interval.
+
+    Args:
+        service (ITrackedCityService): The tracked-city service.
+
+    Returns:
+        list[CityDemandResponse]: Cities by descending read rate, flagged if tracked.
+    """
+    return await service.get_hot_set()
+
+
+@router.get("/{city_id}", response_model=TrackedCityResponse)
+async def get_city(
+    city_id: int,
+    service: ITrackedCityService
+):
+    """
+    Retrieves a tracked city.
+
+    Args:
+        city_id (int): The ID of the tracked city.
+        service (ITrackedCityService): The tracked-city service.
+
+    Returns:
+        TrackedCityResponse: The tracked city.
+    """
+    return await service.get_city(city_id)
+
+
+@router.patch("/{city_id}", response_model=TrackedCityResponse)
+async def update_city(
+    city_id: int,
+    city: TrackedCityUpdate,
+    service: ITrackedCityService
+):
+    """
+    Updates a tracked city's refresh interval, priority, enabled flag or next due time.
+
+    Args:
+        city_id (int): The ID of the tracked city.
+        city (TrackedCityUpdate): The fields to change.
+        service (ITrackedCityService): The tracked-city service.
+
+    Returns:
+        TrackedCityResponse: The updated city.
+    """
+    return await service.update_city(city_id, city)
+
+
+@router.delete("/{city_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_city(
+    city_id: int,
+    service: ITrackedCityService
+):
+    """
+    Stops tracking a city.
+
+    Args:
+        city_id (int): The ID of the tracked city.
+        service (ITrackedCityService): The tracked-city service.
+    """
+    await service.delete_city(city_id)
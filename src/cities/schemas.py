@@ -0,0 +1,71 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from src.config import settings
+
+
+class TrackedCityBase(BaseModel):
+    """Base schema for a tracked city."""
+
+    name: str = Field(..., min_length=1, max_length=100)
+    refresh_interval_seconds: int = Field(settings.UPDATE_INTERVAL_SECONDS, ge=settings.MIN_REFRESH_INTERVAL_SECONDS)
+    priority: int = 0
+    enabled: bool = True
+    adaptive: bool = True  # Let read demand drive refresh_interval_seconds
+
+
+class TrackedCityCreate(TrackedCityBase):
+    """Schema for starting to track a city."""
+
+    @model_validator(mode="after")
+    def keep_explicit_interval(self) -> "TrackedCityCreate":
+        """An explicit refresh_interval_seconds is not adaptive unless adaptive is set as well."""
+        if "adaptive" not in self.model_fields_set:
+            self.adaptive = "refresh_interval_seconds" not in self.model_fields_set
+        return self
+
+
+class TrackedCityUpdate(BaseModel):
+    """Schema for updating a tracked city (partial update)."""
+
+    refresh_interval_seconds: int | None = Field(None, ge=settings.MIN_REFRESH_INTERVAL_SECONDS)
+    priority: int | None = None
+    enabled: bool | None = None
+    adaptive: bool | None = None
+    next_due_at: datetime | None = None
+
+    @model_validator(mode="after")
+    def reject_nulls(self) -> "TrackedCityUpdate":
+        """Omitted fields are left unchanged; an explicit null would clear a NOT NULL column."""
+        nulls = sorted(name for name in self.model_fields_set if getattr(self, name) is None)
+        if nulls:
+            raise ValueError(f"Fields may be omitted but not null: {', '.join(nulls)}")
+        return self
+
+    @model_validator(mode="after")
+    def keep_explicit_interval(self) -> "TrackedCityUpdate":
+        """Setting refresh_interval_seconds alone also turns adaptive off, so retuning does not undo it."""
+        if self.refresh_interval_seconds is not None and "adaptive" not in self.model_fields_set:
+            self.adaptive = False
+        return self
+
+
+class TrackedCityResponse(TrackedCityBase):
+    """Schema for API responses."""
+
+    id: int
+    next_due_at: datetime
+    last_claimed_at: datetime | None
+    owm_city_id: int | None = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CityDemandResponse(BaseModel):
+    """Schema for a city's read demand and the refresh interval derived from it."""
+
+    city: str
+    reads_per_hour: float
+    refresh_interval_seconds: int
+    tracked: bool
@@ -0,0 +1,138 @@
+from datetime import datetime, timezone
+
+from src.config import settings
+from src.cities.dependencies import ITrackedCityRepository, IPopularityTracker
+from src.cities.popularity import demand_interval, hot_set
+from src.cities.schemas import TrackedCityCreate, TrackedCityUpdate, TrackedCityResponse, CityDemandResponse
+from src.utils import logger
+
+
+class TrackedCityService:
+    """
+    Service layer for the tracked-city registry and refresh scheduling.
+    """
+
+    def __init__(self, repository: ITrackedCityRepository, popularity: IPopularityTracker):
+        """
+        Initializes the TrackedCityService.
+
+        Args:
+            repository (ITrackedCityRepository): The tracked-city repository.
+            popularity (IPopularityTracker): Read-demand counters per city.
+        """
+        self.repo = repository
+        self.popularity = popularity
+
+    async def create_city(self, data: TrackedCityCreate) -> TrackedCityResponse:
+        """Starts tracking a city."""
+        data = data.model_copy(update={"name": " ".join(data.name.split())})
+        city = await self.repo.create_city(data)
+        logger.info("City is now tracked", city=city.name, every=city.refresh_interval_seconds)
+        return city
+
+    async def list_cities(self) -> list[TrackedCityResponse]:
+        """Lists all tracked cities."""
+        return await self.repo.list_cities()
+
+    async def get_city(self, city_id: int) -> TrackedCityResponse:
+        """Retrieves a tracked city."""
+        return await self.repo.get_city(city_id)
+
+    async def update_city(self, city_id: int, data: TrackedCityUpdate) -> TrackedCityResponse:
+        """Updates a tracked city."""
+        return await self.repo.update_city(city_id, data)
+
+    async def delete_city(self, city_id: int) -> None:
+        """Stops tracking a city."""
+        await self.repo.delete_city(city_id)
+
+    async def claim_due_cities(
+            self,
+            limit: int = settings.REFRESH_CLAIM_LIMIT,
+            now: datetime | None = None
+    ) -> list[str]:
+        """
+        Claims the cities whose refresh is due and moves them to their next slot.
+
+        Args:
+            limit (int): Maximum number of cities to claim.
+            now (datetime | None): Claim time; defaults to the current UTC time.
+
+        Returns:
+            list[str]: Names of the claimed cities, highest priority first.
+        """
+        return await self.repo.claim_due_cities(now or datetime.now(timezone.utc), limit)
+
+    async def get_hot_set(self, limit: int = settings.POPULARITY_HOT_SET_SIZE) -> list[CityDemandResponse]:
+        """
+        Returns the most-read cities with the refresh interval their demand calls for.
+
+        Args:
+            limit (int): Maximum number of cities.
+
+        Returns:
+            list[CityDemandResponse]: Cities by descending read rate, flagged if tracked.
+        """
+        tracked = {city.name.casefold() for city in await self.repo.list_cities()}
+        return [
+            CityDemandResponse(
+                city=demand.city,
+                reads_per_hour=demand.reads_per_hour,
+                refresh_interval_seconds=demand.refresh_interval_seconds,
+                tracked=demand.city.casefold() in tracked,
+            )
+            for demand in hot_set(await self.popularity.rates(), limit)
+        ]
+
+    async def retune_intervals(
+            self,
+            rates: dict[str, float],
+            now: datetime | None = None,
+            auto_track: bool = settings.POPULARITY_AUTO_TRACK_ENABLED,
+            auto_track_limit: int = settings.POPULARITY_AUTO_TRACK_LIMIT,
+            auto_track_max_cities: int = settings.POPULARITY_AUTO_TRACK_MAX_CITIES
+    ) -> dict:
+        """
+        Sets the interval of every adaptive city from its read rate.
+
+        Cities that heat up are pulled forward; cities nobody reads drift to the maximum
+        interval. With `auto_track`, hot cities that are not tracked yet are added to
+        the registry, as long as it holds fewer than `auto_track_max_cities` cities.
+
+        Args:
+            rates (dict[str, float]): Reads per second per city name.
+            now (datetime | None): Reference time; defaults to the current UTC time.
+            auto_track (bool): Whether to add untracked hot cities to the registry.
+            auto_track_limit (int): Maximum number of untracked hot cities to add per call.
+            auto_track_max_cities (int): Registry size at which auto-tracking stops.
+
+        Returns:
+            dict: Names of the retuned and the newly tracked cities.
+        """
+        now = now or datetime.now(timezone.utc)
+        by_key = {city.casefold(): rate for city, rate in rates.items()}
+        cities = await self.repo.list_cities()
+
+        intervals = {}
+        for city in cities:
+            if not city.adaptive:
+                continue
+            interval = demand_interval(by_key.get(city.name.casefold(), 0.0))
+            if interval != city.refresh_interval_seconds:
+                intervals[city.id] = interval
+        await self.repo.apply_intervals(intervals, now)
+
+        added = []
+        room = min(auto_track_limit, auto_track_max_cities - len(cities))
+        if auto_track and room > 0:
+            tracked = {city.name.casefold() for city in cities}
+            hot = [
+                (city, demand_interval(rate))
+                for city, rate in sorted(rates.items(), key=lambda item: item[1], reverse=True)
+                if city.casefold() not in tracked and demand_interval(rate) < settings.MAX_REFRESH_INTERVAL_SECONDS
+            ]
+            added = await self.repo.track_cities(dict(hot[:room]))
+
+        summary = {"retuned": len(intervals), "tracked": added}
+        logger.info("Refresh intervals retuned from read demand", **summary)
+        return summary
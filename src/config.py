@@ -1,3 +1,6 @@
+from typing import Literal
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,6 +14,15 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
 
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10_000  # Lines buffered for the writer thread; 0 writes synchronously
+    LOG_JSON_SERIALIZER: Literal["json", "orjson"] = "orjson"
+    LOG_SAMPLE_RATE: float = 1.0  # Share of high-volume success lines (logged with sample=True) to keep
+
+    # Prometheus metrics; for multiple workers also set PROMETHEUS_MULTIPROC_DIR
+    METRICS_ENABLED: bool = True
+
     # Database
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
@@ -18,6 +30,16 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: int = 5432
 
+    # Connection pool (per process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Reconnect before server or proxy idle timeouts kick in
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements kept per connection
+    DB_QUERY_CACHE_SIZE: int = 500  # Compiled SQL kept per engine
+    DB_PGBOUNCER: bool = False  # Transaction-pooling PgBouncer in front: no named prepared statement reuse
+
     @property
     def DATABASE_URL(self) -> str:
         return (
@@ -25,9 +47,29 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    # Optional read replica (same credentials and database name); reads fall back to the primary
+    POSTGRES_REPLICA_HOST: str | None = None
+    POSTGRES_REPLICA_PORT: int = 5432
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+    REPLICA_CHECK_TIMEOUT_SECONDS: float = 1.0
+
+    @property
+    def DATABASE_REPLICA_URL(self) -> str | None:
+        if not self.POSTGRES_REPLICA_HOST:
+            return None
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_REPLICA_HOST}:{self.POSTGRES_REPLICA_PORT}/{self.POSTGRES_DB}"
+        )
+
     # Redis & Celery
     REDIS_HOST: str
     REDIS_PORT: int = 6379
+    # Redis is an optional speed-up: a stalled server must fail fast so callers fall back in process
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS: float = 0.5
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30  # Pooled connections idle this long are pinged before use
 
     @property
     def REDIS_URL(self) -> str:
@@ -37,9 +79,107 @@ class Settings(BaseSettings):
     WEATHER_API_KEY: str
     WEATHER_API_URL: str = "https://api.openweathermap.org/data/2.5"
 
+    # Shared HTTP client (connection pool)
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    HTTP_CONNECT_TIMEOUT: float = 3.0
+    HTTP_READ_TIMEOUT: float = 5.0
+    HTTP_WRITE_TIMEOUT: float = 5.0
+    HTTP_POOL_TIMEOUT: float = 2.0
+    HTTP2_ENABLED: bool = True
+
+    # OpenWeatherMap quota (shared token bucket)
+    OWM_CALLS_PER_MINUTE: int = 60
+    OWM_DAILY_BUDGET: int = 30_000
+    RATE_LIMIT_INTERACTIVE_RESERVE: float = 0.25  # Share of the quota background refreshes may not touch
+    RATE_LIMIT_INTERACTIVE_WAIT_SECONDS: float = 1.0
+    RATE_LIMIT_BACKGROUND_WAIT_SECONDS: float = 30.0
+    RATE_LIMIT_REDIS_ENABLED: bool = True
+
+    # OpenWeatherMap call resilience
+    OWM_RETRY_ATTEMPTS: int = 3  # Total attempts, including the first call
+    OWM_RETRY_BASE_DELAY_SECONDS: float = 0.2
+    OWM_RETRY_MAX_DELAY_SECONDS: float = 2.0
+    OWM_HEDGE_ENABLED: bool = False
+    OWM_HEDGE_QUANTILE: float = 0.95  # Hedge once a call runs longer than this latency quantile
+    OWM_HEDGE_DEFAULT_DELAY_SECONDS: float = 1.0  # Until enough latencies were observed
+    OWM_BREAKER_FAILURE_THRESHOLD: int = 5
+    OWM_BREAKER_RECOVERY_SECONDS: float = 30.0
+    OWM_GROUP_SIZE: int = 20  # City IDs per /group call (the API's limit)
+    OWM_GROUP_ENABLED: bool = True  # Background refreshes fetch cities with a known OWM ID through /group
+
+    # Latest-weather read-through cache
+    WEATHER_CACHE_MAX_SIZE: int = 10_000
+    WEATHER_CACHE_TTL_SECONDS: float = 60.0
+    WEATHER_CACHE_STALE_TTL_SECONDS: float = 300.0
+    WEATHER_CACHE_REDIS_ENABLED: bool = True
+
+    # Single-flight coalescing of concurrent cache misses
+    SINGLEFLIGHT_REDIS_LOCK_ENABLED: bool = False
+    SINGLEFLIGHT_LOCK_TIMEOUT_SECONDS: float = 10.0
+    SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS: float = 5.0
+
     # Logic for celery beat
-    CITIES_TO_TRACK: list[str] = ["London", "Almaty", "New York", "Tokyo", "Moscow"]
-    UPDATE_INTERVAL_SECONDS: int = 30
+    CITIES_TO_TRACK: list[str] = ["London", "Almaty", "New York", "Tokyo", "Moscow"]  # Seeds tracked_cities
+    UPDATE_INTERVAL_SECONDS: int = 30  # Default refresh interval of a tracked city
+    MIN_REFRESH_INTERVAL_SECONDS: int = 10
+    SCHEDULER_TICK_SECONDS: int = 10  # How often beat looks for due cities
+    REFRESH_CLAIM_LIMIT: int = 1000  # Max cities claimed per tick
+
+    # Demand-driven refresh cadence
+    POPULARITY_REDIS_ENABLED: bool = True
+    POPULARITY_HALF_LIFE_SECONDS: float = 3600.0
+    POPULARITY_WINDOW_SECONDS: int = 300
+    POPULARITY_HOT_SET_SIZE: int = 50
+    POPULARITY_FLUSH_INTERVAL_SECONDS: float = 1.0  # Reads are counted in process and pushed to Redis this often
+    POPULARITY_AUTO_TRACK_ENABLED: bool = False  # Add untracked hot cities to the registry on retune
+    POPULARITY_AUTO_TRACK_LIMIT: int = 100  # Max untracked hot cities added to the registry per retune
+    POPULARITY_AUTO_TRACK_MAX_CITIES: int = 1000  # Auto-tracking stops once the registry holds this many cities
+    POPULARITY_RETUNE_SECONDS: int = 60
+    FRESHNESS_SLO_SECONDS: int = 60  # Hot cities are refreshed this often; at most WEATHER_CACHE_TTL_SECONDS
+    MAX_REFRESH_INTERVAL_SECONDS: int = 86400  # Interval for adaptive cities nobody reads
+    REFRESH_CONCURRENCY: int = 20  # Max upstream requests in flight per refresh cycle
+    REFRESH_SHARD_COUNT: int = 4  # Refresh cycles are split into this many parallel tasks
+    REFRESH_SHARD_LOCK_TIMEOUT_SECONDS: int = 300  # Upper bound on how long one shard run holds its lock
+
+    # Change detection on ingest: readings equal to the city's latest within the
+    # tolerance only bump its last_checked_at instead of adding a history row
+    INGEST_DEDUP_TOLERANCE: float = 0.05  # Max difference per field (°C, %, hPa) still counted as unchanged
+    INGEST_DEDUP_MAX_AGE_SECONDS: int = 3600  # Store an unchanged reading anyway once the latest row is this old; 0 disables dedup
+
+    # Write-behind ingest: on-demand fetches are answered once buffered and written in batches
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_REDIS_ENABLED: bool = False  # Buffer in a shared Redis stream (at-least-once) instead of in process
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FLUSH_INTERVAL_SECONDS: float = 1.0  # Max time an observation waits for its batch to fill
+    WRITE_BEHIND_MAX_SIZE: int = 10_000  # In-process buffer capacity; submissions wait while it is full
+    WRITE_BEHIND_SUBMIT_TIMEOUT_SECONDS: float = 2.0  # Max wait for room in a full buffer before answering 503
+    WRITE_BEHIND_ID_BLOCK_SIZE: int = 100  # Record IDs reserved per sequence round trip
+    WRITE_BEHIND_CLAIM_IDLE_SECONDS: float = 30.0  # Stream entries unacknowledged this long are redelivered
+
+    # Batch ingest / batch read
+    BULK_INGEST_MAX_ITEMS: int = 10_000
+    BATCH_READ_MAX_CITIES: int = 500
+
+    # History API
+    HISTORY_MAX_PAGE_SIZE: int = 1000
+    HISTORY_STREAM_BATCH_SIZE: int = 1000
+
+    # weather_data partitioning and retention
+    PARTITION_MONTHS_AHEAD: int = 3
+    RAW_RETENTION_MONTHS: int = 6  # Older months are compacted into weather_data_hourly
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 86400
+
+    @model_validator(mode="after")
+    def check_freshness_slo(self) -> "Settings":
+        """Hot cities only stay warm in the cache if they are refreshed before their entries go stale."""
+        if self.FRESHNESS_SLO_SECONDS > self.WEATHER_CACHE_TTL_SECONDS:
+            raise ValueError(
+                f"FRESHNESS_SLO_SECONDS ({self.FRESHNESS_SLO_SECONDS}) must not exceed "
+                f"WEATHER_CACHE_TTL_SECONDS ({self.WEATHER_CACHE_TTL_SECONDS})"
+            )
+        return self
 
 
 
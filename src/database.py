@@ -1,14 +1,253 @@
-from typing import AsyncGenerator, Annotated
+import asyncio
+import functools
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Annotated, Awaitable, Callable, TypeVar
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from src.config import settings
+from src.metrics import InstrumentedAsyncAdaptedQueuePool, instrument_engine
+from src.utils import logger
 
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+def engine_options(pgbouncer: bool = settings.DB_PGBOUNCER) -> dict:
+    """Builds the pool and driver options for `create_async_engine` from settings.
+
+    Behind a transaction-pooling PgBouncer consecutive statements may run on
+    different server connections, so prepared statements must not be reused:
+    both statement caches are turned off and every statement gets a unique name.
+
+    Args:
+        pgbouncer (bool): Whether connections go through PgBouncer in transaction mode.
+
+    Returns:
+        dict: Keyword arguments for `create_async_engine`.
+    """
+    if pgbouncer:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        "connect_args": connect_args,
+    }
+
+
+def make_engine(url: str = settings.DATABASE_URL, pgbouncer: bool = settings.DB_PGBOUNCER) -> AsyncEngine:
+    """Builds an async engine with its own connection pool.
+
+    Args:
+        url (str): Database URL; defaults to the configured one.
+        pgbouncer (bool): Whether connections go through PgBouncer in transaction mode.
+
+    Returns:
+        AsyncEngine: The engine. Its pool is bound to the event loop that first uses it.
+    """
+    options = engine_options(pgbouncer)
+    if not settings.METRICS_ENABLED:
+        return create_async_engine(url, echo=settings.DEBUG, **options)
+    engine = create_async_engine(url, echo=settings.DEBUG, poolclass=InstrumentedAsyncAdaptedQueuePool, **options)
+    instrument_engine(engine)
+    return engine
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """Returns a snapshot of the engine's pool usage for health output."""
+    pool = engine.sync_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": max(0, pool.overflow())}
+
+
+T = TypeVar("T")
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+# (or is not a standby at all, e.g. a stand-in in development).
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() IS NULL OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReplicaRouter:
+    """
+    Decides whether reads may go to the read replica.
+
+    The replica is checked at most every `check_interval` seconds, lazily from
+    the read path: it is taken out of rotation while it is unreachable or lags
+    more than `max_lag` seconds, and put back after a later check passes.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            max_lag: float = settings.REPLICA_MAX_LAG_SECONDS,
+            check_interval: float = settings.REPLICA_CHECK_INTERVAL_SECONDS,
+            check_timeout: float = settings.REPLICA_CHECK_TIMEOUT_SECONDS,
+    ):
+        """
+        Initializes the ReplicaRouter.
+
+        Args:
+            engine (AsyncEngine): Engine connected to the replica.
+            max_lag (float): Replication lag in seconds beyond which reads stay on the primary.
+            check_interval (float): Seconds between health and lag checks.
+            check_timeout (float): Seconds a check may take before the replica counts as down.
+        """
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.available = False
+        self.lag: float | None = None
+        self._checked_at = float("-inf")
+
+    async def refresh(self) -> None:
+        """Re-checks the replica if the last check is older than `check_interval`."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        # Claim the check before awaiting so that concurrent reads don't pile on
+        self._checked_at = now
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with self.engine.connect() as conn:
+                    self.lag = float((await conn.execute(REPLICA_LAG_QUERY)).scalar() or 0)
+        except (DBAPIError, OSError, TimeoutError) as e:
+            self._set_available(False, error=str(e) or type(e).__name__)
+            return
+        self._set_available(self.lag <= self.max_lag, lag=self.lag)
+
+    def mark_unavailable(self, error: Exception) -> None:
+        """Takes the replica out of rotation until the next check, e.g. after a failed read."""
+        self._checked_at = time.monotonic()
+        self._set_available(False, error=str(error) or type(error).__name__)
+
+    def snapshot(self) -> dict:
+        """Returns the replica state for health output."""
+        return {"available": self.available, "lag_seconds": self.lag}
+
+    def _set_available(self, available: bool, **details) -> None:
+        if available != self.available:
+            if available:
+                logger.info("Read replica back in rotation", **details)
+            else:
+                logger.warning("Read replica out of rotation, reading from the primary", **details)
+        self.available = available
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads made through `@read_only` repository methods to the
+    replica and everything else to the primary.
+
+    Once anything has run on the primary, later reads in the same session stay
+    there too, so a request always sees its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        router: ReplicaRouter | None = self.info.get("replica")
+        if (
+                router is not None
+                and router.available
+                and self.info.get("read_only")
+                and not self.info.get("used_primary")
+                and not self._flushing
+        ):
+            self.info["used_replica"] = True
+            return router.engine.sync_engine
+        self.info["used_primary"] = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@asynccontextmanager
+async def read_only_scope(session: AsyncSession) -> AsyncIterator[None]:
+    """Runs a read in its own short transaction, on the replica when the session routes.
+
+    Reads inside a transaction the caller already opened are left alone: they
+    run in that transaction, on the primary.
+
+    Args:
+        session (AsyncSession): The repository's session.
+    """
+    if session.in_transaction():
+        yield
+        return
+    router: ReplicaRouter | None = session.info.get("replica")
+    if router is not None:
+        await router.refresh()
+    session.info["read_only"] = True
+    session.info["used_replica"] = False
+    try:
+        yield
+    finally:
+        session.info["read_only"] = False
+        if session.in_transaction():
+            await session.rollback()
+
+
+def read_only(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Decorator for repository reads: replica routing plus a short transaction.
+
+    A session checks out a connection on first use and holds it until its
+    transaction ends, which for a plain read would be the end of the request,
+    after any upstream calls that follow. The read runs in its own transaction
+    instead, which ends (returning the connection to the pool) as soon as the
+    read is done. If the replica fails mid-read, it is taken out of rotation
+    and the read is retried on the primary.
+
+    Args:
+        method (Callable): Async repository method; the repository must have a `session`.
+
+    Returns:
+        Callable: The wrapped method.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs) -> T:
+        try:
+            async with read_only_scope(self.session):
+                return await method(self, *args, **kwargs)
+        except (DBAPIError, OSError) as e:
+            if not self.session.info.get("used_replica"):
+                raise
+            self.session.info["replica"].mark_unavailable(e)
+        async with read_only_scope(self.session):
+            return await method(self, *args, **kwargs)
+
+    return wrapper
+
+
+engine = make_engine()
+replica_engine = make_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+replica_router = ReplicaRouter(replica_engine) if replica_engine is not None else None
+async_session_maker = async_sessionmaker(
+    engine,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    info={"replica": replica_router},
+)
 
 
 class Base(DeclarativeBase):
@@ -1,3 +1,18 @@
 class NotFound(Exception):
     """Base exception for resource not found errors."""
     pass
+
+
+class BadRequest(Exception):
+    """Base exception for invalid client input that passed schema validation."""
+    pass
+
+
+class Conflict(Exception):
+    """Base exception for requests that clash with an existing resource."""
+    pass
+
+
+class ServiceUnavailable(Exception):
+    """Base exception for requests that cannot be served right now but may succeed on retry."""
+    pass
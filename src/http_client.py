@@ -0,0 +1,59 @@
+from typing import Annotated
+
+import httpx
+from fastapi import Depends
+
+from src.config import settings
+
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Builds a pooled HTTP client configured from settings.
+
+    Returns:
+        httpx.AsyncClient: Client with keep-alive connection pooling and per-phase timeouts.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.HTTP_CONNECT_TIMEOUT,
+        read=settings.HTTP_READ_TIMEOUT,
+        write=settings.HTTP_WRITE_TIMEOUT,
+        pool=settings.HTTP_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=settings.HTTP2_ENABLED)
+
+
+def init_http_client() -> httpx.AsyncClient:
+    """Creates the process-wide HTTP client. Called on app/worker startup."""
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Closes the process-wide HTTP client and its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        client, _http_client = _http_client, None
+        await client.aclose()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Dependency for getting the shared HTTP client.
+
+    Falls back to creating the client lazily if the owner (lifespan or worker signal)
+    has not initialized it yet.
+
+    Returns:
+        httpx.AsyncClient: The shared pooled client.
+    """
+    return init_http_client()
+
+IHttpClient: type[httpx.AsyncClient] = Annotated[httpx.AsyncClient, Depends(get_http_client)]
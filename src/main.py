@@ -1,11 +1,22 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from src.config import settings
+from src.database import engine, pool_status, replica_engine, replica_router
+from src.metrics import MetricsMiddleware, mark_process_dead, render_metrics
+from src.http_client import init_http_client, close_http_client
+from src.redis_client import init_redis, close_redis
+from src.weather.cache import get_weather_cache
+from src.weather.ratelimit import get_upstream_rate_limiter
+from src.weather.resilience import get_breaker_states
+from src.weather.writebehind import get_write_behind_buffer
 from src.weather.router import router as weather_router
-from src.utils import logger, setup_logging
-from src.exceptions import NotFound
+from src.cities.popularity import get_popularity_tracker
+from src.cities.router import router as cities_router
+from src.utils import RequestContextMiddleware, logger, setup_logging
+from src.exceptions import BadRequest, Conflict, NotFound, ServiceUnavailable
 
 
 @asynccontextmanager
@@ -13,8 +24,25 @@ async def lifespan(app: FastAPI):
     """Lifespan events: startup and shutdown logic."""
     setup_logging()
     logger.info("Starting Weather Service...")
+    init_http_client()
+    init_redis()
+    # Drop in-process cache entries that other replicas updated or deleted
+    invalidations = asyncio.create_task(get_weather_cache().listen_for_invalidations())
+    popularity = get_popularity_tracker()
+    popularity.start()
+    write_behind = get_write_behind_buffer()
+    if write_behind is not None:
+        write_behind.start()
     yield
     logger.info("Shutting down Weather Service...")
+    invalidations.cancel()
+    if write_behind is not None:
+        # Before the clients close: buffered observations are written on the way out
+        await write_behind.close()
+    await popularity.close()
+    await close_http_client()
+    await close_redis()
+    mark_process_dead()
 
 
 app = FastAPI(
@@ -23,6 +51,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(RequestContextMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.exception_handler(NotFound)
 async def not_found_exception_handler(request: Request, exc: NotFound):
@@ -34,10 +66,61 @@ async def not_found_exception_handler(request: Request, exc: NotFound):
     )
 
 
+@app.exception_handler(BadRequest)
+async def bad_request_exception_handler(request: Request, exc: BadRequest):
+    """Global exception handler for BadRequest exceptions."""
+    logger.warning(f"Bad request: {exc}")
+    return JSONResponse(
+        status_code=400,
+        content={"detail": str(exc)},
+    )
+
+
+@app.exception_handler(Conflict)
+async def conflict_exception_handler(request: Request, exc: Conflict):
+    """Global exception handler for Conflict exceptions."""
+    logger.warning(f"Conflict: {exc}")
+    return JSONResponse(
+        status_code=409,
+        content={"detail": str(exc)},
+    )
+
+
+@app.exception_handler(ServiceUnavailable)
+async def service_unavailable_exception_handler(request: Request, exc: ServiceUnavailable):
+    """Global exception handler for ServiceUnavailable exceptions."""
+    logger.warning(f"Service unavailable: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
 app.include_router(weather_router)
+app.include_router(cities_router)
 
 
 @app.get("/health")
 async def health_check():
-    """Simple health check endpoint."""
-    return {"status": "ok"}
\ No newline at end of file
+    """Simple health check endpoint with cache, DB pool, replica, upstream quota and circuit breaker state."""
+    health = {
+        "status": "ok",
+        "cache": get_weather_cache().get_stats(),
+        "db_pool": pool_status(engine),
+        "upstream": get_upstream_rate_limiter().get_stats(),
+        "circuit_breakers": get_breaker_states(),
+    }
+    if (write_behind := get_write_behind_buffer()) is not None:
+        health["write_behind"] = write_behind.get_stats()
+    if replica_router is not None:
+        health["db_replica"] = {**replica_router.snapshot(), "pool": pool_status(replica_engine)}
+    return health
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint; merges all worker processes in multiprocess mode."""
+        payload, content_type = render_metrics()
+        return Response(content=payload, media_type=content_type)
@@ -0,0 +1,201 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# With PROMETHEUS_MULTIPROC_DIR set (before this module is imported), every uvicorn and
+# Celery process writes its samples to files in that directory and /metrics merges them.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to the upstream weather API.",
+    ["host", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_CALLS = Counter(
+    "upstream_calls_total",
+    "Upstream weather API calls by outcome, including calls skipped by the quota or the breaker.",
+    ["host", "outcome"],
+)
+UPSTREAM_BREAKER_OPEN = Gauge(
+    "upstream_circuit_breaker_open",
+    "1 while the upstream circuit breaker is open or half-open.",
+    ["host"],
+    multiprocess_mode="max",
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time by statement type.",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a pooled connection.",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out",
+    "Pooled database connections currently in use.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_connections_open",
+    "Database connections currently open, idle or in use.",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "weather_cache_requests_total",
+    "Latest-weather cache lookups by result (hit, stale, miss).",
+    ["result"],
+)
+WRITE_BEHIND_QUEUE_DEPTH = Gauge(
+    "weather_write_behind_queue_depth",
+    "Observations waiting in the in-process write-behind buffer.",
+    multiprocess_mode="livesum",
+)
+WRITE_BEHIND_STREAM_LENGTH = Gauge(
+    "weather_write_behind_stream_length",
+    "Entries in the shared write-behind Redis stream, as last seen by a flusher.",
+    multiprocess_mode="max",
+)
+WRITE_BEHIND_FLUSH_DURATION = Histogram(
+    "weather_write_behind_flush_seconds",
+    "Time to write one write-behind batch to the database, by outcome.",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time by task and final state.",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+REFRESH_LAG = Histogram(
+    "weather_refresh_lag_seconds",
+    "Time since a city was last checked upstream when a background refresh checks it again.",
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1800, 3600, 21600, 86400),
+)
+CITY_REFRESH_LAG = Gauge(
+    "weather_city_refresh_lag_seconds",
+    "Time since the previous check at the last background refresh, per city.",
+    ["city"],
+    multiprocess_mode="mostrecent",
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Renders all metrics in the Prometheus text format.
+
+    Returns:
+        tuple[bytes, str]: The payload and its content type.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drops this process' live gauges from the multiprocess directory on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency per route template.
+
+    Labels use the matched route's path template (`/weather/{city}`), never the raw
+    path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], route.path if route is not None else "unmatched", str(status)
+            ).observe(time.perf_counter() - started)
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection, and checkout timeouts."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Times every statement executed through the engine and tracks its pool usage.
+
+    Args:
+        engine (AsyncEngine): Engine to instrument; hooks attach to its sync core.
+    """
+    pool = engine.sync_engine.pool
+    event.listen(pool, "connect", lambda *args: DB_POOL_OPEN.inc())
+    event.listen(pool, "close", lambda *args: DB_POOL_OPEN.dec())
+    event.listen(pool, "checkout", lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(pool, "checkin", lambda *args: DB_POOL_CHECKED_OUT.dec())
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_DURATION.labels(operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def drop_timer(context):
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
@@ -0,0 +1,57 @@
+from typing import Annotated
+
+from fastapi import Depends
+from redis.asyncio import Redis
+
+from src.config import settings
+
+
+_redis: Redis | None = None
+
+
+def create_redis(url: str = settings.REDIS_URL) -> Redis:
+    """
+    Creates a Redis client with the connect/read timeouts from settings.
+
+    Commands fail with a RedisError within the timeout instead of hanging on an
+    unreachable or stalled server, which is what lets callers fall back in process.
+
+    Args:
+        url (str): Redis URL. Defaults to settings.REDIS_URL.
+
+    Returns:
+        Redis: A new async Redis client with its own connection pool.
+    """
+    return Redis.from_url(
+        url,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+    )
+
+
+def init_redis() -> Redis:
+    """Creates the process-wide Redis client. Called on app/worker startup."""
+    global _redis
+    if _redis is None:
+        _redis = create_redis()
+    return _redis
+
+
+async def close_redis() -> None:
+    """Closes the process-wide Redis client and its connection pool."""
+    global _redis
+    if _redis is not None:
+        client, _redis = _redis, None
+        await client.aclose()
+
+
+def get_redis() -> Redis:
+    """Dependency for getting the shared Redis client.
+
+    Returns:
+        Redis: The shared async Redis client (created lazily if needed).
+    """
+    return init_redis()
+
+IRedis: type[Redis] = Annotated[Redis, Depends(get_redis)]
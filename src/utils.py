@@ -1,22 +1,113 @@
+import atexit
 import logging
+import queue
+import random
 import sys
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from typing import Literal, TextIO
+
+import orjson
 import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from src.config import settings
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+def _orjson_dumps(obj, default=None, **kwargs) -> str:
+    return orjson.dumps(obj, default=default).decode()
+
+
+class SampleEvents:
+    """
+    structlog processor keeping only a share of events logged with `sample=True`.
+
+    Meant for high-volume success lines; kept events carry `sample_rate` so that
+    counts can be scaled back up. Events without the flag always pass.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+
+    def __call__(self, logger, method_name: str, event_dict: dict) -> dict:
+        if event_dict.pop("sample", False) and self.rate < 1.0:
+            if random.random() >= self.rate:
+                raise structlog.DropEvent
+            event_dict["sample_rate"] = self.rate
+        return event_dict
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that never blocks the caller: records are dropped (and counted) when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
 
-def setup_logging():
-    """Configures structlog and standard logging."""
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=logging.INFO,
-    )
 
+def setup_logging(
+        stream: TextIO | None = None,
+        level: str = settings.LOG_LEVEL,
+        queue_size: int = settings.LOG_QUEUE_SIZE,
+        serializer: Literal["json", "orjson"] = settings.LOG_JSON_SERIALIZER,
+        sample_rate: float = settings.LOG_SAMPLE_RATE,
+):
+    """
+    Configures structlog and standard logging.
+
+    With a queue, the calling thread (usually the event loop) only renders the
+    line and enqueues it; a listener thread does the blocking write, so a slow
+    stdout never stalls request handling. Safe to call again: the previous
+    listener is drained and stopped.
+
+    Args:
+        stream (TextIO | None): Where lines are written. Defaults to stdout.
+        level (str): Minimum level; cheaper levels are dropped before any processing.
+        queue_size (int): Capacity of the log queue; 0 writes synchronously.
+        serializer (str): `orjson` for the fast serializer, `json` for the stdlib one.
+        sample_rate (float): Share of `sample=True` events to keep.
+    """
+    global _listener
+    formatter = logging.Formatter("%(message)s")
+    handler: logging.Handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(formatter)
+    previous, listener = _listener, None
+    if queue_size > 0:
+        listener = QueueListener(queue.Queue(maxsize=queue_size), handler, respect_handler_level=True)
+        handler = DroppingQueueHandler(listener.queue)
+        handler.setFormatter(formatter)
+
+    logging.basicConfig(handlers=[handler], level=level, force=True)
+    if listener is not None:
+        listener.start()
+    _listener = listener
+    if previous is not None:
+        previous.stop()
+
+    renderer = (
+        structlog.processors.JSONRenderer(serializer=_orjson_dumps)
+        if serializer == "orjson"
+        else structlog.processors.JSONRenderer()
+    )
     structlog.configure(
         processors=[
+            structlog.stdlib.filter_by_level,
+            SampleEvents(sample_rate),
             structlog.contextvars.merge_contextvars,
             structlog.processors.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.JSONRenderer(),
+            renderer,
         ],
         logger_factory=structlog.stdlib.LoggerFactory(),
         wrapper_class=structlog.stdlib.BoundLogger,
@@ -24,5 +115,49 @@ def setup_logging():
     )
 
 
+@atexit.register
+def stop_logging():
+    """Writes out queued lines and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware binding a request id to every log line of the request.
+
+    Reuses the caller's `X-Request-ID` header when present, otherwise generates
+    one, and echoes it in the response. Handlers can bind more keys (e.g. `city`)
+    with `structlog.contextvars.bind_contextvars`; all are cleared afterwards.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next(
+            (value.decode("latin-1")[:128] for name, value in scope["headers"] if name == REQUEST_ID_HEADER),
+            None,
+        ) or uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            structlog.contextvars.clear_contextvars()
+
+
 setup_logging()
-logger = structlog.get_logger()
\ No newline at end of file
+logger = structlog.get_logger()
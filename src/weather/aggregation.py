@@ -0,0 +1,61 @@
+import re
+from datetime import timedelta
+
+from src.config import settings
+from src.weather.exceptions import InvalidAggregation
+
+AGGREGATE_METRICS = ("temperature", "humidity", "pressure")
+AGGREGATE_FUNCTIONS = ("avg", "min", "max")
+
+_BUCKET_RE = re.compile(r"^(\d{1,9})([mhd])$")
+_BUCKET_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+# Raw readings are only kept this long, so a wider bucket could never hold more than one bucket of data
+MAX_BUCKET = timedelta(days=31 * settings.RAW_RETENTION_MONTHS)
+
+
+def parse_bucket(bucket: str) -> timedelta:
+    """
+    Parses a bucket width such as `15m`, `1h` or `1d`.
+
+    Args:
+        bucket (str): Bucket width: a positive integer followed by m, h or d.
+
+    Returns:
+        timedelta: The bucket width.
+
+    Raises:
+        InvalidAggregation: If the value is malformed, zero or wider than the raw retention window.
+    """
+    match = _BUCKET_RE.match(bucket)
+    if not match or int(match.group(1)) == 0:
+        raise InvalidAggregation(f"Invalid bucket {bucket!r}; expected e.g. '15m', '1h' or '1d'.")
+    try:
+        width = timedelta(**{_BUCKET_UNITS[match.group(2)]: int(match.group(1))})
+    except OverflowError:
+        width = None
+    if width is None or width > MAX_BUCKET:
+        raise InvalidAggregation(f"Bucket {bucket!r} is too wide; the maximum is {MAX_BUCKET.days}d.")
+    return width
+
+
+def parse_choices(value: str, allowed: tuple[str, ...], name: str) -> list[str]:
+    """
+    Parses a comma-separated list and validates each item.
+
+    Args:
+        value (str): Comma-separated items.
+        allowed (tuple[str, ...]): Accepted items.
+        name (str): Parameter name used in error messages.
+
+    Returns:
+        list[str]: The unique items in request order.
+
+    Raises:
+        InvalidAggregation: If the list is empty or contains an unsupported item.
+    """
+    items = list(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
+    unknown = [item for item in items if item not in allowed]
+    if not items or unknown:
+        raise InvalidAggregation(f"Invalid {name} {unknown or value!r}; allowed: {', '.join(allowed)}.")
+    return items
@@ -0,0 +1,369 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Sequence
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.metrics import CACHE_REQUESTS
+from src.redis_client import get_redis
+from src.utils import logger
+from src.weather.schemas import WeatherResponse
+from src.weather.singleflight import SingleFlight
+
+
+@dataclass(frozen=True, slots=True)
+class CacheEntry:
+    value: WeatherResponse
+    stored_at: float  # Unix timestamp
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    refreshes: int = 0
+
+
+class WeatherCache:
+    """
+    Read-through cache of the latest weather per city.
+
+    A bounded in-process LRU sits in front of an optional Redis layer shared
+    between processes. Entries younger than `ttl` are fresh; entries younger than
+    `ttl + stale_ttl` are served stale while a single background refresh runs.
+    Misses are loaded through a single-flight group so that a burst of requests
+    for one city results in one upstream fetch and one DB write.
+
+    Every write or invalidation is announced on a Redis pub/sub channel; other
+    processes drop their in-process copy and re-read the shared value, so no
+    replica keeps serving a record that was updated or deleted elsewhere.
+    """
+
+    def __init__(
+            self,
+            redis: Redis | None = None,
+            max_size: int = settings.WEATHER_CACHE_MAX_SIZE,
+            ttl: float = settings.WEATHER_CACHE_TTL_SECONDS,
+            stale_ttl: float = settings.WEATHER_CACHE_STALE_TTL_SECONDS,
+            key_prefix: str = "weather:latest:v3:",
+            channel: str = "weather:latest:invalidate",
+            flights: SingleFlight | None = None,
+    ):
+        """
+        Initializes the WeatherCache.
+
+        Args:
+            redis (Redis | None): Shared Redis client. If None, only the in-process layer is used.
+            max_size (int): Maximum number of entries kept in the in-process LRU.
+            ttl (float): Freshness window in seconds.
+            stale_ttl (float): Extra window in seconds during which stale entries may be served.
+            key_prefix (str): Prefix for Redis keys.
+            channel (str): Redis pub/sub channel for invalidation messages.
+            flights (SingleFlight | None): Coalescing group for misses. Defaults to a per-process group.
+        """
+        self.redis = redis
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.key_prefix = key_prefix
+        self.channel = channel
+        # Tells this process' own messages apart when they come back from the channel
+        self.instance_id = uuid.uuid4().hex
+        self.flights = flights or SingleFlight()
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._refreshing: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def normalize_key(city: str) -> str:
+        """Normalizes a city name so that ' london ' and 'London' share an entry."""
+        return " ".join(city.split()).casefold()
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Checks whether an entry is still within the freshness TTL."""
+        return time.time() - entry.stored_at < self.ttl
+
+    def _is_servable(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl + self.stale_ttl
+
+    async def get(self, city: str) -> CacheEntry | None:
+        """
+        Looks up the cached weather for a city and records hit/miss/stale counters.
+
+        Args:
+            city (str): The name of the city.
+
+        Returns:
+            CacheEntry | None: The fresh or stale entry, or None on a miss.
+        """
+        entry = await self.peek(city)
+        if entry is None:
+            self.stats.misses += 1
+            CACHE_REQUESTS.labels("miss").inc()
+            return None
+
+        if self.is_fresh(entry):
+            self.stats.hits += 1
+            CACHE_REQUESTS.labels("hit").inc()
+        else:
+            self.stats.stale += 1
+            CACHE_REQUESTS.labels("stale").inc()
+        return entry
+
+    async def peek(self, city: str) -> CacheEntry | None:
+        """
+        Looks up the cached weather for a city without touching the counters.
+
+        Args:
+            city (str): The name of the city.
+
+        Returns:
+            CacheEntry | None: The fresh or stale entry, or None if absent or expired.
+        """
+        key = self.normalize_key(city)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        else:
+            entry = await self._redis_get(key)
+            if entry is not None:
+                self._store_local(key, entry)
+
+        if entry is None or not self._is_servable(entry):
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    async def load(
+            self,
+            city: str,
+            loader: Callable[[], Awaitable[WeatherResponse]]
+    ) -> WeatherResponse:
+        """
+        Loads a missing city, coalescing concurrent loads of the same city.
+
+        The loader is skipped if another caller (or another process holding the
+        single-flight lock) has already cached a fresh value.
+
+        Args:
+            city (str): The name of the city.
+            loader (Callable): Coroutine factory that fetches, stores and caches the city.
+
+        Returns:
+            WeatherResponse: The value shared by all concurrent callers.
+        """
+        async def load_once() -> WeatherResponse:
+            entry = await self.peek(city)
+            if entry is not None and self.is_fresh(entry):
+                return entry.value
+            return await loader()
+
+        return await self.flights.do(self.normalize_key(city), load_once)
+
+    async def set(self, city: str, value: WeatherResponse) -> CacheEntry:
+        """
+        Stores the latest weather for a city in both cache layers.
+
+        Args:
+            city (str): The name of the city.
+            value (WeatherResponse): The weather record to cache.
+
+        Returns:
+            CacheEntry: The stored entry.
+        """
+        key = self.normalize_key(city)
+        entry = CacheEntry(value=value, stored_at=time.time())
+        self._store_local(key, entry)
+        await self._redis_set({key: entry})
+        return entry
+
+    async def set_many(self, values: Sequence[WeatherResponse]) -> None:
+        """
+        Stores many records, keyed by their own city, in one Redis round trip.
+
+        Args:
+            values (Sequence[WeatherResponse]): Newly written records; the last one per city wins.
+        """
+        stored_at = time.time()
+        entries = {self.normalize_key(value.city): CacheEntry(value=value, stored_at=stored_at) for value in values}
+        for key, entry in entries.items():
+            self._store_local(key, entry)
+        await self._redis_set(entries)
+
+    async def invalidate(self, city: str) -> None:
+        """Removes a city from both cache layers and from every other process' in-process layer."""
+        key = self.normalize_key(city)
+        self._entries.pop(key, None)
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.delete(self.key_prefix + key)
+                    pipe.publish(self.channel, self._invalidation_message([key]))
+                    await pipe.execute()
+            except RedisError as e:
+                logger.warning("Weather cache invalidation failed in Redis", city=city, error=str(e))
+
+    async def listen_for_invalidations(self, retry_delay: float = 1.0) -> None:
+        """
+        Drops in-process entries that other processes announce as changed. Runs until cancelled.
+
+        Malformed messages are logged and skipped. Resubscribes after any other error;
+        while disconnected, in-process entries expire by TTL only.
+
+        Args:
+            retry_delay (float): Seconds to wait before resubscribing after an error.
+        """
+        if self.redis is None:
+            return
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                while True:
+                    # An explicit timeout replaces the client's short socket timeout for this idle wait
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=retry_delay)
+                    if message is None or message["type"] != "message":
+                        continue
+                    try:
+                        self.apply_invalidation(message["data"])
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.error("Skipping malformed weather cache invalidation", error=str(e))
+            except RedisError as e:
+                if asyncio.current_task().cancelling():
+                    raise
+                logger.warning("Weather cache invalidation channel lost", error=str(e))
+            except Exception as e:
+                logger.error("Weather cache invalidation listener failed, resubscribing", error=repr(e))
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(retry_delay)
+
+    def apply_invalidation(self, message: bytes) -> None:
+        """
+        Drops the in-process entries named by an invalidation message from another process.
+
+        Args:
+            message (bytes): Payload published by `set`, `set_many` or `invalidate`.
+        """
+        payload = orjson.loads(message)
+        if payload["origin"] == self.instance_id:
+            return
+        for key in payload["keys"]:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops all in-process entries and resets counters."""
+        self._entries.clear()
+        self.stats = CacheStats()
+
+    def refresh_in_background(self, city: str, refresh: Callable[[], Awaitable[object]]) -> None:
+        """
+        Schedules a refresh for a stale city unless one is already running.
+
+        Args:
+            city (str): The name of the city.
+            refresh (Callable): Coroutine factory that reloads the city and stores it via `set`.
+        """
+        key = self.normalize_key(city)
+        if key in self._refreshing:
+            return
+
+        async def run() -> None:
+            try:
+                await refresh()
+            except Exception as e:
+                logger.error("Background weather refresh failed", city=city, error=str(e))
+            finally:
+                self._refreshing.pop(key, None)
+
+        self.stats.refreshes += 1
+        self._refreshing[key] = asyncio.create_task(run())
+
+    def get_stats(self) -> dict:
+        """Returns hit/miss/stale counters and current size."""
+        return {**asdict(self.stats), "size": len(self._entries)}
+
+    def _store_local(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _redis_get(self, key: str) -> CacheEntry | None:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self.key_prefix + key)
+        except RedisError as e:
+            logger.warning("Weather cache read failed in Redis", key=key, error=str(e))
+            return None
+        if raw is None:
+            return None
+        return self.decode_entry(raw)
+
+    async def _redis_set(self, entries: dict[str, CacheEntry]) -> None:
+        if self.redis is None or not entries:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, entry in entries.items():
+                    pipe.set(self.key_prefix + key, self.encode_entry(entry), ex=max(1, int(self.ttl + self.stale_ttl)))
+                pipe.publish(self.channel, self._invalidation_message(list(entries)))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Weather cache write failed in Redis", keys=len(entries), error=str(e))
+
+    def _invalidation_message(self, keys: list[str]) -> bytes:
+        return orjson.dumps({"origin": self.instance_id, "keys": keys})
+
+    @staticmethod
+    def encode_entry(entry: CacheEntry) -> bytes:
+        """Serializes an entry as a compact positional JSON array."""
+        value = entry.value
+        return orjson.dumps([
+            value.id, value.city, value.country, value.temperature, value.humidity, value.pressure,
+            value.fetched_at.isoformat(),
+            value.last_checked_at.isoformat() if value.last_checked_at is not None else None,
+            entry.stored_at,
+        ])
+
+    @staticmethod
+    def decode_entry(raw: bytes) -> CacheEntry:
+        """Inverse of `encode_entry`."""
+        id_, city, country, temperature, humidity, pressure, fetched_at, last_checked_at, stored_at = orjson.loads(raw)
+        value = WeatherResponse(
+            id=id_,
+            city=city,
+            country=country,
+            temperature=temperature,
+            humidity=humidity,
+            pressure=pressure,
+            fetched_at=datetime.fromisoformat(fetched_at),
+            last_checked_at=datetime.fromisoformat(last_checked_at) if last_checked_at is not None else None,
+        )
+        return CacheEntry(value=value, stored_at=stored_at)
+
+
+_weather_cache: WeatherCache | None = None
+
+
+def get_weather_cache() -> WeatherCache:
+    """Dependency for getting the process-wide weather cache.
+
+    Returns:
+        WeatherCache: The shared cache, backed by Redis if WEATHER_CACHE_REDIS_ENABLED.
+    """
+    global _weather_cache
+    if _weather_cache is None:
+        redis = get_redis() if settings.WEATHER_CACHE_REDIS_ENABLED else None
+        lock_redis = get_redis() if settings.SINGLEFLIGHT_REDIS_LOCK_ENABLED else None
+        _weather_cache = WeatherCache(redis=redis, flights=SingleFlight(redis=lock_redis))
+    return _weather_cache
@@ -1,59 +1,273 @@
+import asyncio
+import time
+from typing import Sequence
+
 import httpx
 from src.config import settings
+from src.metrics import UPSTREAM_CALLS, UPSTREAM_REQUEST_DURATION
 from src.utils import logger
+from src.weather.ratelimit import Priority, UpstreamRateLimiter
+from src.weather.resilience import RetryPolicy, get_circuit_breaker, get_latency_tracker, hedged
 from src.weather.schemas import WeatherCreate
 
+# Used when a 429 response carries no Retry-After header
+DEFAULT_RETRY_AFTER_SECONDS = 60.0
+
 
 class OpenWeatherClient:
     """
     Client for interacting with the OpenWeatherMap API.
     """
 
-    def __init__(self, api_key: str = settings.WEATHER_API_KEY, base_url: str = settings.WEATHER_API_URL):
+    def __init__(
+            self,
+            http_client: httpx.AsyncClient,
+            api_key: str = settings.WEATHER_API_KEY,
+            base_url: str = settings.WEATHER_API_URL,
+            limiter: UpstreamRateLimiter | None = None,
+            priority: Priority = Priority.INTERACTIVE,
+            retry: RetryPolicy | None = None,
+            hedge: bool = settings.OWM_HEDGE_ENABLED,
+            group_size: int = settings.OWM_GROUP_SIZE
+    ):
         """
         Initializes the OpenWeatherClient.
 
         Args:
+            http_client (httpx.AsyncClient): Shared pooled HTTP client owned by the app lifespan or worker.
             api_key (str): API key for OpenWeatherMap. Defaults to settings.WEATHER_API_KEY.
             base_url (str): Base URL for the API. Defaults to settings.WEATHER_API_URL.
+            limiter (UpstreamRateLimiter | None): Shared quota every call draws from. If None, calls are not throttled.
+            priority (Priority): Priority of this client's calls against the quota.
+            retry (RetryPolicy | None): Retry policy for transport errors and retryable statuses.
+            hedge (bool): Whether to race a second request when the first one is slower than usual.
+            group_size (int): City IDs per group-endpoint call.
         """
+        self.http_client = http_client
         self.api_key = api_key
         self.base_url = base_url
+        self.limiter = limiter
+        self.priority = priority
+        self.retry = retry or RetryPolicy()
+        self.hedge = hedge
+        self.group_size = group_size
+        self.host = httpx.URL(base_url).host
+        self.breaker = get_circuit_breaker(self.host)
+        self.latency = get_latency_tracker(self.host)
 
     async def get_weather(self, city: str) -> WeatherCreate | None:
         """
         Fetches current weather for a specific city.
 
+        Transport errors and retryable statuses are retried with jittered exponential
+        backoff. While the host's circuit breaker is open, returns None at once.
+
         Args:
             city (str): Name of the city to fetch weather for.
 
         Returns:
-            WeatherCreate | None: Parsed weather data as a Pydantic model, or None if the request fails (e.g., city not found or API error).
+            WeatherCreate | None: Parsed weather data as a Pydantic model, or None if the request fails
+                (e.g., city not found, API error, open circuit or upstream quota exhausted).
+        """
+        weather, _ = await self.get_weather_with_id(city)
+        return weather
+
+    async def get_weather_with_id(self, city: str) -> tuple[WeatherCreate | None, int | None]:
+        """
+        Fetches current weather for a city by name, along with the city's OpenWeatherMap ID.
+
+        The ID is what `get_weather_many` takes; callers that fetch the same city
+        regularly can store it and switch to the group endpoint.
+
+        Args:
+            city (str): Name of the city to fetch weather for.
+
+        Returns:
+            tuple[WeatherCreate | None, int | None]: The weather as in `get_weather`, and the
+                city's ID if the response carried one.
         """
         params = {
             "q": city,
             "appid": self.api_key,
             "units": "metric"
         }
+        response = await self._call("weather", params, city=city)
+        if response is None:
+            return None, None
+        return self._parse(city, response)
+
+    async def get_weather_many(self, city_ids: Sequence[int]) -> dict[int, WeatherCreate | None]:
+        """
+        Fetches current weather for many cities by OpenWeatherMap ID through the group endpoint.
+
+        IDs are sent `group_size` per call (the API's limit is 20), and the calls run
+        concurrently, each with the same retries, breaker and quota as `get_weather`.
+
+        Args:
+            city_ids (Sequence[int]): OpenWeatherMap city IDs.
+
+        Returns:
+            dict[int, WeatherCreate | None]: Weather per ID. IDs of failed calls map to None;
+                IDs the API left out of a successful response are absent.
+        """
+        city_ids = list(dict.fromkeys(city_ids))
+        chunks = [city_ids[i:i + self.group_size] for i in range(0, len(city_ids), self.group_size)]
+        fetched: dict[int, WeatherCreate | None] = {}
+        for chunk, result in zip(chunks, await asyncio.gather(*(self._get_group(chunk) for chunk in chunks))):
+            fetched.update(result if result is not None else dict.fromkeys(chunk))
+        return fetched
+
+    async def _get_group(self, city_ids: list[int]) -> dict[int, WeatherCreate] | None:
+        params = {
+            "id": ",".join(map(str, city_ids)),
+            "appid": self.api_key,
+            "units": "metric"
+        }
+        response = await self._call("group", params, cities=len(city_ids))
+        if response is None:
+            return None
+        return self._parse_group(response)
+
+    async def _call(self, path: str, params: dict, **context) -> httpx.Response | None:
+        """
+        Sends a request with retries, the circuit breaker and the upstream quota.
+
+        Args:
+            path (str): Endpoint path under the base URL.
+            params (dict): Query parameters.
+            **context: Fields for log messages.
+
+        Returns:
+            httpx.Response | None: The final (non-retryable) response, or None if the call was
+                skipped or every attempt failed.
+        """
+        error: Exception | None = None
+        for attempt in range(self.retry.attempts):
+            if not self.breaker.allow():
+                UPSTREAM_CALLS.labels(self.host, "circuit_open").inc()
+                logger.warning("Upstream circuit is open, skipping call", breaker=self.breaker.name, **context)
+                return None
+            if self.limiter is not None and not await self.limiter.acquire(self.priority):
+                self.breaker.release()
+                UPSTREAM_CALLS.labels(self.host, "quota_exhausted").inc()
+                return None
 
-        async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(f"{self.base_url}/weather", params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                logger.info("Successfully fetched weather data", city=city)
-
-                return WeatherCreate(
-                    city=data["name"],
-                    country=data["sys"]["country"],
-                    temperature=data["main"]["temp"],
-                    humidity=data["main"]["humidity"],
-                    pressure=data["main"]["pressure"]
-                )
+                response = await self._send(path, params)
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                error = e
             except httpx.HTTPError as e:
-                logger.error("Failed to fetch weather data", city=city, error=str(e))
+                self.breaker.release()
+                logger.error("Failed to fetch weather data", error=str(e), **context)
                 return None
+            else:
+                if response.status_code not in self.retry.retry_statuses:
+                    self.breaker.record_success()
+                    return response
+                if response.status_code == 429:
+                    # Quota, not an outage: back off through the limiter, keep the breaker closed
+                    self.breaker.release()
+                    await self._pause(response)
+                else:
+                    self.breaker.record_failure()
+                error = httpx.HTTPStatusError(
+                    f"Upstream answered {response.status_code}", request=response.request, response=response
+                )
+
+            if attempt + 1 < self.retry.attempts:
+                delay = self.retry.backoff(attempt)
+                logger.warning("Retrying upstream call", attempt=attempt + 1, delay=round(delay, 3), error=str(error), **context)
+                await asyncio.sleep(delay)
+
+        logger.error("Failed to fetch weather data", error=str(error), **context)
+        return None
+
+    async def _send(self, path: str, params: dict) -> httpx.Response:
+        """Sends one request, hedged with a second one after the usual latency if enabled."""
+        if not self.hedge:
+            return await self._request(path, params)
+        delay = self.latency.percentile(settings.OWM_HEDGE_QUANTILE) or settings.OWM_HEDGE_DEFAULT_DELAY_SECONDS
+        return await hedged(lambda: self._request(path, params), delay, self._allow_hedge)
+
+    async def _request(self, path: str, params: dict) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.http_client.get(f"{self.base_url}/{path}", params=params)
+        except httpx.TransportError:
+            self._observe("transport_error", time.perf_counter() - started)
+            raise
+        elapsed = time.perf_counter() - started
+        self.latency.observe(elapsed)
+        self._observe(self._outcome(response.status_code), elapsed)
+        return response
+
+    def _observe(self, outcome: str, seconds: float) -> None:
+        UPSTREAM_REQUEST_DURATION.labels(self.host, outcome).observe(seconds)
+        UPSTREAM_CALLS.labels(self.host, outcome).inc()
+
+    @staticmethod
+    def _outcome(status_code: int) -> str:
+        if status_code == 429:
+            return "rate_limited"
+        if status_code >= 500:
+            return "server_error"
+        if status_code >= 400:
+            return "client_error"
+        return "ok"
+
+    async def _allow_hedge(self) -> bool:
+        """A hedge is an extra upstream call: only send it if a token is available right now."""
+        return self.limiter is None or await self.limiter.try_acquire(self.priority)
+
+    async def _pause(self, response: httpx.Response) -> None:
+        if self.limiter is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            await self.limiter.pause(float(retry_after) if retry_after.isdigit() else DEFAULT_RETRY_AFTER_SECONDS)
+
+    @staticmethod
+    def _parse(city: str, response: httpx.Response) -> tuple[WeatherCreate | None, int | None]:
+        """Turns a final (non-retryable) response into weather data and the city's ID."""
+        try:
+            response.raise_for_status()
+            data = response.json()
+
+            logger.info("Successfully fetched weather data", city=city, sample=True)
+
+            return OpenWeatherClient._to_schema(data), data.get("id")
+        except httpx.HTTPStatusError as e:
+            logger.error("Failed to fetch weather data", city=city, error=str(e))
+            return None, None
+        except KeyError as e:
+            logger.error("Invalid response structure from OpenWeather API", city=city, error=str(e))
+            return None, None
+
+    @staticmethod
+    def _parse_group(response: httpx.Response) -> dict[int, WeatherCreate] | None:
+        """Turns a final group response into weather data per city ID; malformed entries are skipped."""
+        try:
+            response.raise_for_status()
+            items = response.json()["list"]
+        except (httpx.HTTPStatusError, KeyError) as e:
+            logger.error("Failed to fetch weather data for a city group", error=str(e))
+            return None
+
+        fetched: dict[int, WeatherCreate] = {}
+        for item in items:
+            try:
+                fetched[item["id"]] = OpenWeatherClient._to_schema(item)
             except KeyError as e:
-                logger.error("Invalid response structure from OpenWeather API", city=city, error=str(e))
-                return None
\ No newline at end of file
+                logger.error("Invalid city entry in OpenWeather group response", error=str(e))
+        logger.info("Successfully fetched weather data for a city group", cities=len(fetched), sample=True)
+        return fetched
+
+    @staticmethod
+    def _to_schema(data: dict) -> WeatherCreate:
+        return WeatherCreate(
+            city=data["name"],
+            country=data["sys"]["country"],
+            temperature=data["main"]["temp"],
+            humidity=data["main"]["humidity"],
+            pressure=data["main"]["pressure"]
+        )
+
@@ -1,8 +1,30 @@
 from fastapi import Depends
 from typing import Annotated
 
+from src.http_client import IHttpClient
+
 from src.weather.repository import WeatherRepository
 IWeatherRepository: type[WeatherRepository] = Annotated[WeatherRepository, Depends()]
 
+from src.weather.ratelimit import UpstreamRateLimiter, get_upstream_rate_limiter
+IUpstreamRateLimiter: type[UpstreamRateLimiter] = Annotated[UpstreamRateLimiter, Depends(get_upstream_rate_limiter)]
+
+from src.weather.client import OpenWeatherClient
+
+
+def get_openweather_client(http_client: IHttpClient, limiter: IUpstreamRateLimiter) -> OpenWeatherClient:
+    """Dependency for getting an OpenWeatherMap client bound to the shared HTTP pool and upstream quota."""
+    return OpenWeatherClient(http_client, limiter=limiter)
+
+IOpenWeatherClient: type[OpenWeatherClient] = Annotated[OpenWeatherClient, Depends(get_openweather_client)]
+
+from src.weather.cache import WeatherCache, get_weather_cache
+IWeatherCache: type[WeatherCache] = Annotated[WeatherCache, Depends(get_weather_cache)]
+
+from src.weather.writebehind import WriteBehindBuffer, get_write_behind_buffer
+IWriteBehindBuffer: type[WriteBehindBuffer | None] = Annotated[
+    WriteBehindBuffer | None, Depends(get_write_behind_buffer)
+]
+
 from src.weather.service import WeatherService
 IWeatherService: type[WeatherService] = Annotated[WeatherService, Depends()]
@@ -1,6 +1,21 @@
-from src.exceptions import NotFound
+from src.exceptions import BadRequest, NotFound, ServiceUnavailable
 
 
 class WeatherNotFound(NotFound):
     """Exception raised when weather data is not found."""
     pass
+
+
+class InvalidCursor(BadRequest):
+    """Exception raised when a pagination cursor cannot be decoded."""
+    pass
+
+
+class InvalidAggregation(BadRequest):
+    """Exception raised when aggregation parameters are not supported."""
+    pass
+
+
+class WriteBehindOverloaded(ServiceUnavailable):
+    """Exception raised when the write-behind buffer stays full for longer than the submit timeout."""
+    pass
@@ -1,25 +1,91 @@
-from datetime import datetime
-from sqlalchemy import DateTime, Float, Integer, String
+from datetime import datetime, timezone
+from sqlalchemy import DDL, DateTime, Float, Index, Integer, String, event
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base
 
 
+DEFAULT_PARTITION = "weather_data_default"
+
+
 class WeatherData(Base):
-    """Database model for storing weather information."""
+    """
+    Database model for storing weather information.
+
+    Range-partitioned by month on `fetched_at` (see src/weather/partitions.py);
+    the primary key therefore includes the partition key.
+    """
 
     __tablename__ = "weather_data"
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    city: Mapped[str] = mapped_column(String(100), index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
+    city: Mapped[str] = mapped_column(String(100))
     country: Mapped[str] = mapped_column(String(10))
     temperature: Mapped[float] = mapped_column(Float)  # Celsius
     humidity: Mapped[int] = mapped_column(Integer)  # Percent
     pressure: Mapped[int] = mapped_column(Integer)  # hPa
     fetched_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=datetime.utcnow
+        primary_key=True,
+        default=lambda: datetime.now(timezone.utc)
     )
 
+    __table_args__ = (
+        # Serves "latest for city" and per-city time-range scans without a sort
+        Index("ix_weather_data_city_fetched_at", "city", fetched_at.desc()),
+        {"postgresql_partition_by": "RANGE (fetched_at)"},
+    )
+
+    def __repr__(self) -> str:
+        return f"<WeatherData(city={self.city}, temp={self.temperature})>"
+
+
+# Catch-all partition so that inserts never fail when no monthly partition exists yet
+event.listen(
+    WeatherData.__table__,
+    "after_create",
+    DDL(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF weather_data DEFAULT"),
+)
+
+
+class WeatherLatest(Base):
+    """
+    Latest weather reading per city, upserted on every write to weather_data.
+
+    `last_checked_at` is bumped when the upstream reports the same values again
+    (see `WeatherRepository.ingest_weather_records`), so it can be newer than
+    `fetched_at`.
+    """
+
+    __tablename__ = "weather_latest"
+
+    city: Mapped[str] = mapped_column(String(100), primary_key=True)
+    weather_id: Mapped[int] = mapped_column(Integer)  # weather_data.id of the latest reading
+    country: Mapped[str] = mapped_column(String(10))
+    temperature: Mapped[float] = mapped_column(Float)  # Celsius
+    humidity: Mapped[int] = mapped_column(Integer)  # Percent
+    pressure: Mapped[int] = mapped_column(Integer)  # hPa
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_checked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))  # Last time the reading was confirmed
+
+    def __repr__(self) -> str:
+        return f"<WeatherLatest(city={self.city}, temp={self.temperature})>"
+
+
+class WeatherHourly(Base):
+    """Hourly rollup of raw readings, kept after raw partitions expire."""
+
+    __tablename__ = "weather_data_hourly"
+
+    city: Mapped[str] = mapped_column(String(100), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)  # Start of the hour
+    country: Mapped[str] = mapped_column(String(10))
+    samples: Mapped[int] = mapped_column(Integer)
+    temperature_avg: Mapped[float] = mapped_column(Float)
+    temperature_min: Mapped[float] = mapped_column(Float)
+    temperature_max: Mapped[float] = mapped_column(Float)
+    humidity_avg: Mapped[float] = mapped_column(Float)
+    pressure_avg: Mapped[float] = mapped_column(Float)
+
     def __repr__(self) -> str:
-        return f"<WeatherData(city={self.city}, temp={self.temperature})>"
\ No newline at end of file
+        return f"<WeatherHourly(city={self.city}, bucket={self.bucket})>"
@@ -0,0 +1,42 @@
+import base64
+from datetime import datetime
+
+from src.weather.exceptions import InvalidCursor
+
+HistoryCursor = tuple[datetime, int]  # (fetched_at, id) of the last row on the previous page
+
+
+def encode_cursor(fetched_at: datetime, record_id: int) -> str:
+    """
+    Encodes a keyset position into an opaque URL-safe cursor.
+
+    Args:
+        fetched_at (datetime): Timestamp of the last returned row.
+        record_id (int): ID of the last returned row (tie-breaker).
+
+    Returns:
+        str: The cursor string.
+    """
+    raw = f"{fetched_at.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> HistoryCursor:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor string.
+
+    Returns:
+        HistoryCursor: The (fetched_at, id) keyset position.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        fetched_at, record_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(fetched_at), int(record_id)
+    except ValueError as e:
+        raise InvalidCursor(f"Invalid pagination cursor: {cursor!r}") from e
@@ -0,0 +1,211 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.utils import logger
+from src.weather.models import DEFAULT_PARTITION
+
+PARENT_TABLE = "weather_data"
+PARTITION_PREFIX = "weather_data_p"
+ROLLUP_TABLE = "weather_data_hourly"
+
+
+def add_months(month: date, months: int) -> date:
+    """Returns the first day of the month `months` after `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Returns the name of the monthly partition holding `month`, e.g. weather_data_p2026_10."""
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def _month_start(month: date) -> datetime:
+    """Returns the UTC start of the month as a timezone-aware datetime."""
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+async def is_partitioned(session: AsyncSession) -> bool:
+    """Checks whether weather_data is a partitioned table (it is not before the migration)."""
+    query = text("SELECT relkind = 'p' FROM pg_class WHERE relname = :name AND relkind IN ('p', 'r')")
+    return bool(await session.scalar(query, {"name": PARENT_TABLE}))
+
+
+async def list_partitions(session: AsyncSession) -> dict[date, str]:
+    """
+    Lists the monthly partitions of weather_data.
+
+    Args:
+        session (AsyncSession): Database session.
+
+    Returns:
+        dict[date, str]: Partition name per month start, ordered by month.
+    """
+    query = text(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent AND child.relname LIKE :prefix
+        """
+    )
+    names = (await session.scalars(query, {"parent": PARENT_TABLE, "prefix": PARTITION_PREFIX + "%"})).all()
+    partitions = {}
+    for name in names:
+        year, month = name.removeprefix(PARTITION_PREFIX).split("_")
+        partitions[date(int(year), int(month), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+async def create_partition(session: AsyncSession, month: date) -> str:
+    """
+    Creates the partition for one month.
+
+    Rows that already landed in the default partition for that month are moved
+    into the new partition (Postgres refuses to create it otherwise).
+
+    Args:
+        session (AsyncSession): Database session; the caller commits.
+        month (date): First day of the month.
+
+    Returns:
+        str: The partition name.
+    """
+    name = partition_name(month)
+    start, end = _month_start(month), _month_start(add_months(month, 1))
+    in_default = await session.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE fetched_at >= :start AND fetched_at < :end)"),
+        {"start": start, "end": end},
+    )
+    # DDL cannot take bind parameters; the bounds are generated here, never user input
+    start, end = start.isoformat(), end.isoformat()
+    if not in_default:
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+        return name
+
+    logger.warning("Moving rows out of the default partition", partition=name)
+    await session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    await session.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+    await session.execute(text(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE fetched_at >= '{start}' AND fetched_at < '{end}' RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """
+    ))
+    await session.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return name
+
+
+async def ensure_future_partitions(session: AsyncSession, today: date, months_ahead: int) -> list[str]:
+    """
+    Creates missing partitions from the current month up to `months_ahead` months ahead.
+
+    Args:
+        session (AsyncSession): Database session; the caller commits.
+        today (date): Reference date.
+        months_ahead (int): How many future months to prepare.
+
+    Returns:
+        list[str]: Names of the partitions that were created.
+    """
+    existing = await list_partitions(session)
+    current = date(today.year, today.month, 1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(await create_partition(session, month))
+    return created
+
+
+async def rollup_expired(session: AsyncSession, cutoff: date) -> list[str]:
+    """
+    Compacts raw readings older than `cutoff` into hourly aggregates and drops them.
+
+    Monthly partitions that end on or before the cutoff are rolled up, detached and
+    dropped; stray rows in the default partition are rolled up and deleted.
+
+    Args:
+        session (AsyncSession): Database session; the caller commits.
+        cutoff (date): First day of the oldest month to keep raw.
+
+    Returns:
+        list[str]: Names of the dropped partitions.
+    """
+    dropped = []
+    for month, name in (await list_partitions(session)).items():
+        if add_months(month, 1) > cutoff:
+            continue
+        await _rollup(session, name, cutoff)
+        await session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        await session.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+
+    await _rollup(session, DEFAULT_PARTITION, cutoff)
+    await session.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE fetched_at < :cutoff"),
+        {"cutoff": _month_start(cutoff)},
+    )
+    return dropped
+
+
+async def _rollup(session: AsyncSession, source: str, cutoff: date) -> None:
+    """Aggregates rows of `source` older than `cutoff` into the hourly rollup table."""
+    await session.execute(
+        text(
+            f"""
+            INSERT INTO {ROLLUP_TABLE} (
+                city, bucket, country, samples,
+                temperature_avg, temperature_min, temperature_max, humidity_avg, pressure_avg
+            )
+            SELECT city, date_trunc('hour', fetched_at), max(country), count(*),
+                   avg(temperature), min(temperature), max(temperature), avg(humidity), avg(pressure)
+            FROM {source}
+            WHERE fetched_at < :cutoff
+            GROUP BY city, date_trunc('hour', fetched_at)
+            ON CONFLICT (city, bucket) DO NOTHING
+            """
+        ),
+        {"cutoff": _month_start(cutoff)},
+    )
+
+
+async def maintain_partitions(
+        session: AsyncSession,
+        today: date,
+        months_ahead: int,
+        retention_months: int
+) -> dict:
+    """
+    Runs one maintenance pass: pre-creates future partitions and compacts expired ones.
+
+    Args:
+        session (AsyncSession): Database session; committed on success.
+        today (date): Reference date.
+        months_ahead (int): How many future months to prepare.
+        retention_months (int): How many months (including the current one) to keep raw.
+
+    Returns:
+        dict: Names of the created and dropped partitions.
+    """
+    if not await is_partitioned(session):
+        logger.warning("weather_data is not partitioned, skipping maintenance")
+        return {"created": [], "dropped": []}
+
+    created = await ensure_future_partitions(session, today, months_ahead)
+    cutoff = add_months(date(today.year, today.month, 1), -(retention_months - 1))
+    dropped = await rollup_expired(session, cutoff)
+    await session.commit()
+
+    summary = {"created": created, "dropped": dropped}
+    logger.info("Weather partition maintenance finished", **summary)
+    return summary
@@ -0,0 +1,251 @@
+import asyncio
+import enum
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.redis_client import get_redis
+from src.utils import logger
+
+
+class Priority(str, enum.Enum):
+    """Who an upstream call is for; interactive calls may dip into the reserve."""
+
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+
+
+# Token bucket plus daily counter, evaluated atomically so that every web and worker
+# process draws from the same quota.
+#   KEYS[1]: bucket hash (tokens, ts, paused_until)   KEYS[2]: daily counter
+#   ARGV: capacity, refill per ms, now (ms), tokens that must remain, daily limit, bucket ttl (ms)
+# Returns {allowed, wait_ms}; wait_ms is -1 when the daily limit is spent.
+ACQUIRE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local floor = tonumber(ARGV[4])
+local daily_limit = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'paused_until')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+local paused_until = tonumber(state[3]) or 0
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+local allowed, wait = 0, 0
+if used >= daily_limit then
+    wait = -1
+elseif now < paused_until then
+    wait = paused_until - now
+elseif tokens - 1 < floor then
+    wait = math.ceil((floor + 1 - tokens) / rate)
+else
+    tokens = tokens - 1
+    allowed = 1
+    redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], 172800)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[6])
+return {allowed, wait}
+"""
+
+
+@dataclass(slots=True)
+class _LocalState:
+    tokens: float
+    ts: float
+    paused_until: float = 0.0
+    day: str = ""
+    used: int = 0
+
+
+@dataclass(slots=True)
+class RateLimitStats:
+    allowed: dict[str, int] = field(default_factory=lambda: {p.value: 0 for p in Priority})
+    rejected: dict[str, int] = field(default_factory=lambda: {p.value: 0 for p in Priority})
+
+
+class UpstreamRateLimiter:
+    """
+    Token-bucket limiter with a daily budget for calls to OpenWeatherMap.
+
+    State lives in Redis and is updated by a Lua script, so the limit holds across
+    processes; if Redis is unavailable, each process falls back to a local bucket.
+    A share of both the bucket and the daily budget is reserved for interactive
+    calls: background refreshes back off first when the quota runs low.
+    """
+
+    def __init__(
+            self,
+            redis: Redis | None = None,
+            calls_per_minute: int = settings.OWM_CALLS_PER_MINUTE,
+            daily_budget: int = settings.OWM_DAILY_BUDGET,
+            interactive_reserve: float = settings.RATE_LIMIT_INTERACTIVE_RESERVE,
+            key_prefix: str = "weather:ratelimit:",
+    ):
+        """
+        Initializes the UpstreamRateLimiter.
+
+        Args:
+            redis (Redis | None): Shared Redis client. If None, the limit is per process.
+            calls_per_minute (int): Sustained call rate; also the bucket capacity (burst size).
+            daily_budget (int): Maximum calls per UTC day.
+            interactive_reserve (float): Share of the bucket and the daily budget only interactive calls may use.
+            key_prefix (str): Prefix for Redis keys.
+        """
+        self.redis = redis
+        self.capacity = calls_per_minute
+        self.refill_per_ms = calls_per_minute / 60_000
+        self.daily_budget = daily_budget
+        self.interactive_reserve = interactive_reserve
+        self.key_prefix = key_prefix
+        self.stats = RateLimitStats()
+        self._local = _LocalState(tokens=float(calls_per_minute), ts=self._now_ms())
+        self._script = redis.register_script(ACQUIRE_SCRIPT) if redis is not None else None
+
+    @staticmethod
+    def _now_ms() -> float:
+        return time.time() * 1000
+
+    def _limits(self, priority: Priority) -> tuple[float, int]:
+        """Returns the tokens that must remain in the bucket and the usable daily budget."""
+        if priority is Priority.INTERACTIVE:
+            return 0.0, self.daily_budget
+        return (
+            self.capacity * self.interactive_reserve,
+            math.floor(self.daily_budget * (1 - self.interactive_reserve)),
+        )
+
+    async def acquire(self, priority: Priority, wait_timeout: float | None = None) -> bool:
+        """
+        Takes one call from the quota, waiting for the bucket to refill if needed.
+
+        Args:
+            priority (Priority): Interactive calls may use the reserve; background ones may not.
+            wait_timeout (float | None): Seconds to wait for a token. Defaults per priority.
+
+        Returns:
+            bool: True if the call may proceed; False if the quota is exhausted.
+        """
+        if wait_timeout is None:
+            wait_timeout = (
+                settings.RATE_LIMIT_INTERACTIVE_WAIT_SECONDS
+                if priority is Priority.INTERACTIVE
+                else settings.RATE_LIMIT_BACKGROUND_WAIT_SECONDS
+            )
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            allowed, wait_ms = await self._try_acquire(priority)
+            if allowed:
+                self.stats.allowed[priority.value] += 1
+                return True
+            if wait_ms < 0 or time.monotonic() + wait_ms / 1000 > deadline:
+                self.stats.rejected[priority.value] += 1
+                logger.warning(
+                    "Upstream quota exhausted",
+                    priority=priority.value,
+                    daily_budget_spent=wait_ms < 0,
+                )
+                return False
+            await asyncio.sleep(wait_ms / 1000)
+
+    async def try_acquire(self, priority: Priority) -> bool:
+        """
+        Takes one call from the quota only if a token is available right now.
+
+        Meant for optional calls such as hedges: a refusal is expected, so it is
+        neither counted as rejected nor logged as a warning.
+
+        Args:
+            priority (Priority): Interactive calls may use the reserve; background ones may not.
+
+        Returns:
+            bool: True if the call may proceed.
+        """
+        allowed, _ = await self._try_acquire(priority)
+        if allowed:
+            self.stats.allowed[priority.value] += 1
+        else:
+            logger.debug("Optional upstream call skipped, no token available", priority=priority.value)
+        return allowed
+
+    async def pause(self, seconds: float) -> None:
+        """
+        Stops all calls for a while, e.g. after the upstream answered 429.
+
+        Args:
+            seconds (float): How long to pause.
+        """
+        until = self._now_ms() + seconds * 1000
+        self._local.paused_until = max(self._local.paused_until, until)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.hset(self._bucket_key(), "paused_until", int(until))
+        except RedisError as e:
+            logger.warning("Rate limiter unavailable, pausing this process only", error=str(e))
+
+    def get_stats(self) -> dict:
+        """Returns allowed and rejected call counts per priority for this process."""
+        return {"allowed": dict(self.stats.allowed), "rejected": dict(self.stats.rejected)}
+
+    def _bucket_key(self) -> str:
+        return f"{self.key_prefix}bucket"
+
+    def _daily_key(self) -> str:
+        return f"{self.key_prefix}daily:{datetime.now(timezone.utc):%Y-%m-%d}"
+
+    async def _try_acquire(self, priority: Priority) -> tuple[bool, float]:
+        floor, daily_limit = self._limits(priority)
+        if self._script is not None:
+            try:
+                allowed, wait_ms = await self._script(
+                    keys=[self._bucket_key(), self._daily_key()],
+                    args=[self.capacity, self.refill_per_ms, int(self._now_ms()), floor, daily_limit, 120_000],
+                )
+                return bool(allowed), float(wait_ms)
+            except RedisError as e:
+                logger.warning("Rate limiter unavailable, using the local bucket", error=str(e))
+        return self._try_acquire_local(floor, daily_limit)
+
+    def _try_acquire_local(self, floor: float, daily_limit: int) -> tuple[bool, float]:
+        """In-process twin of ACQUIRE_SCRIPT."""
+        state = self._local
+        now = self._now_ms()
+        day = f"{datetime.now(timezone.utc):%Y-%m-%d}"
+        if state.day != day:
+            state.day, state.used = day, 0
+        state.tokens = min(self.capacity, state.tokens + max(0.0, now - state.ts) * self.refill_per_ms)
+        state.ts = now
+
+        if state.used >= daily_limit:
+            return False, -1
+        if now < state.paused_until:
+            return False, state.paused_until - now
+        if state.tokens - 1 < floor:
+            return False, math.ceil((floor + 1 - state.tokens) / self.refill_per_ms)
+        state.tokens -= 1
+        state.used += 1
+        return True, 0
+
+
+_rate_limiter: UpstreamRateLimiter | None = None
+
+
+def get_upstream_rate_limiter() -> UpstreamRateLimiter:
+    """Dependency for getting the process-wide upstream rate limiter.
+
+    Returns:
+        UpstreamRateLimiter: The shared limiter, backed by Redis if RATE_LIMIT_REDIS_ENABLED.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        redis = get_redis() if settings.RATE_LIMIT_REDIS_ENABLED else None
+        _rate_limiter = UpstreamRateLimiter(redis=redis)
+    return _rate_limiter
@@ -1,10 +1,82 @@
-from sqlalchemy import select, delete, update
-from src.weather.models import WeatherData
-from src.weather.schemas import WeatherUpdate, WeatherResponse
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import DateTime, Select, String, any_, bindparam, select, delete, update, insert, text, tuple_, func
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+
+from src.config import settings
+from src.weather.models import WeatherData, WeatherLatest
+from src.weather.schemas import WeatherUpdate, WeatherResponse, WeatherAggregate
 from src.weather.entity import WeatherEntity
 from src.weather.exceptions import WeatherNotFound
+from src.weather.pagination import HistoryCursor
+
+from src.database import ISession, read_only, read_only_scope
+
+# Fixed origin so that buckets line up across requests (e.g. 1h buckets start on the hour)
+BUCKET_ORIGIN = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+# Hot statements are built once and only take bound parameters: each renders one SQL
+# string, so it is compiled once per engine and prepared once per connection instead
+# of being rebuilt (and re-keyed) on every call. `= ANY(:cities)` keeps the SQL the
+# same for any number of cities, where IN (...) would render a new statement per size.
+LATEST_BY_CITY = select(WeatherLatest).where(WeatherLatest.city == bindparam("city"))
+LATEST_BY_CITIES = select(WeatherLatest).where(
+    WeatherLatest.city == any_(bindparam("cities", type_=ARRAY(String)))
+)
+# Plain rows rather than ORM objects, so the write path doesn't leave stale instances in the session
+LATEST_ROWS_BY_CITIES = select(WeatherLatest.__table__).where(
+    WeatherLatest.city == any_(bindparam("cities", type_=ARRAY(String)))
+)
+RESERVE_IDS = text(
+    "SELECT nextval(pg_get_serial_sequence('weather_data', 'id')) FROM generate_series(1, :count)"
+)
+TOUCH_LATEST = (
+    update(WeatherLatest.__table__)
+    .where(WeatherLatest.city == any_(bindparam("cities", type_=ARRAY(String))))
+    .values(last_checked_at=func.greatest(
+        WeatherLatest.last_checked_at, bindparam("checked_at", type_=DateTime(timezone=True))
+    ))
+)
+INSERT_WEATHER = insert(WeatherData).returning(WeatherData, sort_by_parameter_order=True)
+# Rows with IDs reserved up front (write-behind); a replayed row is skipped instead of duplicated
+INSERT_WEATHER_WITH_IDS = pg_insert(WeatherData).on_conflict_do_nothing()
+_upsert_latest = pg_insert(WeatherLatest)
+UPSERT_LATEST = _upsert_latest.on_conflict_do_update(
+    index_elements=[WeatherLatest.city],
+    set_={
+        "weather_id": _upsert_latest.excluded.weather_id,
+        "country": _upsert_latest.excluded.country,
+        "temperature": _upsert_latest.excluded.temperature,
+        "humidity": _upsert_latest.excluded.humidity,
+        "pressure": _upsert_latest.excluded.pressure,
+        "fetched_at": _upsert_latest.excluded.fetched_at,
+        "last_checked_at": _upsert_latest.excluded.last_checked_at,
+    },
+    # Out-of-order writes must not replace a newer reading
+    where=WeatherLatest.fetched_at <= _upsert_latest.excluded.fetched_at,
+)
 
-from src.database import ISession
+
+def is_unchanged(reading: WeatherEntity, latest: WeatherLatest | WeatherResponse, tolerance: float) -> bool:
+    """
+    Checks whether a reading repeats a city's latest one.
+
+    Args:
+        reading (WeatherEntity): The new observation.
+        latest (WeatherLatest | WeatherResponse): The city's latest known reading.
+        tolerance (float): Maximum difference per measured field still counted as equal.
+
+    Returns:
+        bool: True if every field matches within the tolerance.
+    """
+    return (
+        reading.country == latest.country
+        and abs(reading.temperature - latest.temperature) <= tolerance
+        and abs(reading.humidity - latest.humidity) <= tolerance
+        and abs(reading.pressure - latest.pressure) <= tolerance
+    )
 
 
 class WeatherRepository:
@@ -15,7 +87,7 @@ class WeatherRepository:
 
     async def create_weather_record(self, data: WeatherEntity) -> WeatherResponse:
         """
-        Creates a new weather record in the database.
+        Creates a new weather record in the database and updates the city's latest row.
 
         Args:
             data (WeatherEntity): The weather data entity to persist.
@@ -31,14 +103,141 @@ class WeatherRepository:
             pressure=data.pressure
             )
         self.session.add(new_record)
+        await self.session.flush()
+        await self._upsert_latest([new_record])
+        dto = self._to_dto(new_record)
+        await self.session.commit()
+        return dto
+
+    async def create_weather_records_bulk(self, entities: Sequence[WeatherEntity]) -> list[WeatherResponse]:
+        """
+        Creates many weather records in a single transaction.
+
+        Rows are written with multi-row INSERT ... RETURNING statements
+        (batched by SQLAlchemy's insertmanyvalues), instead of an
+        add/commit/refresh round trip per row.
+
+        Args:
+            entities (Sequence[WeatherEntity]): The weather data entities to persist.
+
+        Returns:
+            list[WeatherResponse]: The created records, in the same order as `entities`.
+        """
+        if not entities:
+            return []
+
+        raw = await self.session.scalars(INSERT_WEATHER, [asdict(entity) for entity in entities])
+        records = raw.all()
+        await self._upsert_latest(records)
+        dtos = [self._to_dto(record) for record in records]
+        await self.session.commit()
+        return dtos
+
+    async def ingest_weather_records(
+            self,
+            entities: Sequence[WeatherEntity],
+            tolerance: float = settings.INGEST_DEDUP_TOLERANCE,
+            max_age: float = settings.INGEST_DEDUP_MAX_AGE_SECONDS
+    ) -> tuple[list[WeatherResponse], int]:
+        """
+        Stores upstream observations, skipping the ones that repeat a city's latest reading.
+
+        OpenWeatherMap updates a city only every few minutes, so most refreshes
+        return the values already stored. Each observation is compared with the
+        city's `weather_latest` row: repeats only move its `last_checked_at`
+        forward, the rest are inserted as in `create_weather_records_bulk`. A
+        repeat is still stored once the latest row is `max_age` seconds old, so
+        the history keeps at least one reading per `max_age`.
+
+        Args:
+            entities (Sequence[WeatherEntity]): The observations to store.
+            tolerance (float): Maximum difference per measured field still counted as unchanged.
+            max_age (float): Age in seconds after which a repeat is stored anyway; 0 stores everything.
+
+        Returns:
+            tuple[list[WeatherResponse], int]: The city's current reading for every observation,
+                in the same order as `entities`, and the number of rows inserted.
+        """
+        if not entities:
+            return [], 0
+
+        now = datetime.now(timezone.utc)
+        latest = {}
+        if max_age > 0:
+            raw = await self.session.execute(LATEST_ROWS_BY_CITIES, {"cities": list({e.city for e in entities})})
+            latest = {row.city: row for row in raw.all()}
+
+        repeats = [
+            (row := latest.get(entity.city)) is not None
+            and (now - row.fetched_at).total_seconds() < max_age
+            and is_unchanged(entity, row, tolerance)
+            for entity in entities
+        ]
+        checked = [entity.city for entity, repeat in zip(entities, repeats) if repeat]
+        if checked:
+            await self.session.execute(TOUCH_LATEST, {"cities": checked, "checked_at": now})
+        changed = [asdict(entity) for entity, repeat in zip(entities, repeats) if not repeat]
+        records = (await self.session.scalars(INSERT_WEATHER, changed)).all() if changed else []
+        await self._upsert_latest(records)
+
+        created = iter(records)
+        dtos = [
+            self._latest_to_dto(latest[entity.city]).model_copy(update={"last_checked_at": now})
+            if repeat else self._to_dto(next(created))
+            for entity, repeat in zip(entities, repeats)
+        ]
+        await self.session.commit()
+        return dtos, len(records)
+
+    async def write_buffered(
+            self,
+            records: Sequence[WeatherResponse],
+            checked: Sequence[tuple[str, datetime]]
+    ) -> None:
+        """
+        Applies one batch from the write-behind buffer in a single transaction.
+
+        Records carry IDs reserved in advance (see `reserve_ids`), so applying the
+        same batch twice, e.g. after a Redis stream redelivery, stores nothing twice.
+
+        Args:
+            records (Sequence[WeatherResponse]): New readings to insert.
+            checked (Sequence[tuple[str, datetime]]): (city, checked_at) of repeated readings.
+        """
+        if records:
+            await self.session.execute(
+                INSERT_WEATHER_WITH_IDS, [record.model_dump(exclude={"last_checked_at"}) for record in records]
+            )
+            await self._upsert_latest(records)
+        if checked:
+            await self.session.execute(
+                TOUCH_LATEST, [{"cities": [city], "checked_at": checked_at} for city, checked_at in checked]
+            )
         await self.session.commit()
-        await self.session.refresh(new_record)
-        return self._to_dto(new_record)
 
+    async def reserve_ids(self, count: int) -> list[int]:
+        """
+        Reserves record IDs from the weather_data sequence in one round trip.
+
+        Args:
+            count (int): Number of IDs to reserve.
+
+        Returns:
+            list[int]: The reserved IDs, ascending.
+        """
+        raw = await self.session.scalars(RESERVE_IDS, {"count": count})
+        ids = sorted(raw.all())
+        await self.session.commit()
+        return ids
+
+    @read_only
     async def get_latest_weather(self, city: str) -> WeatherResponse:
         """
         Retrieves the latest weather record for a specific city.
 
+        Reads the maintained `weather_latest` row (a primary-key lookup) instead of
+        sorting the city's history.
+
         Args:
             city (str): The name of the city.
 
@@ -48,19 +247,171 @@ class WeatherRepository:
         Raises:
             WeatherNotFound: If no weather data exists for the specified city.
         """
-        query = (
-            select(WeatherData)
-            .where(WeatherData.city == city)
-            .order_by(WeatherData.fetched_at.desc())
-            .limit(1)
-        )
-        raw = await self.session.execute(query)
+        raw = await self.session.execute(LATEST_BY_CITY, {"city": city})
         result = raw.scalar_one_or_none()
-        
+
         if not result:
             raise WeatherNotFound(f"Weather data for city '{city}' not found.")
-            
-        return self._to_dto(result)
+
+        return self._latest_to_dto(result)
+
+    @read_only
+    async def get_latest_weather_many(self, cities: Sequence[str]) -> list[WeatherResponse]:
+        """
+        Retrieves the latest weather records for many cities in one query.
+
+        Args:
+            cities (Sequence[str]): The names of the cities.
+
+        Returns:
+            list[WeatherResponse]: Latest records for the cities that have data, in no particular order.
+        """
+        if not cities:
+            return []
+        raw = await self.session.scalars(LATEST_BY_CITIES, {"cities": list(cities)})
+        return [self._latest_to_dto(result) for result in raw.all()]
+
+    @read_only
+    async def get_weather_history(
+            self,
+            city: str,
+            start: datetime | None = None,
+            end: datetime | None = None,
+            after: HistoryCursor | None = None,
+            limit: int = 100
+    ) -> list[WeatherResponse]:
+        """
+        Retrieves one page of a city's history in chronological order.
+
+        Uses keyset pagination on (fetched_at, id): the page starts strictly after
+        `after`, so deep pages cost the same as the first one.
+
+        Args:
+            city (str): The name of the city.
+            start (datetime | None): Inclusive lower bound on fetched_at.
+            end (datetime | None): Exclusive upper bound on fetched_at.
+            after (HistoryCursor | None): (fetched_at, id) of the last row of the previous page.
+            limit (int): Maximum number of rows to return.
+
+        Returns:
+            list[WeatherResponse]: Up to `limit` records.
+        """
+        query = self._history_query(city, start, end, after).limit(limit)
+        raw = await self.session.execute(query)
+        return [WeatherResponse.model_validate(row, from_attributes=True) for row in raw.all()]
+
+    async def stream_weather_history(
+            self,
+            city: str,
+            start: datetime | None = None,
+            end: datetime | None = None,
+            after: HistoryCursor | None = None,
+            batch_size: int = 1000
+    ) -> AsyncIterator[WeatherResponse]:
+        """
+        Streams a city's history in chronological order from a server-side cursor.
+
+        Rows are fetched `batch_size` at a time, so memory stays constant
+        regardless of the size of the range.
+
+        Args:
+            city (str): The name of the city.
+            start (datetime | None): Inclusive lower bound on fetched_at.
+            end (datetime | None): Exclusive upper bound on fetched_at.
+            after (HistoryCursor | None): Resume strictly after this (fetched_at, id) position.
+            batch_size (int): Number of rows fetched per round trip.
+
+        Yields:
+            WeatherResponse: Records one by one.
+        """
+        query = self._history_query(city, start, end, after).execution_options(yield_per=batch_size)
+        # Same short transaction and routing as @read_only; the cursor's connection is released when the stream ends
+        async with read_only_scope(self.session):
+            result = await self.session.stream(query)
+            async for row in result:
+                yield WeatherResponse.model_validate(row, from_attributes=True)
+
+    @read_only
+    async def get_weather_aggregate(
+            self,
+            city: str,
+            bucket: timedelta,
+            metrics: Sequence[str],
+            functions: Sequence[str],
+            start: datetime | None = None,
+            end: datetime | None = None
+    ) -> WeatherAggregate:
+        """
+        Aggregates a city's history into fixed-width time buckets inside Postgres.
+
+        Args:
+            city (str): The name of the city.
+            bucket (timedelta): Bucket width, applied with `date_bin`.
+            metrics (Sequence[str]): Columns to aggregate (temperature, humidity, pressure).
+            functions (Sequence[str]): Aggregate functions to apply (avg, min, max).
+            start (datetime | None): Inclusive lower bound on fetched_at.
+            end (datetime | None): Exclusive upper bound on fetched_at.
+
+        Returns:
+            WeatherAggregate: Columnar arrays with one value per non-empty bucket.
+        """
+        bucket_column = func.date_bin(bucket, WeatherData.fetched_at, BUCKET_ORIGIN).label("bucket")
+        series_names = [f"{metric}_{fn}" for metric in metrics for fn in functions]
+        columns = [
+            getattr(func, fn)(getattr(WeatherData, metric)).label(f"{metric}_{fn}")
+            for metric in metrics for fn in functions
+        ]
+        query = (
+            select(bucket_column, func.count().label("samples"), *columns)
+            .where(WeatherData.city == city)
+            .group_by(bucket_column)
+            .order_by(bucket_column)
+        )
+        if start is not None:
+            query = query.where(WeatherData.fetched_at >= start)
+        if end is not None:
+            query = query.where(WeatherData.fetched_at < end)
+
+        rows = (await self.session.execute(query)).all()
+        return WeatherAggregate(
+            city=city,
+            bucket_seconds=int(bucket.total_seconds()),
+            buckets=[row.bucket for row in rows],
+            samples=[row.samples for row in rows],
+            series={
+                name: [None if row[i + 2] is None else float(row[i + 2]) for row in rows]
+                for i, name in enumerate(series_names)
+            },
+        )
+
+    @staticmethod
+    def _history_query(
+            city: str,
+            start: datetime | None,
+            end: datetime | None,
+            after: HistoryCursor | None
+    ) -> Select:
+        """Builds the keyset-ordered history query (plain columns, no ORM identity map)."""
+        query = (
+            select(
+                WeatherData.id,
+                WeatherData.city,
+                WeatherData.country,
+                WeatherData.temperature,
+                WeatherData.humidity,
+                WeatherData.pressure,
+                WeatherData.fetched_at,
+            )
+            .where(WeatherData.city == city)
+            .order_by(WeatherData.fetched_at, WeatherData.id)
+        )
+        if start is not None:
+            query = query.where(WeatherData.fetched_at >= start)
+        if end is not None:
+            query = query.where(WeatherData.fetched_at < end)
+        if after is not None:
+            query = query.where(tuple_(WeatherData.fetched_at, WeatherData.id) > tuple_(*after))
+        return query
 
     async def update_weather_record(
             self,
@@ -80,38 +431,116 @@ class WeatherRepository:
         Raises:
             WeatherNotFound: If the weather record with the given ID does not exist.
         """
+        values = data.model_dump(exclude_unset=True)
         query = (
             update(WeatherData)
             .where(WeatherData.id == record_id)
-            .values(**data.model_dump(exclude_unset=True))
+            .values(**values)
             .returning(WeatherData)
         )
         raw = await self.session.execute(query)
-        await self.session.commit()
         result = raw.scalar_one_or_none()
-        
+
         if not result:
+            await self.session.rollback()
             raise WeatherNotFound(f"Weather record with ID {record_id} not found.")
 
-        return self._to_dto(result)
+        if values:
+            # Keep the latest row in sync if the updated record is the city's latest
+            await self.session.execute(
+                update(WeatherLatest)
+                .where(WeatherLatest.city == result.city, WeatherLatest.weather_id == record_id)
+                .values(**values)
+            )
+        dto = self._to_dto(result)
+        await self.session.commit()
+        return dto
 
-    async def delete_weather_record(self, record_id: int) -> None:
+    async def delete_weather_record(self, record_id: int) -> str:
         """
         Deletes a weather record from the database.
 
+        If the record was the city's latest, the latest row is recomputed from
+        the remaining history (or removed if none is left).
+
         Args:
             record_id (int): The ID of the record to delete.
 
+        Returns:
+            str: The city of the deleted record.
+
         Raises:
             WeatherNotFound: If the weather record with the given ID does not exist.
         """
-        query = delete(WeatherData).where(WeatherData.id == record_id)
-        result = await self.session.execute(query)
-        await self.session.commit()
-        
-        if result.rowcount == 0:
+        query = delete(WeatherData).where(WeatherData.id == record_id).returning(WeatherData.city)
+        city = (await self.session.execute(query)).scalar_one_or_none()
+
+        if city is None:
+            await self.session.rollback()
             raise WeatherNotFound(f"Weather record with ID {record_id} not found.")
 
+        removed = await self.session.execute(
+            delete(WeatherLatest)
+            .where(WeatherLatest.city == city, WeatherLatest.weather_id == record_id)
+        )
+        if removed.rowcount:
+            await self._rebuild_latest(city)
+        await self.session.commit()
+        return city
+
+    async def _upsert_latest(self, records: Sequence[WeatherData | WeatherResponse]) -> None:
+        """Upserts `weather_latest` with the newest of the given records per city."""
+        newest: dict[str, WeatherData] = {}
+        for record in records:
+            current = newest.get(record.city)
+            if current is None or (record.fetched_at, record.id) >= (current.fetched_at, current.id):
+                newest[record.city] = record
+        if not newest:
+            return
+
+        await self.session.execute(UPSERT_LATEST, [
+            {
+                "city": record.city,
+                "weather_id": record.id,
+                "country": record.country,
+                "temperature": record.temperature,
+                "humidity": record.humidity,
+                "pressure": record.pressure,
+                "fetched_at": record.fetched_at,
+                "last_checked_at": record.fetched_at,
+            }
+            for record in newest.values()
+        ])
+
+    async def _rebuild_latest(self, city: str) -> None:
+        """Recomputes the latest row for a city from its history."""
+        newest = (
+            select(
+                WeatherData.city,
+                WeatherData.id,
+                WeatherData.country,
+                WeatherData.temperature,
+                WeatherData.humidity,
+                WeatherData.pressure,
+                WeatherData.fetched_at,
+                WeatherData.fetched_at.label("last_checked_at"),
+            )
+            .where(WeatherData.city == city)
+            .order_by(WeatherData.fetched_at.desc(), WeatherData.id.desc())
+            .limit(1)
+        )
+        await self.session.execute(
+            pg_insert(WeatherLatest)
+            .from_select(
+                [
+                    "city", "weather_id", "country", "temperature", "humidity", "pressure",
+                    "fetched_at", "last_checked_at",
+                ],
+                newest,
+            )
+            .on_conflict_do_nothing(index_elements=[WeatherLatest.city])
+        )
+
     @staticmethod
     def _to_dto(instance: WeatherData) -> WeatherResponse:
         """Converts a database model instance to a Data Transfer Object."""
@@ -125,4 +554,16 @@ class WeatherRepository:
             fetched_at=instance.fetched_at,
         )
 
-
+    @staticmethod
+    def _latest_to_dto(instance: WeatherLatest) -> WeatherResponse:
+        """Converts a latest-row model instance to a Data Transfer Object."""
+        return WeatherResponse(
+            id=instance.weather_id,
+            city=instance.city,
+            country=instance.country,
+            temperature=instance.temperature,
+            humidity=instance.humidity,
+            pressure=instance.pressure,
+            fetched_at=instance.fetched_at,
+            last_checked_at=instance.last_checked_at,
+        )
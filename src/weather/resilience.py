@@ -0,0 +1,199 @@
+import asyncio
+import enum
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+from src.config import settings
+from src.metrics import UPSTREAM_BREAKER_OPEN
+from src.utils import logger
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    attempts: int = settings.OWM_RETRY_ATTEMPTS
+    base_delay: float = settings.OWM_RETRY_BASE_DELAY_SECONDS
+    max_delay: float = settings.OWM_RETRY_MAX_DELAY_SECONDS
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    def backoff(self, attempt: int) -> float:
+        """Returns the delay before retry number `attempt` (0-based): exponential with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class BreakerState(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream host.
+
+    After `failure_threshold` failures in a row the breaker opens and calls fail fast.
+    Once `recovery_timeout` has passed, a single trial call is let through (half-open):
+    success closes the breaker, failure opens it again. State is per process.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = settings.OWM_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout: float = settings.OWM_BREAKER_RECOVERY_SECONDS,
+    ):
+        """
+        Initializes the CircuitBreaker.
+
+        Args:
+            name (str): Name for logs and health output, usually the host.
+            failure_threshold (int): Consecutive failures that open the breaker.
+            recovery_timeout (float): Seconds to stay open before a trial call.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Checks whether a call may go out now; claims the trial slot when half-open."""
+        if self.state is BreakerState.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            self.state = BreakerState.HALF_OPEN
+            logger.info("Circuit breaker half-open, sending a trial call", breaker=self.name)
+        if self.state is BreakerState.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def release(self) -> None:
+        """Gives back a claimed trial slot without a verdict (the call never went out)."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state is not BreakerState.CLOSED:
+            logger.info("Circuit breaker closed", breaker=self.name)
+            UPSTREAM_BREAKER_OPEN.labels(self.name).set(0)
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state is BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state is not BreakerState.OPEN:
+                logger.warning("Circuit breaker opened", breaker=self.name, failures=self.failures)
+                UPSTREAM_BREAKER_OPEN.labels(self.name).set(1)
+            self.state = BreakerState.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """Returns the breaker state for health and metrics output."""
+        return {"state": self.state.value, "failures": self.failures}
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies, used to pick the hedging delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Returns the q-quantile of the window, or None until enough samples were seen."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def hedged(
+        call: Callable[[], Awaitable[T]],
+        delay: float,
+        allow_hedge: Callable[[], Awaitable[bool]],
+) -> T:
+    """
+    Runs `call`; if it has not finished after `delay`, races a second copy against it.
+
+    The first successful result wins and the other call is cancelled; errors of the
+    losing call are retrieved and dropped. If both fail, the last error is raised. If the caller is cancelled, every call still running
+    is cancelled with it.
+
+    Args:
+        call (Callable): Coroutine factory for one attempt.
+        delay (float): Seconds to wait before hedging.
+        allow_hedge (Callable): Asked right before hedging, e.g. to take a quota token.
+
+    Returns:
+        T: The result of whichever call succeeded first.
+    """
+    pending = {asyncio.ensure_future(call())}
+    error: BaseException | None = None
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done and await allow_hedge():
+            pending.add(asyncio.ensure_future(call()))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = None
+            for task in done:
+                if task.exception() is None:
+                    winner = winner or task
+                else:
+                    error = task.exception()
+            if winner is not None:
+                return winner.result()
+        raise error
+    finally:
+        for task in pending:
+            # A cancelled call may still finish with an error; retrieve it so asyncio does not log it
+            task.add_done_callback(_discard_result)
+            task.cancel()
+
+
+def _discard_result(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_latencies: dict[str, LatencyTracker] = {}
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Returns the process-wide breaker for an upstream host."""
+    if host not in _breakers:
+        _breakers[host] = CircuitBreaker(host)
+    return _breakers[host]
+
+
+def get_latency_tracker(host: str) -> LatencyTracker:
+    """Returns the process-wide latency window for an upstream host."""
+    if host not in _latencies:
+        _latencies[host] = LatencyTracker()
+    return _latencies[host]
+
+
+def reset_upstream_state() -> None:
+    """Forgets all breakers and latency windows."""
+    _breakers.clear()
+    _latencies.clear()
+    UPSTREAM_BREAKER_OPEN.clear()
+
+
+def get_breaker_states() -> dict[str, dict]:
+    """Returns the state of every upstream breaker in this process."""
+    return {host: breaker.snapshot() for host, breaker in _breakers.items()}
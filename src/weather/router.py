@@ -1,7 +1,16 @@
-from fastapi import APIRouter, status
+from datetime import datetime
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Body, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from structlog.contextvars import bind_contextvars
 
 from src.weather.dependencies import IWeatherService
-from src.weather.schemas import WeatherCreate, WeatherResponse, WeatherUpdate
+from src.cities.dependencies import IPopularityTracker
+from src.weather.schemas import (
+    WeatherCreate, WeatherResponse, WeatherUpdate, WeatherHistoryPage, WeatherAggregate
+)
+from src.config import settings
 
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
@@ -24,10 +33,57 @@ async def create_weather(
     return await service.create_weather_record(weather)
 
 
+@router.post("/bulk", response_model=list[WeatherResponse], status_code=status.HTTP_201_CREATED)
+async def create_weather_bulk(
+    weather: Annotated[list[WeatherCreate], Body(min_length=1, max_length=settings.BULK_INGEST_MAX_ITEMS)],
+    service: IWeatherService
+):
+    """
+    Creates many weather entries in a single batch insert.
+
+    Args:
+        weather (list[WeatherCreate]): The weather data to create.
+        service (IWeatherService): The weather service.
+
+    Returns:
+        list[WeatherResponse]: The created weather records, in request order.
+    """
+    return await service.create_weather_records_bulk(weather)
+
+
+@router.get("/", response_model=list[WeatherResponse])
+async def get_weather_many(
+        cities: Annotated[str, Query(min_length=1, description="Comma-separated list of cities")],
+        service: IWeatherService,
+        popularity: IPopularityTracker
+):
+    """
+    Retrieves current weather for many cities in one round trip.
+
+    Args:
+        cities (str): Comma-separated city names, e.g. `London,Tokyo,Almaty`.
+        service (IWeatherService): The weather service.
+        popularity (IPopularityTracker): Read-demand counters; every city found counts as one read.
+
+    Returns:
+        list[WeatherResponse]: Weather for every city that was found, in request order.
+    """
+    names = [name.strip() for name in cities.split(",") if name.strip()]
+    if len(names) > settings.BATCH_READ_MAX_CITIES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"At most {settings.BATCH_READ_MAX_CITIES} cities per request.",
+        )
+    weather = await service.fetch_weather_many(names)
+    popularity.record(*(item.city for item in weather))
+    return weather
+
+
 @router.get("/{city}", response_model=WeatherResponse)
 async def get_weather(
         city: str,
-        service: IWeatherService
+        service: IWeatherService,
+        popularity: IPopularityTracker
 ):
     """
     Retrieves weather data for a specific city.
@@ -36,11 +92,89 @@ async def get_weather(
     Args:
         city (str): The name of the city.
         service (IWeatherService): The weather service.
+        popularity (IPopularityTracker): Read-demand counters that drive adaptive refresh.
 
     Returns:
         WeatherResponse: The weather data.
     """
-    return await service.fetch_weather(city)
+    bind_contextvars(city=city)
+    weather = await service.fetch_weather(city)
+    popularity.record(weather.city)
+    return weather
+
+
+@router.get("/{city}/history", response_model=WeatherHistoryPage)
+async def get_weather_history(
+        city: str,
+        service: IWeatherService,
+        start: Annotated[datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime | None, Query(alias="to")] = None,
+        limit: Annotated[int, Query(ge=1, le=settings.HISTORY_MAX_PAGE_SIZE)] = 100,
+        cursor: str | None = None,
+        format: Literal["json", "ndjson"] = "json"
+):
+    """
+    Retrieves stored weather history for a city in chronological order.
+
+    In `json` format returns one page and a `next_cursor` to pass back for the next
+    page. In `ndjson` format streams every record in the range (after `cursor`,
+    if given) as newline-delimited JSON, ignoring `limit`.
+
+    Args:
+        city (str): The name of the city.
+        service (IWeatherService): The weather service.
+        start (datetime | None): Inclusive lower bound (`from` query parameter).
+        end (datetime | None): Exclusive upper bound (`to` query parameter).
+        limit (int): Page size for the `json` format.
+        cursor (str | None): Cursor from the previous page.
+        format (str): `json` for paginated pages, `ndjson` for a streamed export.
+
+    Returns:
+        WeatherHistoryPage | StreamingResponse: A page of records, or the NDJSON stream.
+    """
+    bind_contextvars(city=city)
+    if format == "ndjson":
+        records = service.stream_weather_history(city, start, end, cursor)
+
+        async def ndjson():
+            async for record in records:
+                yield record.model_dump_json() + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    return await service.get_weather_history(city, start, end, cursor, limit)
+
+
+@router.get("/{city}/aggregate", response_model=WeatherAggregate)
+async def get_weather_aggregate(
+        city: str,
+        service: IWeatherService,
+        bucket: str = "1h",
+        metrics: str = "temperature,humidity,pressure",
+        fn: str = "avg,min,max",
+        start: Annotated[datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime | None, Query(alias="to")] = None
+):
+    """
+    Retrieves downsampled weather history computed in the database.
+
+    The payload holds one entry per bucket (columnar arrays), so its size depends
+    on the number of buckets rather than on the number of raw readings.
+
+    Args:
+        city (str): The name of the city.
+        service (IWeatherService): The weather service.
+        bucket (str): Bucket width, e.g. `15m`, `1h`, `1d`.
+        metrics (str): Comma-separated metrics to aggregate.
+        fn (str): Comma-separated aggregate functions.
+        start (datetime | None): Inclusive lower bound (`from` query parameter).
+        end (datetime | None): Exclusive upper bound (`to` query parameter).
+
+    Returns:
+        WeatherAggregate: Bucket timestamps, sample counts and `<metric>_<fn>` series.
+    """
+    bind_contextvars(city=city)
+    return await service.get_weather_aggregate(city, bucket, metrics, fn, start, end)
 
 
 @router.patch("/{record_id}", response_model=WeatherResponse)
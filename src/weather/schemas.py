@@ -30,5 +30,22 @@ class WeatherResponse(WeatherBase):
 
     id: int
     fetched_at: datetime
+    last_checked_at: datetime | None = None  # Latest readings only: when the upstream last confirmed the values
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class WeatherHistoryPage(BaseModel):
+    """Schema for one page of a city's weather history."""
+
+    items: list[WeatherResponse]
+    next_cursor: str | None = None
+
+
+class WeatherAggregate(BaseModel):
+    """Schema for bucketed weather aggregates in columnar form."""
+
+    city: str
+    bucket_seconds: int
+    buckets: list[datetime]
+    samples: list[int]
+    series: dict[str, list[float | None]]  # "<metric>_<fn>" -> one value per bucket
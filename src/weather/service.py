@@ -1,9 +1,17 @@
-from typing import Optional
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator
 
-from src.weather.dependencies import IWeatherRepository
+from src.config import settings
+from src.database import async_session_maker
+from src.weather.dependencies import IWeatherRepository, IOpenWeatherClient, IWeatherCache, IWriteBehindBuffer
+from src.weather.repository import WeatherRepository
 from src.weather.entity import WeatherEntity
-from src.weather.schemas import WeatherCreate, WeatherUpdate, WeatherResponse
-from src.weather.client import OpenWeatherClient
+from src.weather.schemas import (
+    WeatherCreate, WeatherUpdate, WeatherResponse, WeatherHistoryPage, WeatherAggregate
+)
+from src.weather.aggregation import AGGREGATE_FUNCTIONS, AGGREGATE_METRICS, parse_bucket, parse_choices
+from src.weather.pagination import encode_cursor, decode_cursor
 from src.weather.exceptions import WeatherNotFound
 from src.utils import logger
 
@@ -13,21 +21,56 @@ class WeatherService:
     Service layer for weather business logic.
     """
 
-    def __init__(self, repository: IWeatherRepository):
+    def __init__(
+            self,
+            repository: IWeatherRepository,
+            openweather_client: IOpenWeatherClient,
+            cache: IWeatherCache,
+            write_behind: IWriteBehindBuffer = None
+    ):
         """
         Initializes the WeatherService.
 
         Args:
             repository (IWeatherRepository): The weather repository.
+            openweather_client (IOpenWeatherClient): Client for the external weather API.
+            cache (IWeatherCache): Read-through cache of the latest weather per city.
+            write_behind (IWriteBehindBuffer): If given, fetched observations are buffered
+                and written in batches instead of before answering.
         """
         self.repo = repository
-        self.openweather_client = OpenWeatherClient()
+        self.openweather_client = openweather_client
+        self.cache = cache
+        self.write_behind = write_behind
 
     async def fetch_weather(self, city: str) -> WeatherResponse:
         """
         Fetches the latest weather record for a city.
-        First attempts to fetch from OpenWeatherMap API and save to DB.
-        If that fails/returns None, falls back to the database.
+        Serves fresh cache entries directly; stale entries are served while a single
+        background refresh runs. On a cache miss, fetches from OpenWeatherMap API and saves to DB
+        (once per burst of concurrent requests). If that fails/returns None, falls back to the database.
+
+        Args:
+            city (str): The name of the city.
+
+        Returns:
+            WeatherResponse: The weather data.
+
+        Raises:
+            WeatherNotFound: If weather data cannot be found in both API and DB.
+        """
+        cached = await self.cache.get(city)
+        if cached is not None:
+            if not self.cache.is_fresh(cached):
+                self.cache.refresh_in_background(city, lambda: self._refresh_detached(city))
+            return cached.value
+
+        # Concurrent misses for the same city share one upstream fetch and one DB write
+        return await self.cache.load(city, lambda: self._load(city))
+
+    async def _load(self, city: str) -> WeatherResponse:
+        """
+        Loads a city from the external API, falling back to the database.
 
         Args:
             city (str): The name of the city.
@@ -39,19 +82,10 @@ class WeatherService:
             WeatherNotFound: If weather data cannot be found in both API and DB.
         """
         # Try fetching from external API
-        external_weather = await self.openweather_client.get_weather(city)
-        
-        if external_weather:
-            # Save new data
-            entity = WeatherEntity(
-                city=external_weather.city,
-                country=external_weather.country,
-                humidity=external_weather.humidity,
-                temperature=external_weather.temperature,
-                pressure=external_weather.pressure,
-            )
-            return await self.repo.create_weather_record(entity)
-        
+        record = await self._fetch_and_store(city)
+        if record:
+            return record
+
         # Fallback to DB if external API fails or returns nothing
         try:
             return await self.repo.get_latest_weather(city)
@@ -60,9 +94,120 @@ class WeatherService:
             logger.error("Weather data not found in both external API and database", city=city)
             raise
 
+    async def _fetch_and_store(self, city: str) -> WeatherResponse | None:
+        """
+        Fetches a city from the external API, persists it and populates the cache.
+
+        Args:
+            city (str): The name of the city.
+
+        Returns:
+            WeatherResponse | None: The stored record, or None if the external API returned nothing.
+        """
+        external_weather = await self.openweather_client.get_weather(city)
+        if not external_weather:
+            return None
+
+        (record,) = await self._store_fetched([self._to_entity(external_weather)])
+        await self.cache.set(city, record)
+        return record
+
+    async def _store_fetched(self, entities: list[WeatherEntity]) -> list[WeatherResponse]:
+        """
+        Stores upstream observations, skipping repeats of each city's latest reading.
+
+        In write-behind mode the observations are only buffered; repeats are then
+        detected against the cached latest reading.
+
+        Args:
+            entities (list[WeatherEntity]): The observations.
+
+        Returns:
+            list[WeatherResponse]: Each city's current reading, in input order.
+        """
+        if self.write_behind is None:
+            records, _ = await self.repo.ingest_weather_records(entities)
+            return records
+        records = []
+        for entity in entities:
+            cached = await self.cache.peek(entity.city)
+            records.append(await self.write_behind.submit(entity, latest=cached.value if cached else None))
+        return records
+
+    async def _refresh_detached(self, city: str) -> WeatherResponse | None:
+        """Refreshes a stale city outside the request, using its own DB session."""
+        async with async_session_maker() as session:
+            service = WeatherService(WeatherRepository(session), self.openweather_client, self.cache, self.write_behind)
+            return await service._fetch_and_store(city)
+
+    async def fetch_weather_many(self, cities: list[str]) -> list[WeatherResponse]:
+        """
+        Fetches the latest weather for many cities in one round trip.
+
+        Cache hits are served directly; the remaining cities are resolved with a
+        single DB query, and only cities with no fresh data are fetched from
+        OpenWeatherMap (concurrently) and saved with one bulk insert. Cities whose
+        upstream fetch fails fall back to their stored reading, if any.
+
+        Args:
+            cities (list[str]): The names of the cities; duplicates are ignored.
+
+        Returns:
+            list[WeatherResponse]: Weather for every city that was found, in request order.
+        """
+        requested: dict[str, str] = {}
+        for city in cities:
+            requested.setdefault(self.cache.normalize_key(city), city)
+
+        found: dict[str, WeatherResponse] = {}
+        for key, city in requested.items():
+            cached = await self.cache.get(city)
+            if cached is not None:
+                if not self.cache.is_fresh(cached):
+                    self.cache.refresh_in_background(city, lambda city=city: self._refresh_detached(city))
+                found[key] = cached.value
+
+        stored: dict[str, WeatherResponse] = {}
+        missing = [city for key, city in requested.items() if key not in found]
+        for record in await self.repo.get_latest_weather_many(missing):
+            stored[self.cache.normalize_key(record.city)] = record
+
+        now = datetime.now(timezone.utc)
+        to_fetch = []
+        for city in missing:
+            key = self.cache.normalize_key(city)
+            record = stored.get(key)
+            # A repeated upstream reading keeps its fetched_at; last_checked_at says how fresh it is
+            checked_at = record and (record.last_checked_at or record.fetched_at)
+            if checked_at is not None and (now - checked_at).total_seconds() < self.cache.ttl:
+                found[key] = record
+                await self.cache.set(city, record)
+            else:
+                to_fetch.append(city)
+
+        semaphore = asyncio.Semaphore(settings.REFRESH_CONCURRENCY)
+
+        async def fetch_one(city: str) -> WeatherCreate | None:
+            async with semaphore:
+                return await self.openweather_client.get_weather(city)
+
+        fetched = await asyncio.gather(*(fetch_one(city) for city in to_fetch))
+        fresh = [(city, data) for city, data in zip(to_fetch, fetched) if data is not None]
+        created = await self._store_fetched([self._to_entity(data) for _, data in fresh])
+        for (city, _), record in zip(fresh, created):
+            found[self.cache.normalize_key(city)] = record
+            await self.cache.set(city, record)
+
+        for city in to_fetch:
+            key = self.cache.normalize_key(city)
+            if key not in found and key in stored:
+                found[key] = stored[key]
+
+        return [found[key] for key in requested if key in found]
+
     async def create_weather_record(self, data: WeatherCreate) -> WeatherResponse:
         """
-        Creates a new weather record manually.
+        Creates a new weather record manually and publishes it as the city's latest.
 
         Args:
             data (WeatherCreate): The weather data to create.
@@ -70,14 +215,38 @@ class WeatherService:
         Returns:
             WeatherResponse: The created weather record.
         """
-        entity = WeatherEntity(
-            city=data.city,
-            country=data.country,
-            humidity=data.humidity,
-            temperature=data.temperature,
-            pressure=data.pressure,
-        )
-        return await self.repo.create_weather_record(entity)
+        record = await self.repo.create_weather_record(self._to_entity(data))
+        await self.cache.set(record.city, record)
+        return record
+
+    async def create_weather_records_bulk(self, data: list[WeatherCreate]) -> list[WeatherResponse]:
+        """
+        Creates many weather records in one statement and publishes them as their cities' latest.
+
+        Args:
+            data (list[WeatherCreate]): The weather data to create.
+
+        Returns:
+            list[WeatherResponse]: The created weather records, in input order.
+        """
+        records = await self.repo.create_weather_records_bulk([self._to_entity(item) for item in data])
+        await self.cache.set_many(records)
+        return records
+
+    async def ingest_weather(self, data: list[WeatherCreate]) -> tuple[list[WeatherResponse], int]:
+        """
+        Stores fetched observations, skipping repeats of a city's latest reading, and publishes them.
+
+        Args:
+            data (list[WeatherCreate]): Observations from the external API.
+
+        Returns:
+            tuple[list[WeatherResponse], int]: Each city's current reading, in input order,
+                and the number of new history rows.
+        """
+        records, inserted = await self.repo.ingest_weather_records([self._to_entity(item) for item in data])
+        await self.cache.set_many(records)
+        return records, inserted
 
     async def get_latest_weather(self, city: str) -> WeatherResponse:
         """
@@ -94,6 +263,99 @@ class WeatherService:
         """
         return await self.repo.get_latest_weather(city)
 
+    async def get_weather_history(
+            self,
+            city: str,
+            start: datetime | None = None,
+            end: datetime | None = None,
+            cursor: str | None = None,
+            limit: int = 100
+    ) -> WeatherHistoryPage:
+        """
+        Retrieves one page of a city's stored history.
+
+        Args:
+            city (str): The city name.
+            start (datetime | None): Inclusive lower bound on fetched_at.
+            end (datetime | None): Exclusive upper bound on fetched_at.
+            cursor (str | None): Cursor returned with the previous page.
+            limit (int): Page size.
+
+        Returns:
+            WeatherHistoryPage: The records and the cursor of the next page (None on the last page).
+
+        Raises:
+            InvalidCursor: If the cursor is malformed.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        # Fetch one extra row to know whether another page exists
+        records = await self.repo.get_weather_history(city, start, end, after, limit + 1)
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_cursor = encode_cursor(records[-1].fetched_at, records[-1].id)
+        return WeatherHistoryPage(items=records, next_cursor=next_cursor)
+
+    def stream_weather_history(
+            self,
+            city: str,
+            start: datetime | None = None,
+            end: datetime | None = None,
+            cursor: str | None = None
+    ) -> AsyncIterator[WeatherResponse]:
+        """
+        Streams a city's stored history in chronological order with constant memory.
+
+        Args:
+            city (str): The city name.
+            start (datetime | None): Inclusive lower bound on fetched_at.
+            end (datetime | None): Exclusive upper bound on fetched_at.
+            cursor (str | None): Resume after the position encoded in this cursor.
+
+        Returns:
+            AsyncIterator[WeatherResponse]: Records one by one.
+
+        Raises:
+            InvalidCursor: If the cursor is malformed.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        return self.repo.stream_weather_history(city, start, end, after, settings.HISTORY_STREAM_BATCH_SIZE)
+
+    async def get_weather_aggregate(
+            self,
+            city: str,
+            bucket: str,
+            metrics: str,
+            functions: str,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ) -> WeatherAggregate:
+        """
+        Computes bucketed aggregates of a city's stored history.
+
+        Args:
+            city (str): The city name.
+            bucket (str): Bucket width such as `15m`, `1h` or `1d`.
+            metrics (str): Comma-separated metrics (temperature, humidity, pressure).
+            functions (str): Comma-separated aggregate functions (avg, min, max).
+            start (datetime | None): Inclusive lower bound on fetched_at.
+            end (datetime | None): Exclusive upper bound on fetched_at.
+
+        Returns:
+            WeatherAggregate: Columnar series, one value per bucket.
+
+        Raises:
+            InvalidAggregation: If a parameter is not supported.
+        """
+        return await self.repo.get_weather_aggregate(
+            city,
+            parse_bucket(bucket),
+            parse_choices(metrics, AGGREGATE_METRICS, "metrics"),
+            parse_choices(functions, AGGREGATE_FUNCTIONS, "fn"),
+            start,
+            end,
+        )
+
     async def update_weather_record(self, record_id: int, data: WeatherUpdate) -> WeatherResponse:
         """
         Updates an existing weather record.
@@ -108,7 +370,10 @@ class WeatherService:
         Raises:
             WeatherNotFound: If the record is not found.
         """
-        return await self.repo.update_weather_record(record_id, data)
+        record = await self.repo.update_weather_record(record_id, data)
+        # The record may be the city's latest: make every process reload it
+        await self.cache.invalidate(record.city)
+        return record
 
     async def delete_weather_record(self, record_id: int) -> None:
         """
@@ -120,4 +385,16 @@ class WeatherService:
         Raises:
             WeatherNotFound: If the record is not found.
         """
-        await self.repo.delete_weather_record(record_id)
+        city = await self.repo.delete_weather_record(record_id)
+        await self.cache.invalidate(city)
+
+    @staticmethod
+    def _to_entity(data: WeatherCreate) -> WeatherEntity:
+        """Converts an input schema to a domain entity."""
+        return WeatherEntity(
+            city=data.city,
+            country=data.country,
+            humidity=data.humidity,
+            temperature=data.temperature,
+            pressure=data.pressure,
+        )
@@ -0,0 +1,93 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.utils import logger
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single execution.
+
+    Within a process, callers for a key that is already in flight await the same
+    task and receive its result (or exception). When a Redis client is given, the
+    leader additionally holds a Redis lock so that only one worker process runs
+    the call at a time; the others wait for the lock and then re-run the call,
+    which is expected to find the leader's result in a shared cache.
+    """
+
+    def __init__(
+            self,
+            redis: Redis | None = None,
+            lock_timeout: float = settings.SINGLEFLIGHT_LOCK_TIMEOUT_SECONDS,
+            wait_timeout: float = settings.SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS,
+            key_prefix: str = "weather:flight:",
+    ):
+        """
+        Initializes the SingleFlight.
+
+        Args:
+            redis (Redis | None): Redis client for cross-process locking. If None, coalescing is per process.
+            lock_timeout (float): Seconds after which a held Redis lock expires.
+            wait_timeout (float): Seconds to wait for another process' lock before running anyway.
+            key_prefix (str): Prefix for Redis lock keys.
+        """
+        self.redis = redis
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.key_prefix = key_prefix
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `fn` for `key`, or joins the call already in flight for it.
+
+        Args:
+            key (str): Coalescing key.
+            fn (Callable): Coroutine factory to execute once per burst.
+
+        Returns:
+            T: The result shared by all concurrent callers.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shield so that one cancelled caller does not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        if self.redis is None:
+            return await fn()
+
+        lock = self.redis.lock(
+            self.key_prefix + key,
+            timeout=self.lock_timeout,
+            blocking_timeout=self.wait_timeout,
+        )
+        try:
+            acquired = await lock.acquire()
+        except RedisError as e:
+            logger.warning("Single-flight lock unavailable, running without it", key=key, error=str(e))
+            return await fn()
+
+        if not acquired:
+            logger.warning("Timed out waiting for single-flight lock", key=key)
+            return await fn()
+        try:
+            return await fn()
+        finally:
+            try:
+                await lock.release()
+            except RedisError as e:
+                logger.warning("Failed to release single-flight lock", key=key, error=str(e))
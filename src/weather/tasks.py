@@ -1,31 +1,399 @@
 import asyncio
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, TypeVar
+
+from celery import chord, group
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
 from src.celery_app import celery_app
+from src.weather.cache import get_weather_cache
 from src.weather.client import OpenWeatherClient
-from src.weather.service import WeatherService
+from src.weather.partitions import maintain_partitions
+from src.weather.ratelimit import Priority, get_upstream_rate_limiter
+from src.weather.repository import WeatherRepository
+# service and dependencies import each other; enter the cycle through dependencies,
+# as the web app does, so the worker can load this module first
+from src.weather.dependencies import WeatherService
+from src.cities.dependencies import TrackedCityRepository, TrackedCityService
+from src.cities.popularity import get_popularity_tracker
 from src.weather.schemas import WeatherCreate
-from src.database import async_session_maker
+from src.redis_client import get_redis
+from src.worker_runtime import get_worker_runtime
 from src.config import settings
+from src.metrics import CITY_REFRESH_LAG, REFRESH_LAG
 from src.utils import logger
 
 
-async def fetch_and_save():
-    """Async wrapper for the celery task logic."""
-    client = OpenWeatherClient()
+T = TypeVar("T")
+
+
+async def fetch_all(
+        client: OpenWeatherClient,
+        cities: list[str],
+        concurrency: int
+) -> dict[str, WeatherCreate | None]:
+    """
+    Fetches current weather for many cities concurrently.
+
+    Args:
+        client (OpenWeatherClient): The external API client.
+        cities (list[str]): Cities to fetch.
+        concurrency (int): Maximum number of upstream requests in flight.
+
+    Returns:
+        dict[str, WeatherCreate | None]: Fetched data per city; None where the fetch failed.
+    """
+    return await _fetch_each(cities, client.get_weather, concurrency)
+
+
+async def _fetch_each(cities: list[str], fetch: Callable[[str], Awaitable[T]], concurrency: int) -> dict[str, T | None]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(city: str) -> T:
+        async with semaphore:
+            return await fetch(city)
+
+    results = await asyncio.gather(*(fetch_one(city) for city in cities), return_exceptions=True)
+
+    fetched: dict[str, T | None] = {}
+    for city, result in zip(cities, results):
+        if isinstance(result, BaseException):
+            logger.error("Unexpected error while fetching weather", city=city, error=str(result))
+            result = None
+        fetched[city] = result
+    return fetched
+
+
+async def fetch_grouped(
+        client: OpenWeatherClient,
+        session_maker: async_sessionmaker[AsyncSession],
+        cities: list[str],
+        concurrency: int
+) -> dict[str, WeatherCreate | None]:
+    """
+    Fetches current weather for many cities in as few upstream calls as possible.
+
+    Cities with an OpenWeatherMap ID stored on the tracked city are fetched through
+    the group endpoint, up to 20 per call. The rest, and cities missing from a group
+    response, are fetched by name; the IDs those responses carry are stored on the
+    tracked cities for the next cycle.
+
+    Args:
+        client (OpenWeatherClient): The external API client.
+        session_maker (async_sessionmaker): Factory for the DB session used to read and store IDs.
+        cities (list[str]): Cities to fetch.
+        concurrency (int): Maximum number of by-name requests in flight.
+
+    Returns:
+        dict[str, WeatherCreate | None]: Fetched data per city; None where the fetch failed.
+    """
+    async with session_maker() as session:
+        ids = await TrackedCityRepository(session).get_owm_city_ids(cities)
+
+    grouped = await client.get_weather_many(list(ids.values())) if ids else {}
+    fetched: dict[str, WeatherCreate | None] = {}
+    by_name = []
+    for city in cities:
+        if city in ids and ids[city] in grouped:
+            fetched[city] = grouped[ids[city]]
+        else:
+            by_name.append(city)
+    resolved = {}
+    for city, result in (await _fetch_each(by_name, client.get_weather_with_id, concurrency)).items():
+        fetched[city], city_id = result or (None, None)
+        if city_id is not None and ids.get(city) != city_id:
+            resolved[city] = city_id
+
+    if resolved:
+        async with session_maker() as session:
+            await TrackedCityRepository(session).set_owm_city_ids(resolved)
+    return {city: fetched[city] for city in cities}
+
+
+async def fetch_and_save(
+        client: OpenWeatherClient,
+        session_maker: async_sessionmaker[AsyncSession],
+        cities: list[str],
+        concurrency: int = settings.REFRESH_CONCURRENCY,
+        grouped: bool = settings.OWM_GROUP_ENABLED
+) -> dict:
+    """
+    Refreshes weather for the given cities: concurrent upstream fetches, then one bulk write.
+
+    Readings that repeat a city's latest one are not inserted again (see
+    `WeatherRepository.ingest_weather_records`); the summary counts them as unchanged.
+
+    Args:
+        client (OpenWeatherClient): The external API client.
+        session_maker (async_sessionmaker): Factory for the DB session used to persist results.
+        cities (list[str]): Cities to refresh.
+        concurrency (int): Maximum number of upstream requests in flight.
+        grouped (bool): Whether to fetch cities with a known OpenWeatherMap ID through the group endpoint.
+
+    Returns:
+        dict: Per-cycle summary with counts and timings in milliseconds.
+    """
+    started = time.perf_counter()
+    if grouped:
+        fetched = await fetch_grouped(client, session_maker, cities, concurrency)
+    else:
+        fetched = await fetch_all(client, cities, concurrency)
+    fetch_ms = (time.perf_counter() - started) * 1000
+
+    to_save = [data for data in fetched.values() if data is not None]
+    for city, data in fetched.items():
+        if data is None:
+            logger.warning("Skipping update", city=city)
+    failed = len(fetched) - len(to_save)
+
+    async with session_maker() as session:
+        repository = WeatherRepository(session)
+        previous = await repository.get_latest_weather_many([data.city for data in to_save])
+        record_refresh_lag({row.city: row.last_checked_at or row.fetched_at for row in previous})
+        service = WeatherService(repository, client, get_weather_cache())
+        try:
+            records, inserted = await service.ingest_weather(to_save)
+            updated = len(records)
+        except Exception as e:
+            # Isolate the offending rows by falling back to one write per city
+            await session.rollback()
+            logger.error("Bulk save failed, retrying row by row", error=str(e))
+            updated = inserted = 0
+            for data in to_save:
+                try:
+                    inserted += (await service.ingest_weather([data]))[1]
+                    updated += 1
+                except Exception as e:
+                    await session.rollback()
+                    logger.error("Failed to save weather data", city=data.city, error=str(e))
+                    failed += 1
+
+    summary = {
+        "cities": len(cities),
+        "updated": updated,
+        "unchanged": updated - inserted,
+        "failed": failed,
+        "fetch_ms": round(fetch_ms, 1),
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("Weather refresh cycle finished", **summary)
+    return summary
+
+
+def record_refresh_lag(previous: dict[str, datetime], now: datetime | None = None) -> None:
+    """
+    Records how long ago each city was last checked when a refresh checks it again.
+
+    Args:
+        previous (dict[str, datetime]): last_checked_at of the city's latest reading, per city.
+        now (datetime | None): Time of the refresh; defaults to the current time.
+    """
+    now = now or datetime.now(timezone.utc)
+    for city, fetched_at in previous.items():
+        lag = max(0.0, (now - fetched_at).total_seconds())
+        REFRESH_LAG.observe(lag)
+        CITY_REFRESH_LAG.labels(city).set(lag)
+
+
+SHARD_LOCK_PREFIX = "weather:refresh:shard:"
+
+# Shards running in this process; guards overlapping cycles when Redis is unavailable
+_running_shards: set[int] = set()
+
+
+def shard_cities(cities: list[str], shard_count: int) -> list[list[str]]:
+    """
+    Splits cities into shards by a stable hash, so a city always lands in the same shard.
 
-    async with async_session_maker() as session:
-        for city in settings.CITIES_TO_TRACK:
-            data = await client.get_weather(city)
-            if data:
-                schema = WeatherCreate(**data)
-                await WeatherService.create_weather_record(session, schema)
-            else:
-                logger.warning(f"Skipping update for {city}")
+    Args:
+        cities (list[str]): Cities to split.
+        shard_count (int): Number of shards.
+
+    Returns:
+        list[list[str]]: One list per shard (possibly empty), in shard order.
+    """
+    shards: list[list[str]] = [[] for _ in range(max(shard_count, 1))]
+    for city in cities:
+        shards[zlib.crc32(city.casefold().encode()) % len(shards)].append(city)
+    return shards
+
+
+async def refresh_shard(
+        client: OpenWeatherClient,
+        session_maker: async_sessionmaker[AsyncSession],
+        shard: int,
+        cities: list[str],
+        redis: Redis | None = None,
+        lock_timeout: float = settings.REFRESH_SHARD_LOCK_TIMEOUT_SECONDS
+) -> dict:
+    """
+    Refreshes one shard, unless the previous cycle for the same shard is still running.
+
+    Overlap is detected with a Redis lock per shard (across workers) and an in-process
+    set (within this worker). If Redis is unreachable the shard runs anyway. The cities
+    of a skipped shard were already rescheduled when they were claimed, so they are
+    released to be claimed again on the next scheduler tick.
+
+    Args:
+        client (OpenWeatherClient): The external API client.
+        session_maker (async_sessionmaker): Factory for the DB session used to persist results.
+        shard (int): Shard index.
+        cities (list[str]): Cities in the shard.
+        redis (Redis | None): Redis client for the cross-worker lock.
+        lock_timeout (float): Seconds after which a crashed run's lock expires.
+
+    Returns:
+        dict: The fetch_and_save summary plus the shard index, or a `skipped` marker.
+    """
+    if shard in _running_shards:
+        logger.warning("Previous refresh of the shard is still running, skipping", shard=shard)
+        return await skip_shard(session_maker, shard, cities)
+
+    lock = None
+    if redis is not None:
+        lock = redis.lock(f"{SHARD_LOCK_PREFIX}{shard}", timeout=lock_timeout, blocking=False)
+        try:
+            if not await lock.acquire():
+                logger.warning("Shard is being refreshed by another worker, skipping", shard=shard)
+                return await skip_shard(session_maker, shard, cities)
+        except RedisError as e:
+            logger.warning("Shard lock unavailable, refreshing without it", shard=shard, error=str(e))
+            lock = None
+
+    _running_shards.add(shard)
+    try:
+        summary = await fetch_and_save(client, session_maker, cities)
+    finally:
+        _running_shards.discard(shard)
+        if lock is not None:
+            try:
+                await lock.release()
+            except RedisError as e:
+                logger.warning("Failed to release shard lock", shard=shard, error=str(e))
+    return {"shard": shard, "skipped": False, **summary}
+
+
+async def skip_shard(session_maker: async_sessionmaker[AsyncSession], shard: int, cities: list[str]) -> dict:
+    """Releases the cities of a skipped shard and returns its `skipped` marker."""
+    try:
+        async with session_maker() as session:
+            released = await TrackedCityRepository(session).release_claimed_cities(cities)
+    except (SQLAlchemyError, OSError) as e:
+        logger.error("Failed to release the cities of a skipped shard", shard=shard, cities=len(cities), error=str(e))
+        released = 0
+    return {"shard": shard, "skipped": True, "released": released}
+
+
+def summarize_cycle(results: list[dict], started_at: float) -> dict:
+    """
+    Combines per-shard summaries into one summary for the refresh cycle.
+
+    Args:
+        results (list[dict]): refresh_shard summaries.
+        started_at (float): Unix time at which the cycle was dispatched.
+
+    Returns:
+        dict: Totals, the skipped shards (and how many of their cities were released) and
+            per-shard timings in milliseconds.
+    """
+    ran = [r for r in results if not r["skipped"]]
+    return {
+        "shards": len(results),
+        "skipped": sorted(r["shard"] for r in results if r["skipped"]),
+        "released": sum(r["released"] for r in results if r["skipped"]),
+        "cities": sum(r["cities"] for r in ran),
+        "updated": sum(r["updated"] for r in ran),
+        "unchanged": sum(r["unchanged"] for r in ran),
+        "failed": sum(r["failed"] for r in ran),
+        "shard_ms": {r["shard"]: r["total_ms"] for r in ran},
+        "total_ms": round((time.time() - started_at) * 1000, 1),
+    }
+
+
+@celery_app.task
+def refresh_weather_shard(shard: int, cities: list[str]) -> dict:
+    """Refreshes the weather for one shard of the tracked cities."""
+    runtime = get_worker_runtime()
+    client = OpenWeatherClient(runtime.http_client, limiter=get_upstream_rate_limiter(), priority=Priority.BACKGROUND)
+    return runtime.run(refresh_shard(client, runtime.session_maker, shard, cities, get_redis()))
+
+
+@celery_app.task
+def collect_refresh_results(results: list[dict], started_at: float) -> dict:
+    """Chord callback: logs and returns the summary of a sharded refresh cycle."""
+    summary = summarize_cycle(results, started_at)
+    logger.info("Weather update completed.", **summary)
+    return summary
+
+
+async def claim_due_cities(session_maker: async_sessionmaker[AsyncSession]) -> list[str]:
+    """Claims the tracked cities whose refresh is due, in their own session."""
+    async with session_maker() as session:
+        service = TrackedCityService(TrackedCityRepository(session), get_popularity_tracker())
+        return await service.claim_due_cities()
 
 
 @celery_app.task
 def update_weather_data():
-    """Periodic task to update weather data for all configured cities."""
-    logger.info("Starting scheduled weather update...")
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(fetch_and_save())
-    logger.info("Weather update completed.")
\ No newline at end of file
+    """Periodic task: claims the due tracked cities and refreshes them as parallel shard tasks."""
+    runtime = get_worker_runtime()
+    due = runtime.run(claim_due_cities(runtime.session_maker))
+    if not due:
+        return None
+
+    shards = [
+        (index, cities)
+        for index, cities in enumerate(shard_cities(due, settings.REFRESH_SHARD_COUNT))
+        if cities
+    ]
+    logger.info("Starting scheduled weather update...", cities=len(due), shards=len(shards))
+    header = group(refresh_weather_shard.s(index, cities) for index, cities in shards)
+    result = chord(header)(collect_refresh_results.s(time.time()))
+    return result.id
+
+
+async def retune_from_demand(session_maker: async_sessionmaker[AsyncSession]) -> dict | None:
+    """
+    Retunes adaptive refresh intervals from the shared read counters.
+
+    Skipped when the counters are unreachable: this process sees no reads of its own,
+    and treating every city as cold would stop refreshing all of them.
+    """
+    tracker = get_popularity_tracker()
+    try:
+        rates = await tracker.shared_rates()
+    except RedisError as e:
+        logger.warning("Read demand unavailable, keeping current intervals", error=str(e))
+        return None
+    async with session_maker() as session:
+        return await TrackedCityService(TrackedCityRepository(session), tracker).retune_intervals(rates)
+
+
+@celery_app.task
+def retune_refresh_intervals():
+    """Periodic task to adapt tracked cities' refresh intervals to read demand."""
+    runtime = get_worker_runtime()
+    return runtime.run(retune_from_demand(runtime.session_maker))
+
+
+async def run_partition_maintenance(session_maker: async_sessionmaker[AsyncSession]) -> dict:
+    """Runs one weather_data partition maintenance pass in its own session."""
+    async with session_maker() as session:
+        return await maintain_partitions(
+            session,
+            today=datetime.now(timezone.utc).date(),
+            months_ahead=settings.PARTITION_MONTHS_AHEAD,
+            retention_months=settings.RAW_RETENTION_MONTHS,
+        )
+
+
+@celery_app.task
+def maintain_weather_partitions():
+    """Periodic task to pre-create future partitions and compact expired ones."""
+    runtime = get_worker_runtime()
+    return runtime.run(run_partition_maintenance(runtime.session_maker))
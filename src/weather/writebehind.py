@@ -0,0 +1,357 @@
+import asyncio
+import contextlib
+import os
+import socket
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable
+from datetime import datetime, timezone
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.database import async_session_maker
+from src.metrics import WRITE_BEHIND_FLUSH_DURATION, WRITE_BEHIND_QUEUE_DEPTH, WRITE_BEHIND_STREAM_LENGTH
+from src.redis_client import get_redis
+from src.utils import logger
+from src.weather.entity import WeatherEntity
+from src.weather.exceptions import WriteBehindOverloaded
+from src.weather.repository import WeatherRepository, is_unchanged
+from src.weather.schemas import WeatherResponse
+
+
+# XREADGROUP blocks are kept well under the client's socket timeout, which would otherwise cut them off
+STREAM_MAX_BLOCK_MS = max(1, int(settings.REDIS_SOCKET_TIMEOUT_SECONDS * 500))
+
+
+@dataclass(frozen=True, slots=True)
+class BufferedWrite:
+    record: WeatherResponse
+    repeat: bool  # Only confirms the city's latest reading: bumps last_checked_at, inserts nothing
+
+
+class WriteBehindBuffer:
+    """
+    Buffers fetched observations and writes them to the database in batches.
+
+    A submitted observation gets its record ID (reserved from the weather_data
+    sequence in blocks) and timestamp up front, so the caller can answer before
+    anything is written. A background flusher writes a batch once it has
+    `batch_size` writes or its oldest write has waited `flush_interval` seconds.
+
+    Without Redis, the buffer is an in-process queue: writes still queued when
+    the process dies are lost, and `close` flushes them on shutdown. With Redis,
+    writes go to a stream read by a consumer group shared by all processes.
+    Entries are acknowledged only after their batch is committed, and entries
+    left unacknowledged (flusher crashed, database down) are redelivered, so
+    every write is applied at least once. Applying a write twice is harmless:
+    its reserved ID makes the second insert a no-op.
+    """
+
+    def __init__(
+            self,
+            session_maker: async_sessionmaker[AsyncSession],
+            redis: Redis | None = None,
+            batch_size: int = settings.WRITE_BEHIND_BATCH_SIZE,
+            flush_interval: float = settings.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+            max_size: int = settings.WRITE_BEHIND_MAX_SIZE,
+            submit_timeout: float = settings.WRITE_BEHIND_SUBMIT_TIMEOUT_SECONDS,
+            id_block_size: int = settings.WRITE_BEHIND_ID_BLOCK_SIZE,
+            claim_idle: float = settings.WRITE_BEHIND_CLAIM_IDLE_SECONDS,
+            dedup_tolerance: float = settings.INGEST_DEDUP_TOLERANCE,
+            dedup_max_age: float = settings.INGEST_DEDUP_MAX_AGE_SECONDS,
+            retry_delay: float = 1.0,
+            stream: str = "weather:ingest",
+            group: str = "weather-writers",
+    ):
+        """
+        Initializes the WriteBehindBuffer.
+
+        Args:
+            session_maker (async_sessionmaker): Factory for the sessions used to reserve IDs and flush.
+            redis (Redis | None): Redis client for the shared stream. If None, the buffer is in process.
+            batch_size (int): Maximum writes per flush.
+            flush_interval (float): Maximum seconds a write waits for its batch to fill.
+            max_size (int): Capacity of the in-process queue; `submit` waits while it is full.
+            submit_timeout (float): Maximum seconds `submit` waits for room in a full queue.
+            id_block_size (int): Record IDs reserved per sequence round trip.
+            claim_idle (float): Seconds after which an unacknowledged stream entry is redelivered.
+            dedup_tolerance (float): Tolerance for treating an observation as a repeat of the latest.
+            dedup_max_age (float): Age in seconds after which a repeat is stored anyway; 0 stores everything.
+            retry_delay (float): Seconds to wait before retrying after a failed flush or Redis error.
+            stream (str): Redis stream key.
+            group (str): Redis consumer group shared by all flushers.
+        """
+        self.session_maker = session_maker
+        self.redis = redis
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self.id_block_size = id_block_size
+        self.claim_idle = claim_idle
+        self.dedup_tolerance = dedup_tolerance
+        self.dedup_max_age = dedup_max_age
+        self.retry_delay = retry_delay
+        self.stream = stream
+        self.group = group
+        self.consumer = f"{socket.gethostname()}:{os.getpid()}"
+        self._queue: asyncio.Queue[BufferedWrite] = asyncio.Queue(max_size)
+        self._batch_ready = asyncio.Event()
+        self._inflight: list[BufferedWrite] = []
+        self._ids: deque[int] = deque()
+        self._id_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, entity: WeatherEntity, latest: WeatherResponse | None = None) -> WeatherResponse:
+        """
+        Buffers a fetched observation and returns the record it will become.
+
+        An observation that repeats `latest` (as in `WeatherRepository.ingest_weather_records`)
+        only confirms it: the returned record is `latest` with a new `last_checked_at`.
+
+        Args:
+            entity (WeatherEntity): The observation from the external API.
+            latest (WeatherResponse | None): The city's latest known reading, e.g. from the cache.
+
+        Returns:
+            WeatherResponse: The city's current reading.
+
+        Raises:
+            WriteBehindOverloaded: If the queue stays full (e.g. the database is down) for `submit_timeout`.
+        """
+        now = datetime.now(timezone.utc)
+        if (
+                latest is not None
+                and (now - _as_utc(latest.fetched_at)).total_seconds() < self.dedup_max_age
+                and is_unchanged(entity, latest, self.dedup_tolerance)
+        ):
+            write = BufferedWrite(latest.model_copy(update={"last_checked_at": now}), repeat=True)
+        else:
+            record = WeatherResponse(id=await self._next_id(), fetched_at=now, **asdict(entity))
+            write = BufferedWrite(record, repeat=False)
+        await self._put(write)
+        return write.record
+
+    def start(self) -> None:
+        """Starts the background flusher. Called on app startup."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def close(self) -> None:
+        """Stops the flusher and writes everything still buffered in process. Called on app shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        pending, self._inflight = self._inflight, []
+        while not self._queue.empty():
+            pending.append(self._take_nowait())
+        for i in range(0, len(pending), self.batch_size):
+            if not await self._flush(pending[i:i + self.batch_size]):
+                logger.error("Write-behind writes lost on shutdown", writes=len(pending) - i)
+                return
+
+    async def run(self) -> None:
+        """Flushes the in-process queue and, with Redis, the shared stream. Runs until cancelled."""
+        flushers = [self._supervise(self._drain_queue)]
+        if self.redis is not None:
+            flushers.append(self._supervise(self._drain_stream))
+        await asyncio.gather(*flushers)
+
+    def get_stats(self) -> dict:
+        """Returns buffer state for health output."""
+        return {"queued": self._queue.qsize() + len(self._inflight), "stream": self.redis is not None}
+
+    async def _next_id(self) -> int:
+        async with self._id_lock:
+            if not self._ids:
+                async with self.session_maker() as session:
+                    self._ids.extend(await WeatherRepository(session).reserve_ids(self.id_block_size))
+            return self._ids.popleft()
+
+    async def _put(self, write: BufferedWrite) -> None:
+        if self.redis is not None:
+            try:
+                await self.redis.xadd(self.stream, {"w": self.encode_write(write)})
+                return
+            except RedisError as e:
+                logger.warning("Write-behind stream unavailable, buffering in process", error=str(e))
+        try:
+            await asyncio.wait_for(self._queue.put(write), self.submit_timeout)
+        except TimeoutError:
+            logger.error("Write-behind buffer is full, rejecting write", city=write.record.city)
+            raise WriteBehindOverloaded("Weather storage is overloaded, please retry later.") from None
+        WRITE_BEHIND_QUEUE_DEPTH.inc()
+        if self._queue.qsize() >= self.batch_size - 1:  # Plus the write the flusher is holding
+            self._batch_ready.set()
+
+    async def _supervise(self, drain: Callable[[], Awaitable[None]]) -> None:
+        """Runs a drain loop, restarting it after an unexpected error instead of leaving writes unflushed."""
+        while True:
+            try:
+                await drain()
+            except Exception as e:
+                if asyncio.current_task().cancelling():
+                    raise
+                logger.error("Write-behind flusher crashed, restarting", flusher=drain.__name__, error=repr(e))
+                await asyncio.sleep(self.retry_delay)
+
+    def _take_nowait(self) -> BufferedWrite:
+        write = self._queue.get_nowait()
+        WRITE_BEHIND_QUEUE_DEPTH.dec()
+        return write
+
+    async def _drain_queue(self) -> None:
+        while True:
+            # Taken writes stay in `_inflight` until they are written, for `close` to pick up if cancelled;
+            # a database outage fills the queue, and `submit` then rejects new writes instead of dropping queued ones
+            # After a restart, the batch that was being written when the loop crashed goes first
+            if not self._inflight:
+                self._inflight = [await self._queue.get()]
+                WRITE_BEHIND_QUEUE_DEPTH.dec()
+                self._batch_ready.clear()
+                if self._queue.qsize() < self.batch_size - 1:
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                while len(self._inflight) < self.batch_size and not self._queue.empty():
+                    self._inflight.append(self._take_nowait())
+
+            while not await self._flush(self._inflight):
+                await asyncio.sleep(self.retry_delay)
+            self._inflight = []
+
+    async def _drain_stream(self) -> None:
+        while True:
+            try:
+                await self._ensure_group()
+                entries = await self._read_stream()
+                if not entries:
+                    continue
+                ids = [entry_id for entry_id, _ in entries]
+                if not await self._flush(self._decode_entries(entries)):
+                    # Left unacknowledged: the entries are redelivered once they have been idle for claim_idle
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.xack(self.stream, self.group, *ids)
+                    pipe.xdel(self.stream, *ids)
+                    pipe.xlen(self.stream)
+                    *_, length = await pipe.execute()
+                WRITE_BEHIND_STREAM_LENGTH.set(length)
+            except RedisError as e:
+                if asyncio.current_task().cancelling():
+                    raise  # The client turned our cancellation into a connection error
+                logger.warning("Write-behind stream read failed", error=str(e))
+                await asyncio.sleep(self.retry_delay)
+
+    async def _ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _read_stream(self) -> list[tuple[bytes, dict]]:
+        """Reads up to one batch, waiting at most `flush_interval` for it to fill."""
+        # Entries some flusher read but never acknowledged (it crashed, or its flush failed) come first
+        _, claimed, *_ = await self.redis.xautoclaim(
+            self.stream, self.group, self.consumer, min_idle_time=int(self.claim_idle * 1000), count=self.batch_size
+        )
+        if claimed:
+            return claimed
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        entries = []
+        while len(entries) < self.batch_size:
+            block = min(int((deadline - loop.time()) * 1000), STREAM_MAX_BLOCK_MS)
+            if block <= 0:
+                break
+            response = await self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=self.batch_size - len(entries), block=block
+            )
+            if response:
+                entries.extend(response[0][1])
+        return entries
+
+    def _decode_entries(self, entries: list[tuple[bytes, dict]]) -> list[BufferedWrite]:
+        """Decodes stream entries; undecodable ones are logged and dropped, as no retry can fix them."""
+        writes = []
+        for entry_id, fields in entries:
+            try:
+                writes.append(self.decode_write(fields[b"w"]))
+            except (KeyError, ValueError) as e:
+                logger.error("Dropping undecodable write-behind entry", entry_id=entry_id.decode(), error=str(e))
+        return writes
+
+    async def _flush(self, batch: list[BufferedWrite]) -> bool:
+        """
+        Writes one batch; returns False if it has to be retried.
+
+        Database errors are retried. Any other error would fail the same way on every
+        retry and stall the buffer, so the batch is written one write at a time instead
+        and the writes that still fail are logged and dropped.
+        """
+        if not batch:
+            return True
+        started = time.perf_counter()
+        records = [write.record for write in batch if not write.repeat]
+        checked = [(write.record.city, write.record.last_checked_at) for write in batch if write.repeat]
+        try:
+            async with self.session_maker() as session:
+                await WeatherRepository(session).write_buffered(records, checked)
+        except (SQLAlchemyError, OSError) as e:
+            WRITE_BEHIND_FLUSH_DURATION.labels("error").observe(time.perf_counter() - started)
+            logger.error("Write-behind flush failed", writes=len(batch), error=str(e))
+            return False
+        except Exception as e:
+            WRITE_BEHIND_FLUSH_DURATION.labels("error").observe(time.perf_counter() - started)
+            if len(batch) == 1:
+                logger.error("Dropping write-behind write that cannot be stored", city=batch[0].record.city, error=repr(e))
+                return True
+            logger.error("Write-behind batch failed, writing it one by one", writes=len(batch), error=repr(e))
+            for write in batch:
+                if not await self._flush([write]):
+                    return False
+            return True
+        WRITE_BEHIND_FLUSH_DURATION.labels("ok").observe(time.perf_counter() - started)
+        return True
+
+    @staticmethod
+    def encode_write(write: BufferedWrite) -> bytes:
+        """Serializes a write for the Redis stream."""
+        return orjson.dumps([write.repeat, write.record.model_dump(mode="json")])
+
+    @staticmethod
+    def decode_write(raw: bytes) -> BufferedWrite:
+        """Inverse of `encode_write`."""
+        repeat, record = orjson.loads(raw)
+        return BufferedWrite(WeatherResponse.model_validate(record), repeat=repeat)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Cache entries written before fetched_at defaulted to an aware value hold naive UTC timestamps
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+_write_behind: WriteBehindBuffer | None = None
+
+
+def get_write_behind_buffer() -> WriteBehindBuffer | None:
+    """Dependency for getting the process-wide write-behind buffer.
+
+    Returns:
+        WriteBehindBuffer | None: The shared buffer, or None unless WRITE_BEHIND_ENABLED.
+    """
+    global _write_behind
+    if _write_behind is None and settings.WRITE_BEHIND_ENABLED:
+        redis = get_redis() if settings.WRITE_BEHIND_REDIS_ENABLED else None
+        _write_behind = WriteBehindBuffer(async_session_maker, redis=redis)
+    return _write_behind
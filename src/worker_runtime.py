@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, TypeVar
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.database import make_engine
+from src.http_client import create_http_client
+from src.redis_client import close_redis
+from src.utils import logger
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """
+    Long-lived asyncio runtime for a Celery worker process.
+
+    Owns one event loop (running in a background thread), one database engine with its
+    connection pool and one HTTP client. Tasks submit coroutines with `run`, so pooled
+    connections are created once per process and never cross event loops.
+    """
+
+    def __init__(self, database_url: str = settings.DATABASE_URL, http_client: httpx.AsyncClient | None = None):
+        """
+        Initializes the runtime; nothing is started until `start` is called.
+
+        Args:
+            database_url (str): Database URL for the runtime's engine.
+            http_client (httpx.AsyncClient | None): Client to use instead of a pooled one from settings.
+        """
+        self.database_url = database_url
+        self.engine = make_engine(database_url)
+        self.session_maker: async_sessionmaker[AsyncSession] = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.http_client = http_client or create_http_client()
+        self.loop = asyncio.new_event_loop()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the event loop thread."""
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="worker-runtime", daemon=True)
+        self._thread.start()
+        logger.info("Worker runtime started")
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        """
+        Schedules a coroutine on the runtime loop without waiting for it.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+
+        Returns:
+            Future: Thread-safe future with the coroutine's result.
+
+        Raises:
+            RuntimeError: If the runtime is not running.
+        """
+        if not self.running:
+            coro.close()
+            raise RuntimeError("Worker runtime is not running")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+        """
+        Runs a coroutine on the runtime loop and blocks until it finishes.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+            timeout (float | None): Seconds to wait before giving up.
+
+        Returns:
+            The coroutine's result; its exception is re-raised in the caller.
+        """
+        return self.submit(coro).result(timeout)
+
+    async def _close_resources(self) -> None:
+        await self.http_client.aclose()
+        await close_redis()
+        await self.engine.dispose()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Closes pooled resources, then stops and closes the event loop.
+
+        Args:
+            timeout (float): Seconds to wait for the resources to close.
+        """
+        if not self.running:
+            return
+        try:
+            self.run(self._close_resources(), timeout)
+        except Exception as e:
+            logger.error("Failed to close worker runtime resources", error=str(e))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.loop.close()
+        self._thread = None
+        logger.info("Worker runtime stopped")
+
+
+_runtime: WorkerRuntime | None = None
+
+
+def init_worker_runtime(runtime: WorkerRuntime | None = None) -> WorkerRuntime:
+    """Creates and starts the process-wide runtime. Called from the worker_process_init signal."""
+    global _runtime
+    if _runtime is None:
+        _runtime = runtime or WorkerRuntime()
+        _runtime.start()
+    return _runtime
+
+
+def shutdown_worker_runtime() -> None:
+    """Stops the process-wide runtime. Called from the worker_process_shutdown signal."""
+    global _runtime
+    if _runtime is not None:
+        runtime, _runtime = _runtime, None
+        runtime.stop()
+
+
+def get_worker_runtime() -> WorkerRuntime:
+    """
+    Returns the process-wide runtime.
+
+    Starts it lazily when tasks run outside a prefork child (e.g. eager mode or a solo pool).
+
+    Returns:
+        WorkerRuntime: The running runtime.
+    """
+    return init_worker_runtime()
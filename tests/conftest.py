@@ -1,6 +1,7 @@
 import asyncio
 from typing import AsyncGenerator
 
+import httpx
 import pytest
 import asyncpg
 from sqlalchemy import text
@@ -9,13 +10,21 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from sqlalchemy.pool import NullPool
 
 from src.database import Base, get_async_session
+from src.http_client import get_http_client
 from src.main import app
 from src.config import settings
+from src.weather.cache import WeatherCache, get_weather_cache
+from src.weather.client import OpenWeatherClient
+from src.weather.ratelimit import UpstreamRateLimiter, get_upstream_rate_limiter
+from src.weather.resilience import reset_upstream_state
+from src.cities.popularity import PopularityTracker, get_popularity_tracker
 
 TEST_DB_NAME = f"{settings.POSTGRES_DB}_test"
 
 TEST_DATABASE_URL = settings.DATABASE_URL.replace(settings.POSTGRES_DB, TEST_DB_NAME)
 
+TRUNCATE_TABLES = text("TRUNCATE TABLE weather_data, weather_latest, weather_data_hourly, tracked_cities RESTART IDENTITY CASCADE;")
+
 engine_test = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
 async_session_maker_test = async_sessionmaker(engine_test, expire_on_commit=False)
 
@@ -93,22 +102,71 @@ async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+def upstream_not_found(request: httpx.Request) -> httpx.Response:
+    """Stub OpenWeatherMap upstream: every city is unknown."""
+    return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+
+
+weather_cache_test = WeatherCache(redis=None)
+popularity_tracker_test = PopularityTracker(redis=None)
+rate_limiter_test = UpstreamRateLimiter(redis=None, calls_per_minute=6000)
+
 app.dependency_overrides[get_async_session] = override_get_async_session
+app.dependency_overrides[get_weather_cache] = lambda: weather_cache_test
+app.dependency_overrides[get_popularity_tracker] = lambda: popularity_tracker_test
+app.dependency_overrides[get_upstream_rate_limiter] = lambda: rate_limiter_test
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def shared_http_client(event_loop) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """One pooled upstream client for the whole app, as the lifespan provides; closed at teardown."""
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream_not_found)) as http_client:
+        app.dependency_overrides[get_http_client] = lambda: http_client
+        yield http_client
+    del app.dependency_overrides[get_http_client]
+
+
+@pytest.fixture(autouse=True)
+def fresh_upstream_state():
+    """Circuit breakers are process-wide; start every test with them closed."""
+    reset_upstream_state()
+    yield
 
 
 @pytest.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker_test() as session:
         yield session
-        await session.execute(text("TRUNCATE TABLE weather_data RESTART IDENTITY CASCADE;"))
+        await session.execute(TRUNCATE_TABLES)
         await session.commit()
 
 
+@pytest.fixture(scope="function")
+async def session_maker() -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    yield async_session_maker_test
+    async with async_session_maker_test() as session:
+        await session.execute(TRUNCATE_TABLES)
+        await session.commit()
+
+
+@pytest.fixture(scope="function")
+async def openweather_client() -> AsyncGenerator[OpenWeatherClient, None]:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream_not_found)) as http_client:
+        yield OpenWeatherClient(http_client)
+
+
+@pytest.fixture(scope="function")
+def weather_cache() -> WeatherCache:
+    return WeatherCache(redis=None)
+
+
 @pytest.fixture(scope="function")
 async def client() -> AsyncGenerator[AsyncClient, None]:
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
 
+    weather_cache_test.clear()
+    popularity_tracker_test.clear()
     async with async_session_maker_test() as session:
-        await session.execute(text("TRUNCATE TABLE weather_data RESTART IDENTITY CASCADE;"))
+        await session.execute(TRUNCATE_TABLES)
         await session.commit()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_tracked_city_crud(client: AsyncClient):
+    """Test creating, listing, updating and deleting tracked cities."""
+    response = await client.post("/cities/", json={"name": "  Buenos   Aires ", "refresh_interval_seconds": 600})
+    assert response.status_code == 201
+    city = response.json()
+    assert city["name"] == "Buenos Aires"
+    assert city["priority"] == 0
+    assert city["enabled"] is True
+
+    response = await client.post("/cities/", json={"name": "Buenos Aires"})
+    assert response.status_code == 409
+
+    await client.post("/cities/", json={"name": "Lima", "priority": 5})
+    response = await client.get("/cities/")
+    assert [c["name"] for c in response.json()] == ["Lima", "Buenos Aires"]
+
+    response = await client.patch(f"/cities/{city['id']}", json={"priority": 10, "enabled": False})
+    assert response.status_code == 200
+    assert response.json()["priority"] == 10
+    assert response.json()["enabled"] is False
+
+    response = await client.patch(f"/cities/{city['id']}", json={"refresh_interval_seconds": 1})
+    assert response.status_code == 422
+    for field in ("refresh_interval_seconds", "priority", "enabled", "adaptive", "next_due_at"):
+        response = await client.patch(f"/cities/{city['id']}", json={field: None})
+        assert response.status_code == 422
+
+    assert (await client.delete(f"/cities/{city['id']}")).status_code == 204
+    assert (await client.get(f"/cities/{city['id']}")).status_code == 404
+    assert (await client.delete(f"/cities/{city['id']}")).status_code == 404
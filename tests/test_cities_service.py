@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.cities.repository import TrackedCityRepository
+from src.cities.schemas import TrackedCityCreate, TrackedCityUpdate
+from src.cities.popularity import PopularityTracker
+from src.cities.service import TrackedCityService
+
+
+@pytest.mark.asyncio
+async def test_claim_due_cities_respects_cadence_and_priority(db_session: AsyncSession):
+    """Test that only due, enabled cities are claimed, most important first, then rescheduled."""
+    service = TrackedCityService(TrackedCityRepository(db_session), PopularityTracker())
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+    fast = await service.create_city(TrackedCityCreate(name="Fast", refresh_interval_seconds=60, priority=1))
+    slow = await service.create_city(TrackedCityCreate(name="Slow", refresh_interval_seconds=3600))
+    paused = await service.create_city(TrackedCityCreate(name="Paused", enabled=False))
+    for city in (fast, slow, paused):
+        await service.update_city(city.id, TrackedCityUpdate(next_due_at=now))
+
+    assert await service.claim_due_cities(now=now) == ["Fast", "Slow"]
+    assert await service.claim_due_cities(now=now) == []
+
+    assert await service.claim_due_cities(now=now + timedelta(seconds=60)) == ["Fast"]
+    assert await service.claim_due_cities(now=now + timedelta(seconds=3600)) == ["Fast", "Slow"]
+
+    fast = await service.get_city(fast.id)
+    assert fast.last_claimed_at == now + timedelta(seconds=3600)
+    assert fast.next_due_at == now + timedelta(seconds=3660)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_do_not_overlap(session_maker: async_sessionmaker[AsyncSession]):
+    """Test that a scheduler skips rows another scheduler holds locked instead of claiming them twice."""
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    async with session_maker() as session:
+        service = TrackedCityService(TrackedCityRepository(session), PopularityTracker())
+        for i in range(10):
+            city = await service.create_city(TrackedCityCreate(name=f"City{i}", priority=i))
+            await service.update_city(city.id, TrackedCityUpdate(next_due_at=now))
+
+    async with session_maker() as first, session_maker() as second:
+        # Hold the first claim's locks open while the second scheduler runs
+        locked = await first.scalars(
+            text("SELECT name FROM tracked_cities ORDER BY priority DESC LIMIT 4 FOR UPDATE")
+        )
+        held = set(locked)
+        claimed = await TrackedCityService(TrackedCityRepository(second), PopularityTracker()).claim_due_cities(now=now)
+        await first.rollback()
+
+    assert held == {"City9", "City8", "City7", "City6"}
+    assert claimed == [f"City{i}" for i in range(5, -1, -1)]
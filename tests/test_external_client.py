@@ -1,4 +1,3 @@
-from unittest.mock import patch, MagicMock
 import pytest
 import httpx
 
@@ -19,35 +18,78 @@ async def test_get_weather_success():
         }
     }
 
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = mock_response_data
-    mock_response.raise_for_status.return_value = None
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith("/weather")
+        assert request.url.params["q"] == "London"
+        return httpx.Response(200, json=mock_response_data)
 
-    with patch("httpx.AsyncClient.get", new_callable=MagicMock) as mock_get:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = OpenWeatherClient(http_client)
+        result = await client.get_weather("London")
+        assert await client.get_weather_with_id("London") == (result, None)
+        mock_response_data["id"] = 2643743
+        assert (await client.get_weather_with_id("London"))[1] == 2643743
 
-        with patch("httpx.AsyncClient", autospec=True) as mock_client_cls:
-            mock_instance = mock_client_cls.return_value
-            mock_instance.__aenter__.return_value.get.return_value = mock_response
-
-            client = OpenWeatherClient()
-            result = await client.get_weather("London")
-
-            assert result is not None
-            assert result.city == "London"
-            assert result.temperature == 15.5
-            assert result.country == "GB"
+    assert result is not None
+    assert result.city == "London"
+    assert result.temperature == 15.5
+    assert result.country == "GB"
 
 
 @pytest.mark.asyncio
 async def test_get_weather_failure():
     """Test handling of HTTP errors from external API."""
 
-    with patch("httpx.AsyncClient", autospec=True) as mock_client_cls:
-        mock_instance = mock_client_cls.return_value
-        mock_instance.__aenter__.return_value.get.side_effect = httpx.HTTPError("Connection failed")
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("Connection failed", request=request)
 
-        client = OpenWeatherClient()
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = OpenWeatherClient(http_client)
         result = await client.get_weather("UnknownCity")
 
-        assert result is None
\ No newline at end of file
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_get_weather_reuses_shared_http_client():
+    """Test that consecutive calls go through the same injected connection pool."""
+    seen_requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_requests.append(request)
+        return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = OpenWeatherClient(http_client)
+        await client.get_weather("First")
+        await client.get_weather("Second")
+
+        assert not http_client.is_closed
+
+    assert len(seen_requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_weather_many_chunks_ids_into_group_calls():
+    """Test that IDs go to the group endpoint 20 per call and a failed chunk maps to None."""
+    seen_chunks = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith("/group")
+        ids = [int(city_id) for city_id in request.url.params["id"].split(",")]
+        seen_chunks.append(ids)
+        if 40 in ids:
+            return httpx.Response(404, json={"cod": "404", "message": "not found"})
+        return httpx.Response(200, json={"cnt": len(ids), "list": [
+            {"id": city_id, "name": f"City{city_id}", "sys": {"country": "XX"},
+             "main": {"temp": 1.0, "humidity": 10, "pressure": 1000}}
+            for city_id in ids if city_id != 7
+        ]})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        result = await OpenWeatherClient(http_client).get_weather_many(range(45))
+
+    assert sorted(len(chunk) for chunk in seen_chunks) == [5, 20, 20]
+    assert result[3].city == "City3"
+    assert 7 not in result  # Left out of a successful response
+    assert all(result[city_id] is None for city_id in range(40, 45))
@@ -0,0 +1,62 @@
+import io
+import json
+
+import pytest
+import structlog
+from httpx import AsyncClient
+from structlog.contextvars import bind_contextvars, clear_contextvars
+
+from src.utils import SampleEvents, setup_logging, stop_logging
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    yield stream
+    clear_contextvars()
+    setup_logging()
+
+
+def test_queued_logging_renders_context_in_background(log_stream: io.StringIO):
+    """Lines go through the queue and carry the bound context; the sampling flag is not rendered."""
+    setup_logging(stream=log_stream, queue_size=100, serializer="orjson")
+    bind_contextvars(request_id="req-1", city="Paris")
+
+    structlog.get_logger().info("Successfully fetched weather data", sample=True)
+    stop_logging()
+
+    line = json.loads(log_stream.getvalue())
+    assert line["event"] == "Successfully fetched weather data"
+    assert line["request_id"] == "req-1"
+    assert line["city"] == "Paris"
+    assert "sample" not in line
+
+
+def test_level_filter_drops_before_rendering(log_stream: io.StringIO):
+    setup_logging(stream=log_stream, level="WARNING", queue_size=0)
+
+    structlog.get_logger().info("not written")
+    structlog.get_logger().warning("written")
+
+    assert [json.loads(line)["event"] for line in log_stream.getvalue().splitlines()] == ["written"]
+
+
+def test_sample_events_only_thins_flagged_events(monkeypatch: pytest.MonkeyPatch):
+    sampler = SampleEvents(rate=0.25)
+
+    monkeypatch.setattr("src.utils.random.random", lambda: 0.5)
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "success", "sample": True})
+    assert sampler(None, "info", {"event": "failure"}) == {"event": "failure"}
+
+    monkeypatch.setattr("src.utils.random.random", lambda: 0.1)
+    assert sampler(None, "info", {"event": "success", "sample": True}) == {"event": "success", "sample_rate": 0.25}
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_echoed_or_generated(client: AsyncClient):
+    response = await client.get("/health", headers={"X-Request-ID": "trace-42"})
+    assert response.headers["x-request-id"] == "trace-42"
+
+    generated = (await client.get("/health")).headers["x-request-id"]
+    assert len(generated) == 32
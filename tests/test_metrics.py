@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from src.database import engine_options, make_engine, pool_status
+from src.weather.tasks import record_refresh_lag
+from tests.conftest import TEST_DATABASE_URL
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_upstream_and_cache(client: AsyncClient):
+    """A miss goes to the cache, then upstream (404), and is labelled by route template."""
+    route_labels = {"method": "GET", "route": "/weather/{city}", "status": "404"}
+    requests_before = sample("http_request_duration_seconds_count", **route_labels)
+    upstream_before = sample("upstream_calls_total", host="api.openweathermap.org", outcome="client_error")
+    misses_before = sample("weather_cache_requests_total", result="miss")
+
+    assert (await client.get("/weather/MetricsCity")).status_code == 404
+
+    assert sample("http_request_duration_seconds_count", **route_labels) == requests_before + 1
+    assert sample("upstream_calls_total", host="api.openweathermap.org", outcome="client_error") == upstream_before + 1
+    assert sample("weather_cache_requests_total", result="miss") == misses_before + 1
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/weather/{city}"' in response.text
+    assert "MetricsCity" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_engine_records_query_and_checkout_timings():
+    """make_engine times statements by type and pool checkouts."""
+    engine = make_engine(TEST_DATABASE_URL)
+    queries_before = sample("db_query_duration_seconds_count", operation="SELECT")
+    checkouts_before = sample("db_pool_checkout_wait_seconds_count")
+    in_use_before = sample("db_pool_connections_checked_out")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert sample("db_pool_connections_checked_out") == in_use_before + 1
+            assert pool_status(engine)["checked_out"] == 1
+    finally:
+        await engine.dispose()
+
+    assert sample("db_query_duration_seconds_count", operation="SELECT") > queries_before
+    assert sample("db_pool_checkout_wait_seconds_count") > checkouts_before
+    assert sample("db_pool_connections_checked_out") == in_use_before
+
+
+@pytest.mark.asyncio
+async def test_pgbouncer_mode_disables_statement_reuse():
+    connect_args = engine_options(pgbouncer=True)["connect_args"]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
+
+    engine = make_engine(TEST_DATABASE_URL, pgbouncer=True)
+    try:
+        async with engine.connect() as conn:
+            for _ in range(2):
+                assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+    finally:
+        await engine.dispose()
+
+
+def test_record_refresh_lag_per_city():
+    now = datetime.now(timezone.utc)
+    lags_before = sample("weather_refresh_lag_seconds_count")
+
+    record_refresh_lag({"LagCity": now - timedelta(seconds=90)}, now=now)
+
+    assert sample("weather_city_refresh_lag_seconds", city="LagCity") == 90
+    assert sample("weather_refresh_lag_seconds_count") == lags_before + 1
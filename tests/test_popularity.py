@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cities.popularity import PopularityTracker, demand_interval
+from src.cities.repository import TrackedCityRepository
+from src.cities.schemas import TrackedCityCreate, TrackedCityUpdate
+from src.cities.service import TrackedCityService
+from src.config import Settings, settings
+
+
+@pytest.mark.asyncio
+async def test_rates_track_steady_demand_and_decay():
+    """Test that the decayed rate matches a steady read rate and fades once reads stop."""
+    tracker = PopularityTracker(half_life=600, window=60)
+    start = 1_800_000_000.0
+
+    # One read every 10 seconds for an hour
+    for i in range(360):
+        tracker.record("Paris", now=start + i * 10)
+    rate = tracker.local_rates(now=start + 3600)["Paris"]
+    assert rate == pytest.approx(0.1, rel=0.05)
+
+    # Half an hour of silence: three half-lives
+    assert tracker.local_rates(now=start + 5400)["Paris"] < rate / 4
+
+
+
+class RecordingRedis:
+    """Minimal Redis stand-in that records pipelined commands."""
+
+    def __init__(self):
+        self.executed: list[list[tuple]] = []
+
+    def pipeline(self, transaction: bool = True):
+        return RecordingPipeline(self)
+
+
+class RecordingPipeline:
+    def __init__(self, redis: RecordingRedis):
+        self.redis = redis
+        self.commands: list[tuple] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def zincrby(self, key, amount, member):
+        self.commands.append(("zincrby", key, amount, member))
+
+    def expire(self, key, seconds):
+        self.commands.append(("expire", key, seconds))
+
+    async def execute(self):
+        self.redis.executed.append(self.commands)
+
+
+@pytest.mark.asyncio
+async def test_record_batches_redis_updates_until_flush():
+    """Test that reads only touch Redis when the counts are flushed, in one pipeline."""
+    redis = RecordingRedis()
+    tracker = PopularityTracker(redis=redis, half_life=600, window=60)
+    start = 1_800_000_000.0
+
+    for _ in range(3):
+        tracker.record("Paris", now=start)
+    tracker.record("Paris", "Rome", now=start + 1)
+    assert redis.executed == []
+    assert tracker.local_rates(now=start + 2)["Paris"] > 0
+
+    await tracker.flush()
+    key = f"weather:popularity:{int(start // 60)}"
+    assert redis.executed == [[
+        ("zincrby", key, 4, "Paris"),
+        ("zincrby", key, 1, "Rome"),
+        ("expire", key, tracker.windows * 60),
+    ]]
+
+    await tracker.flush()
+    assert len(redis.executed) == 1
+
+
+def test_demand_interval_is_bounded_by_slo_and_max():
+    """Test that intervals follow 1 / rate within [freshness SLO, max interval]."""
+    assert demand_interval(10.0) == settings.FRESHNESS_SLO_SECONDS
+    assert demand_interval(1 / 1800) == 1800
+    assert demand_interval(0.0) == settings.MAX_REFRESH_INTERVAL_SECONDS
+    assert demand_interval(1e-9) == settings.MAX_REFRESH_INTERVAL_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_retune_intervals_follows_demand(db_session: AsyncSession):
+    """Test that adaptive cities follow demand, manual ones are kept and hot untracked cities get tracked."""
+    service = TrackedCityService(TrackedCityRepository(db_session), PopularityTracker())
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+    hot = await service.create_city(TrackedCityCreate(name="Hot", refresh_interval_seconds=3600, adaptive=True))
+    cold = await service.create_city(TrackedCityCreate(name="Cold", refresh_interval_seconds=60, adaptive=True))
+    manual = await service.create_city(TrackedCityCreate(name="Manual", refresh_interval_seconds=60))
+    for city in (hot, cold, manual):
+        await service.update_city(city.id, TrackedCityUpdate(next_due_at=now + timedelta(hours=1)))
+    await service.claim_due_cities(now=now + timedelta(hours=1))
+
+    summary = await service.retune_intervals({"hot": 1.0, "Trending": 0.5, "Rare": 1e-7}, now=now, auto_track=True)
+
+    assert summary == {"retuned": 2, "tracked": ["Trending"]}
+    cities = {city.name: city for city in await service.list_cities()}
+    assert cities["Hot"].refresh_interval_seconds == settings.FRESHNESS_SLO_SECONDS
+    # Pulled forward from the hour it had left to one SLO after its last claim
+    assert cities["Hot"].next_due_at == now + timedelta(hours=1, seconds=settings.FRESHNESS_SLO_SECONDS)
+    assert cities["Cold"].refresh_interval_seconds == settings.MAX_REFRESH_INTERVAL_SECONDS
+    assert cities["Cold"].next_due_at == now + timedelta(hours=1, seconds=60)
+    assert cities["Manual"].refresh_interval_seconds == 60
+    assert cities["Trending"].adaptive is True
+    assert "Rare" not in cities
+
+
+def test_freshness_slo_must_fit_in_cache_ttl():
+    """Test that a freshness SLO longer than the cache TTL is rejected at startup."""
+    with pytest.raises(ValidationError):
+        Settings(FRESHNESS_SLO_SECONDS=300, WEATHER_CACHE_TTL_SECONDS=60)
+    assert Settings(FRESHNESS_SLO_SECONDS=60, WEATHER_CACHE_TTL_SECONDS=60).FRESHNESS_SLO_SECONDS == 60
+
+
+def test_explicit_interval_is_not_adaptive_by_default():
+    """Test that a city given an interval keeps it unless adaptive is asked for explicitly."""
+    assert TrackedCityCreate(name="Default").adaptive is True
+    assert TrackedCityCreate(name="Pinned", refresh_interval_seconds=600).adaptive is False
+    assert TrackedCityCreate(name="Opted", refresh_interval_seconds=600, adaptive=True).adaptive is True
+    assert TrackedCityUpdate(refresh_interval_seconds=600).model_dump(exclude_unset=True) == {
+        "refresh_interval_seconds": 600, "adaptive": False
+    }
+    assert TrackedCityUpdate(priority=1).model_dump(exclude_unset=True) == {"priority": 1}
+
+
+@pytest.mark.asyncio
+async def test_auto_tracking_is_opt_in_and_capped(db_session: AsyncSession):
+    """Test that hot untracked cities are only added when enabled and while the registry has room."""
+    service = TrackedCityService(TrackedCityRepository(db_session), PopularityTracker())
+    await service.create_city(TrackedCityCreate(name="Existing"))
+    rates = {"First": 1.0, "Second": 0.5, "Third": 0.2}
+
+    assert (await service.retune_intervals(rates))["tracked"] == []
+    summary = await service.retune_intervals(rates, auto_track=True, auto_track_max_cities=3)
+    assert summary["tracked"] == ["First", "Second"]
+    summary = await service.retune_intervals(rates, auto_track=True, auto_track_max_cities=3)
+    assert summary["tracked"] == []
+
+
+@pytest.mark.asyncio
+async def test_reads_show_up_in_hot_set(client: AsyncClient):
+    """Test that GET /weather/{city} reads are counted and exposed with their computed interval."""
+    payload = {"city": "Reykjavik", "country": "IS", "temperature": 2.0, "humidity": 80, "pressure": 990}
+    await client.post("/weather/", json=payload)
+    await client.post("/cities/", json={"name": "Reykjavik"})
+
+    for _ in range(3):
+        assert (await client.get("/weather/Reykjavik")).status_code == 200
+    await client.get("/weather/", params={"cities": "Reykjavik,Atlantis"})
+
+    response = await client.get("/cities/hot")
+    assert response.status_code == 200
+    hot = response.json()
+    assert [item["city"] for item in hot] == ["Reykjavik"]
+    assert hot[0]["tracked"] is True
+    assert hot[0]["reads_per_hour"] > 0
+    assert settings.FRESHNESS_SLO_SECONDS <= hot[0]["refresh_interval_seconds"] < settings.MAX_REFRESH_INTERVAL_SECONDS
@@ -0,0 +1,91 @@
+import httpx
+import pytest
+from structlog.testing import capture_logs
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.weather.cache import WeatherCache
+from src.weather.client import OpenWeatherClient
+from src.weather.ratelimit import Priority, UpstreamRateLimiter
+from src.weather.repository import WeatherRepository
+from src.weather.schemas import WeatherCreate
+from src.weather.service import WeatherService
+
+
+@pytest.mark.asyncio
+async def test_background_calls_leave_the_reserve_to_interactive_ones():
+    """Test that background calls stop at the reserve while interactive calls may drain the bucket."""
+    limiter = UpstreamRateLimiter(redis=None, calls_per_minute=10, daily_budget=1000, interactive_reserve=0.25)
+
+    background = [await limiter.acquire(Priority.BACKGROUND, wait_timeout=0) for _ in range(10)]
+    assert background.count(True) == 7
+
+    interactive = [await limiter.acquire(Priority.INTERACTIVE, wait_timeout=0) for _ in range(5)]
+    assert interactive.count(True) == 3
+    assert limiter.get_stats() == {
+        "allowed": {"interactive": 3, "background": 7},
+        "rejected": {"interactive": 2, "background": 3},
+    }
+
+
+@pytest.mark.asyncio
+async def test_waits_for_refill_and_enforces_daily_budget():
+    """Test that callers wait for the bucket to refill but not past the daily budget."""
+    limiter = UpstreamRateLimiter(redis=None, calls_per_minute=600, daily_budget=4, interactive_reserve=0.25)
+    # Leave only the interactive reserve; 600/min refills a token every 100 ms
+    limiter._local.tokens = limiter.capacity * limiter.interactive_reserve
+
+    assert await limiter.acquire(Priority.BACKGROUND, wait_timeout=1.0)
+    assert [await limiter.acquire(Priority.BACKGROUND, wait_timeout=1.0) for _ in range(2)] == [True, True]
+    # Background may only spend 3 of the 4 daily calls
+    assert not await limiter.acquire(Priority.BACKGROUND, wait_timeout=1.0)
+    assert await limiter.acquire(Priority.INTERACTIVE, wait_timeout=1.0)
+    assert not await limiter.acquire(Priority.INTERACTIVE, wait_timeout=1.0)
+
+
+
+@pytest.mark.asyncio
+async def test_try_acquire_refuses_quietly():
+    """Test that an optional call refused for lack of tokens is not counted or warned about as a rejection."""
+    limiter = UpstreamRateLimiter(redis=None, calls_per_minute=1, daily_budget=1000)
+
+    with capture_logs() as logs:
+        assert await limiter.try_acquire(Priority.INTERACTIVE)
+        assert not await limiter.try_acquire(Priority.INTERACTIVE)
+
+    assert not [log for log in logs if log["log_level"] == "warning"]
+    assert limiter.get_stats() == {
+        "allowed": {"interactive": 1, "background": 0},
+        "rejected": {"interactive": 0, "background": 0},
+    }
+
+@pytest.mark.asyncio
+async def test_exhausted_quota_degrades_to_stored_data(db_session: AsyncSession):
+    """Test that with no quota left the service answers from the database without calling upstream."""
+    calls = 0
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    limiter = UpstreamRateLimiter(redis=None, calls_per_minute=1, daily_budget=1000)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        client = OpenWeatherClient(http_client, limiter=limiter)
+        cache = WeatherCache(redis=None)
+        service = WeatherService(WeatherRepository(db_session), client, cache)
+        await service.create_weather_record(
+            WeatherCreate(city="Quito", country="EC", temperature=14.0, humidity=70, pressure=1020)
+        )
+        # Only the database has the reading
+        cache.clear()
+
+        # The one token goes to a call that gets throttled upstream, which pauses the limiter
+        assert await client.get_weather("Quito") is None
+        assert limiter._local.paused_until > 0
+
+        result = await service.fetch_weather("Quito")
+
+    assert result.city == "Quito"
+    # Neither the retry after the 429 nor the service's fetch reached upstream
+    assert calls == 1
+    assert limiter.get_stats()["rejected"]["interactive"] == 2
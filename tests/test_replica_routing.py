@@ -0,0 +1,126 @@
+import time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.database import ReplicaRouter, RoutingSession
+from src.weather.entity import WeatherEntity
+from src.weather.repository import WeatherRepository
+from tests.conftest import TEST_DATABASE_URL, TRUNCATE_TABLES
+
+# The replica is a stand-in: a second engine on the test database, told apart by its connection count
+UNREACHABLE_URL = TEST_DATABASE_URL.replace(TEST_DATABASE_URL.split("@")[1].split("/")[0], "127.0.0.1:1")
+
+
+class CountingEngine:
+    """NullPool engine that counts the connections it opens."""
+
+    def __init__(self, url: str = TEST_DATABASE_URL):
+        self.engine = create_async_engine(url, poolclass=NullPool)
+        self.connections = 0
+        event.listen(self.engine.sync_engine.pool, "connect", self.on_connect)
+
+    def on_connect(self, *args) -> None:
+        self.connections += 1
+
+
+@pytest_asyncio.fixture
+async def primary():
+    primary = CountingEngine()
+    yield primary
+    async with primary.engine.begin() as conn:
+        await conn.execute(TRUNCATE_TABLES)
+    await primary.engine.dispose()
+
+
+def routing_session_maker(primary: CountingEngine, router: ReplicaRouter) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        primary.engine, expire_on_commit=False, sync_session_class=RoutingSession, info={"replica": router}
+    )
+
+
+async def seed(session_maker: async_sessionmaker[AsyncSession], city: str) -> None:
+    async with session_maker() as session:
+        await WeatherRepository(session).create_weather_record(
+            WeatherEntity(city=city, country="RR", temperature=1.0, humidity=10, pressure=1000)
+        )
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_read_your_writes_to_primary(primary: CountingEngine):
+    replica = CountingEngine()
+    router = ReplicaRouter(replica.engine, max_lag=5)
+    session_maker = routing_session_maker(primary, router)
+    try:
+        await seed(session_maker, "ReplicaCity")
+        primary.connections = 0
+
+        async with session_maker() as session:
+            assert (await WeatherRepository(session).get_latest_weather("ReplicaCity")).city == "ReplicaCity"
+        assert router.snapshot() == {"available": True, "lag_seconds": 0.0}
+        assert (replica.connections, primary.connections) == (2, 0)  # lag check + read
+
+        # After a write in the same session, reads stay on the primary
+        async with session_maker() as session:
+            repo = WeatherRepository(session)
+            await repo.create_weather_record(
+                WeatherEntity(city="ReplicaCity", country="RR", temperature=2.0, humidity=10, pressure=1000)
+            )
+            assert (await repo.get_latest_weather("ReplicaCity")).temperature == 2.0
+        assert (replica.connections, primary.connections) == (2, 2)
+    finally:
+        await replica.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_is_skipped(primary: CountingEngine):
+    replica = CountingEngine()
+    router = ReplicaRouter(replica.engine, max_lag=-1)
+    session_maker = routing_session_maker(primary, router)
+    try:
+        await seed(session_maker, "LagReplicaCity")
+        primary.connections = 0
+
+        async with session_maker() as session:
+            assert await WeatherRepository(session).get_latest_weather("LagReplicaCity") is not None
+        assert router.available is False
+        assert (replica.connections, primary.connections) == (1, 1)  # lag check only
+    finally:
+        await replica.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back_to_primary(primary: CountingEngine):
+    replica = CountingEngine(UNREACHABLE_URL)
+    router = ReplicaRouter(replica.engine, check_timeout=2)
+    session_maker = routing_session_maker(primary, router)
+    try:
+        await seed(session_maker, "DownReplicaCity")
+
+        async with session_maker() as session:
+            assert await WeatherRepository(session).get_latest_weather("DownReplicaCity") is not None
+        assert router.snapshot() == {"available": False, "lag_seconds": None}
+    finally:
+        await replica.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_replica_failing_mid_read_is_retried_on_primary(primary: CountingEngine):
+    replica = CountingEngine(UNREACHABLE_URL)
+    router = ReplicaRouter(replica.engine, check_interval=60)
+    # Pretend a check just passed, so the read is routed to the replica and fails there
+    router.available, router._checked_at = True, time.monotonic()
+    session_maker = routing_session_maker(primary, router)
+    try:
+        await seed(session_maker, "FlakyReplicaCity")
+        primary.connections = 0
+
+        async with session_maker() as session:
+            assert await WeatherRepository(session).get_latest_weather("FlakyReplicaCity") is not None
+        assert router.available is False
+        assert primary.connections == 1
+    finally:
+        await replica.engine.dispose()
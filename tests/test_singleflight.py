@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.http_client import get_http_client
+from src.main import app
+from src.weather.models import WeatherData
+from src.weather.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_singleflight_shares_result_and_errors():
+    """Test that concurrent callers share one execution, including its exception."""
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flights.do("k", work) for _ in range(50)))
+    assert results == [1] * 50
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    outcomes = await asyncio.gather(*(flights.do("k", failing) for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(o, ValueError) for o in outcomes)
+
+    # The key is released once the call completes
+    assert await flights.do("k", work) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_burst_collapses_to_one_upstream_call(client: AsyncClient, db_session: AsyncSession):
+    """Load test: 500 concurrent GET /weather/London -> 1 upstream call and 1 insert."""
+    upstream_calls = 0
+
+    async def slow_upstream(request: httpx.Request) -> httpx.Response:
+        nonlocal upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={
+            "name": "London",
+            "sys": {"country": "GB"},
+            "main": {"temp": 15.5, "humidity": 72, "pressure": 1012},
+        })
+
+    previous = app.dependency_overrides[get_http_client]
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(slow_upstream))
+    app.dependency_overrides[get_http_client] = lambda: upstream
+    try:
+        responses = await asyncio.gather(*(client.get("/weather/London") for _ in range(500)))
+    finally:
+        app.dependency_overrides[get_http_client] = previous
+        await upstream.aclose()
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert upstream_calls == 1
+    assert await db_session.scalar(select(func.count()).select_from(WeatherData)) == 1
@@ -0,0 +1,181 @@
+import asyncio
+import gc
+import time
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.weather.cache import WeatherCache
+from src.weather.client import OpenWeatherClient
+from src.weather.repository import WeatherRepository
+from src.weather.resilience import BreakerState, RetryPolicy, get_circuit_breaker, get_latency_tracker, hedged
+from src.weather.schemas import WeatherCreate
+from src.weather.service import WeatherService
+
+NO_DELAY = RetryPolicy(attempts=3, base_delay=0, max_delay=0)
+WEATHER = {"name": "Lisbon", "sys": {"country": "PT"}, "main": {"temp": 20.0, "humidity": 60, "pressure": 1015}}
+
+
+@pytest.mark.asyncio
+async def test_retries_retryable_statuses_but_not_client_errors():
+    """Test that 5xx responses are retried until success while a 404 is returned at once."""
+    statuses = {"Lisbon": [503, 502, 200], "Nowhere": [404]}
+    calls = {"Lisbon": 0, "Nowhere": 0}
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        city = request.url.params["q"]
+        calls[city] += 1
+        status = statuses[city].pop(0)
+        return httpx.Response(status, json=WEATHER if status == 200 else {})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        client = OpenWeatherClient(http_client, retry=NO_DELAY)
+        assert (await client.get_weather("Lisbon")).temperature == 20.0
+        assert await client.get_weather("Nowhere") is None
+
+    assert calls == {"Lisbon": 3, "Nowhere": 1}
+    assert client.breaker.state is BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast_to_stored_data(db_session: AsyncSession):
+    """Test that an outage opens the breaker so reads go to the database without upstream calls."""
+    calls = 0
+    healthy = False
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if not healthy:
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(200, json=WEATHER)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        client = OpenWeatherClient(http_client, retry=NO_DELAY)
+        service = WeatherService(WeatherRepository(db_session), client, WeatherCache(redis=None))
+        await service.create_weather_record(
+            WeatherCreate(city="Lisbon", country="PT", temperature=18.0, humidity=55, pressure=1010)
+        )
+
+        # Two calls of three attempts each trip the default threshold of five failures
+        assert await client.get_weather("Lisbon") is None
+        assert await client.get_weather("Lisbon") is None
+        assert client.breaker.state is BreakerState.OPEN
+        assert calls == 5
+
+        started = time.perf_counter()
+        result = await service.fetch_weather("Lisbon")
+        assert result.temperature == 18.0
+        assert time.perf_counter() - started < 0.5
+        assert calls == 5
+
+        # After the recovery timeout a single trial call closes the breaker again
+        healthy = True
+        client.breaker.opened_at -= client.breaker.recovery_timeout
+        assert (await client.get_weather("Lisbon")).temperature == 20.0
+        assert client.breaker.state is BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_cuts_tail_latency():
+    """Test that a request slower than the usual p95 is raced by a second one that wins."""
+    calls = 0
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json=WEATHER)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        client = OpenWeatherClient(http_client, hedge=True)
+        for _ in range(50):
+            get_latency_tracker(httpx.URL(client.base_url).host).observe(0.02)
+
+        started = time.perf_counter()
+        result = await client.get_weather("Lisbon")
+        elapsed = time.perf_counter() - started
+
+    assert result.city == "Lisbon"
+    assert calls == 2
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("delay", [10.0, 0.0])
+async def test_cancelled_hedge_cancels_running_calls(delay: float):
+    """Test that cancelling the caller, before or while deciding to hedge, cancels the calls in flight."""
+    calls: list[asyncio.Task] = []
+    decided = asyncio.Event()
+
+    async def call() -> str:
+        calls.append(asyncio.current_task())
+        await asyncio.sleep(10)
+        return "late"
+
+    async def allow_hedge() -> bool:
+        decided.set()
+        await asyncio.sleep(10)
+        return True
+
+    caller = asyncio.create_task(hedged(call, delay, allow_hedge))
+    await asyncio.sleep(0.01)
+    assert decided.is_set() == (delay == 0.0)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    assert len(calls) == 1 and calls[0].cancelled()
+
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("loser_finishes", ["with the winner", "after cancellation"])
+async def test_hedge_loser_errors_are_retrieved(loser_finishes: str):
+    """Test that a failing losing call does not leave a 'Task exception was never retrieved' behind."""
+    loop = asyncio.get_running_loop()
+    unhandled: list[dict] = []
+    loop.set_exception_handler(lambda _, context: unhandled.append(context))
+    attempts = 0
+    release = asyncio.Event()
+
+    async def call() -> str:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            if loser_finishes == "with the winner":
+                await release.wait()
+            else:
+                # Swallows the cancellation and fails on its way out
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    pass
+            raise httpx.ConnectError("boom")
+        release.set()
+        await asyncio.sleep(0)  # Let the first call fail in the same loop iteration
+        return "hedge"
+
+    async def allow_hedge() -> bool:
+        return True
+
+    try:
+        assert await hedged(call, 0.01, allow_hedge) == "hedge"
+        await asyncio.sleep(0.01)
+        gc.collect()
+    finally:
+        loop.set_exception_handler(None)
+
+    assert unhandled == []
+
+@pytest.mark.asyncio
+async def test_health_reports_breaker_state(client: AsyncClient):
+    """Test that /health exposes per-host circuit breaker state."""
+    get_circuit_breaker("api.openweathermap.org").record_failure()
+
+    response = await client.get("/health")
+
+    assert response.json()["circuit_breakers"]["api.openweathermap.org"] == {"state": "closed", "failures": 1}
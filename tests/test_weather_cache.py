@@ -0,0 +1,225 @@
+import asyncio
+import socket
+import time
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redis_client import create_redis
+from src.weather.cache import CacheEntry, WeatherCache
+from src.weather.client import OpenWeatherClient
+from src.weather.models import WeatherData
+from src.weather.repository import WeatherRepository
+from src.weather.schemas import WeatherCreate, WeatherResponse, WeatherUpdate
+from src.weather.service import WeatherService
+
+
+def make_response(city: str = "London", temperature: float = 15.5) -> WeatherResponse:
+    return WeatherResponse(
+        id=1,
+        city=city,
+        country="GB",
+        temperature=temperature,
+        humidity=72,
+        pressure=1012,
+        fetched_at=datetime.now(timezone.utc),
+    )
+
+
+@pytest.mark.asyncio
+async def test_cache_counts_hit_miss_and_stale():
+    """Test that lookups are classified by freshness and keyed by normalized city."""
+    cache = WeatherCache(redis=None, ttl=60, stale_ttl=60)
+
+    assert await cache.get("London") is None
+    await cache.set("London", make_response())
+    assert (await cache.get("  london ")).value.city == "London"
+
+    # Age the entry past the freshness window but within the stale window
+    cache._entries["london"] = CacheEntry(value=make_response(), stored_at=time.time() - 90)
+    entry = await cache.get("London")
+    assert entry is not None
+    assert not cache.is_fresh(entry)
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["stale"]) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """Test that the in-process layer stays within max_size."""
+    cache = WeatherCache(redis=None, max_size=2)
+    await cache.set("A", make_response("A"))
+    await cache.set("B", make_response("B"))
+    await cache.get("A")
+    await cache.set("C", make_response("C"))
+
+    assert await cache.get("B") is None
+    assert await cache.get("A") is not None
+    assert await cache.get("C") is not None
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_triggers_single_background_refresh():
+    """Test that concurrent stale reads schedule only one refresh."""
+    cache = WeatherCache(redis=None, ttl=1, stale_ttl=60)
+    cache._entries["london"] = CacheEntry(value=make_response(), stored_at=time.time() - 5)
+    calls = 0
+
+    async def refresh():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        await cache.set("London", make_response(temperature=20.0))
+
+    for _ in range(10):
+        entry = await cache.get("London")
+        cache.refresh_in_background("London", refresh)
+        assert entry.value.temperature == 15.5
+
+    await asyncio.sleep(0.05)
+    assert calls == 1
+    assert (await cache.get("London")).value.temperature == 20.0
+
+
+@pytest.mark.asyncio
+async def test_fetch_weather_uses_cache_within_ttl(db_session: AsyncSession, weather_cache: WeatherCache):
+    """Test that repeated fetches inside the TTL call upstream and insert only once."""
+    upstream_calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal upstream_calls
+        upstream_calls += 1
+        return httpx.Response(200, json={
+            "name": "CachedCity",
+            "sys": {"country": "CC"},
+            "main": {"temp": 11.0, "humidity": 40, "pressure": 1010},
+        })
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        service = WeatherService(WeatherRepository(db_session), OpenWeatherClient(http_client), weather_cache)
+        first = await service.fetch_weather("CachedCity")
+        for _ in range(5):
+            assert (await service.fetch_weather("cachedcity")).id == first.id
+
+    rows = await db_session.scalar(select(func.count()).select_from(WeatherData))
+    assert upstream_calls == 1
+    assert rows == 1
+
+
+def test_entry_encoding_round_trips_compactly():
+    entry = CacheEntry(value=make_response(), stored_at=time.time())
+    raw = WeatherCache.encode_entry(entry)
+
+    assert WeatherCache.decode_entry(raw) == entry
+    assert len(raw) < len(entry.value.model_dump_json())
+
+
+@pytest.mark.asyncio
+async def test_invalidation_from_other_process_drops_local_entry():
+    """Test that invalidations from another cache instance drop the entry, but our own echo does not."""
+    cache = WeatherCache(redis=None)
+    other = WeatherCache(redis=None)
+    await cache.set("London", make_response())
+
+    cache.apply_invalidation(cache._invalidation_message(["london"]))
+    assert await cache.peek("London") is not None
+
+    cache.apply_invalidation(other._invalidation_message(["london"]))
+    assert await cache.peek("London") is None
+
+
+class ScriptedPubSub:
+    """Stands in for a Redis pub/sub: fails to subscribe if asked to, then replays messages."""
+
+    def __init__(self, messages: list[bytes], fail: bool = False):
+        self.messages = messages
+        self.fail = fail
+
+    async def subscribe(self, channel: str) -> None:
+        if self.fail:
+            raise RuntimeError("connection pool bug")
+
+    async def get_message(self, ignore_subscribe_messages: bool, timeout: float) -> dict | None:
+        if self.messages:
+            return {"type": "message", "data": self.messages.pop(0)}
+        await asyncio.sleep(timeout)
+        return None
+
+    async def aclose(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_invalidation_listener_survives_bad_messages_and_errors():
+    """Test that a malformed message or a non-Redis error does not stop invalidations."""
+    other = WeatherCache(redis=None)
+    subscriptions = [
+        ScriptedPubSub([], fail=True),
+        ScriptedPubSub([b"not json", b'{"keys": []}', other._invalidation_message(["london"])]),
+    ]
+    cache = WeatherCache(redis=None)
+    await cache.set("London", make_response())
+    cache.redis = type("ScriptedRedis", (), {"pubsub": lambda self, **kwargs: subscriptions.pop(0)})()
+
+    listener = asyncio.create_task(cache.listen_for_invalidations(retry_delay=0.01))
+    try:
+        for _ in range(100):
+            if "london" not in cache._entries:
+                break
+            await asyncio.sleep(0.01)
+        assert "london" not in cache._entries
+        assert not listener.done()
+    finally:
+        listener.cancel()
+
+
+@pytest.mark.asyncio
+async def test_writes_publish_and_changes_invalidate(
+        db_session: AsyncSession,
+        openweather_client: OpenWeatherClient,
+        weather_cache: WeatherCache
+):
+    """Test that created records are cached as latest and updated or deleted ones are evicted."""
+    service = WeatherService(WeatherRepository(db_session), openweather_client, weather_cache)
+    created = await service.create_weather_record(
+        WeatherCreate(city="Oslo", country="NO", temperature=3.0, humidity=80, pressure=1005)
+    )
+    assert (await weather_cache.peek("oslo")).value.id == created.id
+
+    await service.update_weather_record(created.id, WeatherUpdate(temperature=4.0))
+    assert await weather_cache.peek("Oslo") is None
+
+    bulk = await service.create_weather_records_bulk([
+        WeatherCreate(city="Oslo", country="NO", temperature=5.0, humidity=80, pressure=1005),
+        WeatherCreate(city="Bergen", country="NO", temperature=7.0, humidity=90, pressure=1001),
+    ])
+    assert (await weather_cache.peek("Bergen")).value.id == bulk[1].id
+
+    await service.delete_weather_record(bulk[1].id)
+    assert await weather_cache.peek("Bergen") is None
+    assert (await weather_cache.peek("Oslo")).value.id == bulk[0].id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stalled", [True, False])
+async def test_unresponsive_redis_falls_back_in_process(stalled: bool):
+    """Test that a stalled or blackholed Redis costs one timeout per call, then reads fall back."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()  # Connections are queued but never answered
+    url = f"redis://127.0.0.1:{listener.getsockname()[1]}/0" if stalled else "redis://10.255.255.1:6379/0"
+    cache = WeatherCache(redis=create_redis(url))
+    try:
+        started = time.perf_counter()
+        assert await cache.get("London") is None
+        await cache.set("London", make_response())
+        entry = await cache.get("London")
+        assert entry is not None and entry.value.city == "London"
+        assert time.perf_counter() - started < 3
+    finally:
+        await cache.redis.aclose()
+        listener.close()
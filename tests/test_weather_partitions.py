@@ -0,0 +1,64 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.weather.models import WeatherData, WeatherHourly
+from src.weather.partitions import list_partitions, maintain_partitions
+
+
+def reading(city: str, fetched_at: datetime, temperature: float) -> WeatherData:
+    return WeatherData(
+        city=city, country="XX", temperature=temperature, humidity=50, pressure=1000, fetched_at=fetched_at
+    )
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_creates_months_and_rolls_up_expired(
+        session_maker: async_sessionmaker[AsyncSession]
+):
+    """Test that maintenance pre-creates partitions, moves default rows and compacts old months."""
+    async with session_maker() as session:
+        session.add_all([
+            reading("Paris", datetime(2026, 1, 10, 12, 5, tzinfo=timezone.utc), 2.0),
+            reading("Paris", datetime(2026, 1, 10, 12, 35, tzinfo=timezone.utc), 4.0),
+            reading("Paris", datetime(2026, 9, 1, 8, 0, tzinfo=timezone.utc), 15.0),
+            reading("Paris", datetime(2026, 10, 17, 9, 0, tzinfo=timezone.utc), 11.0),
+        ])
+        await session.commit()
+
+        summary = await maintain_partitions(
+            session, today=date(2026, 10, 17), months_ahead=2, retention_months=6
+        )
+
+        assert summary["created"] == ["weather_data_p2026_10", "weather_data_p2026_11", "weather_data_p2026_12"]
+        assert list(await list_partitions(session)) == [date(2026, 10, 1), date(2026, 11, 1), date(2026, 12, 1)]
+
+        # The current month's row left the default partition; the September one stays raw
+        moved = await session.scalar(text("SELECT count(*) FROM weather_data_p2026_10"))
+        assert moved == 1
+        raw = (await session.scalars(select(WeatherData.fetched_at).order_by(WeatherData.fetched_at))).all()
+        assert [r.month for r in raw] == [9, 10]
+
+        rollups = (await session.scalars(select(WeatherHourly))).all()
+        assert len(rollups) == 1
+        assert rollups[0].bucket == datetime(2026, 1, 10, 12, tzinfo=timezone.utc)
+        assert rollups[0].samples == 2
+        assert rollups[0].temperature_avg == 3.0
+        assert (rollups[0].temperature_min, rollups[0].temperature_max) == (2.0, 4.0)
+
+        # A second pass is a no-op
+        summary = await maintain_partitions(
+            session, today=date(2026, 10, 17), months_ahead=2, retention_months=6
+        )
+        assert summary == {"created": [], "dropped": []}
+        assert await session.scalar(select(func.count()).select_from(WeatherHourly)) == 1
+
+        # Once October expires, its partition is rolled up and dropped
+        summary = await maintain_partitions(
+            session, today=date(2027, 4, 1), months_ahead=0, retention_months=6
+        )
+        assert summary["dropped"] == ["weather_data_p2026_10"]
+        assert await session.scalar(select(func.count()).select_from(WeatherData)) == 0
+        assert await session.scalar(select(func.count()).select_from(WeatherHourly)) == 3
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import pytest
 from httpx import AsyncClient
 
@@ -18,7 +20,10 @@ async def test_create_weather_endpoint(client: AsyncClient):
     data = response.json()
     assert data["city"] == "ApiCity"
     assert "id" in data
-    assert "fetched_at" in data
+    assert datetime.fromisoformat(data["fetched_at"]).tzinfo is not None
+
+    latest = await client.get("/weather/ApiCity")
+    assert latest.json()["fetched_at"] == data["fetched_at"]
 
 
 @pytest.mark.asyncio
@@ -78,4 +83,91 @@ async def test_full_weather_lifecycle(client: AsyncClient):
 
     # 5. GET Again (Should be 404)
     final_get = await client.get("/weather/LifecycleCity")
-    assert final_get.status_code == 404
\ No newline at end of file
+    assert final_get.status_code == 404
+
+@pytest.mark.asyncio
+async def test_create_weather_bulk_endpoint(client: AsyncClient):
+    """Test POST /weather/bulk endpoint."""
+    payload = [
+        {"city": "BulkA", "country": "BA", "temperature": 1.0, "humidity": 10, "pressure": 1000},
+        {"city": "BulkB", "country": "BB", "temperature": 2.0, "humidity": 20, "pressure": 1001},
+    ]
+    response = await client.post("/weather/bulk", json=payload)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert [item["city"] for item in data] == ["BulkA", "BulkB"]
+    assert all("id" in item for item in data)
+
+    empty = await client.post("/weather/bulk", json=[])
+    assert empty.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_weather_many_endpoint(client: AsyncClient):
+    """Test GET /weather/?cities=... returns stored cities in request order."""
+    for city in ("ManyA", "ManyB"):
+        payload = {"city": city, "country": "MA", "temperature": 5.0, "humidity": 50, "pressure": 1000}
+        assert (await client.post("/weather/", json=payload)).status_code == 201
+
+    response = await client.get("/weather/", params={"cities": "ManyB, ManyA,Unknown,ManyB"})
+
+    assert response.status_code == 200
+    assert [item["city"] for item in response.json()] == ["ManyB", "ManyA"]
+
+
+@pytest.mark.asyncio
+async def test_weather_history_pagination_and_stream(client: AsyncClient):
+    """Test GET /weather/{city}/history keyset pages and NDJSON export."""
+    payload = [
+        {"city": "HistoryCity", "country": "HC", "temperature": float(i), "humidity": 10, "pressure": 1000}
+        for i in range(5)
+    ]
+    created = (await client.post("/weather/bulk", json=payload)).json()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/weather/HistoryCity/history", params=params)).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [item["id"] for item in created]
+
+    stream = await client.get("/weather/HistoryCity/history", params={"format": "ndjson"})
+    assert stream.status_code == 200
+    assert stream.headers["content-type"].startswith("application/x-ndjson")
+    lines = [line for line in stream.text.splitlines() if line]
+    assert len(lines) == 5
+
+    bad = await client.get("/weather/HistoryCity/history", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_weather_aggregate_endpoint(client: AsyncClient):
+    """Test GET /weather/{city}/aggregate returns columnar bucket series."""
+    payload = [
+        {"city": "AggCity", "country": "AC", "temperature": t, "humidity": 50, "pressure": 1000}
+        for t in (10.0, 20.0, 30.0)
+    ]
+    await client.post("/weather/bulk", json=payload)
+
+    response = await client.get(
+        "/weather/AggCity/aggregate", params={"bucket": "1d", "metrics": "temperature", "fn": "avg,min,max"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["bucket_seconds"] == 86400
+    assert data["samples"] == [3]
+    assert data["series"] == {"temperature_avg": [20.0], "temperature_min": [10.0], "temperature_max": [30.0]}
+
+    bad = await client.get("/weather/AggCity/aggregate", params={"bucket": "1w"})
+    assert bad.status_code == 400
+    bad = await client.get("/weather/AggCity/aggregate", params={"metrics": "wind"})
+    assert bad.status_code == 400
+    for bucket in ("1000000000d", "999999999d", "5000h"):
+        bad = await client.get("/weather/AggCity/aggregate", params={"bucket": bucket})
+        assert bad.status_code == 400
@@ -1,17 +1,25 @@
+import httpx
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.weather.cache import WeatherCache
+from src.weather.client import OpenWeatherClient
 from src.weather.repository import WeatherRepository
 from src.weather.service import WeatherService
+from src.weather.entity import WeatherEntity
 from src.weather.schemas import WeatherCreate, WeatherUpdate
 from src.weather.exceptions import WeatherNotFound
 
 
 @pytest.mark.asyncio
-async def test_create_and_get_weather(db_session: AsyncSession):
+async def test_create_and_get_weather(
+        db_session: AsyncSession,
+        openweather_client: OpenWeatherClient,
+        weather_cache: WeatherCache
+):
     """Test creating a record and retrieving the latest one."""
     repo = WeatherRepository(db_session)
-    service = WeatherService(repo)
+    service = WeatherService(repo, openweather_client, weather_cache)
 
     weather_data = WeatherCreate(
         city="ServiceCity",
@@ -34,10 +42,14 @@ async def test_create_and_get_weather(db_session: AsyncSession):
 
 
 @pytest.mark.asyncio
-async def test_get_latest_weather_ordering(db_session: AsyncSession):
+async def test_get_latest_weather_ordering(
+        db_session: AsyncSession,
+        openweather_client: OpenWeatherClient,
+        weather_cache: WeatherCache
+):
     """Test that get_latest_weather returns the most recent record."""
     repo = WeatherRepository(db_session)
-    service = WeatherService(repo)
+    service = WeatherService(repo, openweather_client, weather_cache)
     city_name = "TimeCity"
 
     # Create older record
@@ -60,10 +72,14 @@ async def test_get_latest_weather_ordering(db_session: AsyncSession):
 
 
 @pytest.mark.asyncio
-async def test_update_weather(db_session: AsyncSession):
+async def test_update_weather(
+        db_session: AsyncSession,
+        openweather_client: OpenWeatherClient,
+        weather_cache: WeatherCache
+):
     """Test updating an existing record."""
     repo = WeatherRepository(db_session)
-    service = WeatherService(repo)
+    service = WeatherService(repo, openweather_client, weather_cache)
 
     # Create initial
     data = WeatherCreate(
@@ -82,10 +98,14 @@ async def test_update_weather(db_session: AsyncSession):
 
 
 @pytest.mark.asyncio
-async def test_delete_weather(db_session: AsyncSession):
+async def test_delete_weather(
+        db_session: AsyncSession,
+        openweather_client: OpenWeatherClient,
+        weather_cache: WeatherCache
+):
     """Test deleting a record."""
     repo = WeatherRepository(db_session)
-    service = WeatherService(repo)
+    service = WeatherService(repo, openweather_client, weather_cache)
 
     data = WeatherCreate(
         city="DeleteCity", country="DC", temperature=0.0, humidity=0, pressure=1000
@@ -98,3 +118,134 @@ async def test_delete_weather(db_session: AsyncSession):
     # Verify deletion
     with pytest.raises(WeatherNotFound):
         await service.get_latest_weather("DeleteCity")
+
+
+@pytest.mark.asyncio
+async def test_create_weather_records_bulk(
+        db_session: AsyncSession,
+        openweather_client: OpenWeatherClient,
+        weather_cache: WeatherCache
+):
+    """Test that a batch is written in one call and returned in input order."""
+    repo = WeatherRepository(db_session)
+    service = WeatherService(repo, openweather_client, weather_cache)
+
+    batch = [
+        WeatherCreate(city=f"BulkCity{i}", country="BC", temperature=float(i), humidity=10, pressure=1000)
+        for i in range(250)
+    ]
+    created = await service.create_weather_records_bulk(batch)
+
+    assert [record.city for record in created] == [item.city for item in batch]
+    assert len({record.id for record in created}) == 250
+    assert (await service.get_latest_weather("BulkCity42")).temperature == 42.0
+
+
+@pytest.mark.asyncio
+async def test_ingest_skips_repeated_readings(db_session: AsyncSession):
+    """Test that readings equal to the latest within the tolerance only bump last_checked_at."""
+    repo = WeatherRepository(db_session)
+
+    def reading(temperature: float) -> WeatherEntity:
+        return WeatherEntity(city="DedupCity", country="DC", temperature=temperature, humidity=40, pressure=1000)
+
+    (first,), inserted = await repo.ingest_weather_records([reading(10.0)], tolerance=0.05)
+    assert inserted == 1
+
+    (repeat,), inserted = await repo.ingest_weather_records([reading(10.01)], tolerance=0.05)
+    assert inserted == 0
+    assert repeat.id == first.id
+    assert repeat.temperature == 10.0
+    assert repeat.last_checked_at > first.fetched_at
+    assert (await repo.get_latest_weather("DedupCity")).last_checked_at == repeat.last_checked_at
+
+    (changed,), inserted = await repo.ingest_weather_records([reading(11.0)], tolerance=0.05)
+    assert inserted == 1
+    assert changed.id != first.id
+
+    # With dedup disabled, repeats are stored too
+    _, inserted = await repo.ingest_weather_records([reading(11.0)], max_age=0)
+    assert inserted == 1
+    assert len(await repo.get_weather_history("DedupCity")) == 3
+
+
+@pytest.mark.asyncio
+async def test_latest_row_follows_update_and_delete(
+        db_session: AsyncSession,
+        openweather_client: OpenWeatherClient,
+        weather_cache: WeatherCache
+):
+    """Test that the maintained latest row tracks updates and falls back on delete."""
+    repo = WeatherRepository(db_session)
+    service = WeatherService(repo, openweather_client, weather_cache)
+    city_name = "LatestCity"
+
+    older = await service.create_weather_record(
+        WeatherCreate(city=city_name, country="LC", temperature=1.0, humidity=10, pressure=1000)
+    )
+    newer = await service.create_weather_record(
+        WeatherCreate(city=city_name, country="LC", temperature=2.0, humidity=20, pressure=1000)
+    )
+
+    await service.update_weather_record(newer.id, WeatherUpdate(temperature=3.0))
+    assert (await service.get_latest_weather(city_name)).temperature == 3.0
+
+    # Updating an older record must not touch the latest row
+    await service.update_weather_record(older.id, WeatherUpdate(temperature=-5.0))
+    assert (await service.get_latest_weather(city_name)).id == newer.id
+
+    await service.delete_weather_record(newer.id)
+    latest = await service.get_latest_weather(city_name)
+    assert latest.id == older.id
+    assert latest.temperature == -5.0
+
+
+@pytest.mark.asyncio
+async def test_fetch_weather_many_fetches_only_misses(db_session: AsyncSession, weather_cache: WeatherCache):
+    """Test that fresh DB rows are reused and only missing cities go upstream, in one bulk insert."""
+    requested_upstream = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        city = request.url.params["q"]
+        requested_upstream.append(city)
+        if city == "Nowhere":
+            return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+        return httpx.Response(200, json={
+            "name": city,
+            "sys": {"country": "UP"},
+            "main": {"temp": 7.0, "humidity": 70, "pressure": 1007},
+        })
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        service = WeatherService(WeatherRepository(db_session), OpenWeatherClient(http_client), weather_cache)
+        stored = await service.create_weather_record(
+            WeatherCreate(city="StoredCity", country="SC", temperature=1.0, humidity=10, pressure=1000)
+        )
+
+        result = await service.fetch_weather_many(["StoredCity", "RemoteA", "Nowhere", "RemoteB"])
+
+    assert [record.city for record in result] == ["StoredCity", "RemoteA", "RemoteB"]
+    assert result[0].id == stored.id
+    assert sorted(requested_upstream) == ["Nowhere", "RemoteA", "RemoteB"]
+
+
+@pytest.mark.asyncio
+async def test_no_connection_held_during_upstream_call(db_session: AsyncSession, weather_cache: WeatherCache):
+    """Test that the batch read's DB lookup has released its connection before upstream is called."""
+    held_during_upstream = []
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        held_during_upstream.append(db_session.in_transaction())
+        return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+
+    repo = WeatherRepository(db_session)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        service = WeatherService(repo, OpenWeatherClient(http_client), weather_cache)
+        assert await service.fetch_weather_many(["Nowhere", "Elsewhere"]) == []
+
+    assert held_during_upstream == [False, False]
+
+    # Reads inside a transaction the caller opened are left to the caller
+    async with db_session.begin():
+        await repo.get_latest_weather_many(["Nowhere"])
+        assert db_session.in_transaction()
@@ -0,0 +1,161 @@
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.cities.repository import TrackedCityRepository
+from src.weather.client import OpenWeatherClient
+from src.weather.models import WeatherData
+from src.weather.tasks import claim_due_cities, fetch_and_save, refresh_shard, shard_cities, summarize_cycle
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_save_runs_concurrently_and_isolates_failures(
+        session_maker: async_sessionmaker[AsyncSession]
+):
+    """Test that the refresh respects the concurrency limit and skips failing cities."""
+    in_flight = 0
+    peak = 0
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        city = request.url.params["q"]
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        if city == "Broken":
+            return httpx.Response(500)
+        return httpx.Response(200, json={
+            "name": city,
+            "sys": {"country": "XX"},
+            "main": {"temp": 1.0, "humidity": 10, "pressure": 1000},
+        })
+
+    cities = [f"City{i}" for i in range(19)] + ["Broken"]
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        summary = await fetch_and_save(OpenWeatherClient(http_client), session_maker, cities, concurrency=5)
+
+    assert peak == 5
+    assert summary["cities"] == 20
+    assert summary["updated"] == 19
+    assert summary["failed"] == 1
+    assert summary["total_ms"] >= summary["fetch_ms"]
+
+    async with session_maker() as session:
+        assert await session.scalar(select(func.count()).select_from(WeatherData)) == 19
+
+
+def test_shard_cities_is_stable_and_complete():
+    """Test that sharding covers every city once and always maps a city to the same shard."""
+    cities = [f"City{i}" for i in range(200)]
+    shards = shard_cities(cities, 4)
+
+    assert len(shards) == 4
+    assert sorted(city for shard in shards for city in shard) == sorted(cities)
+    assert all(30 <= len(shard) <= 70 for shard in shards)
+    assert shard_cities(list(reversed(cities)), 4)[1] == list(reversed(shards[1]))
+
+
+@pytest.mark.asyncio
+async def test_refresh_shard_skips_overlapping_cycle(session_maker: async_sessionmaker[AsyncSession]):
+    """Test that a shard whose previous cycle is still running is skipped, not run twice."""
+    release = asyncio.Event()
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200, json={
+            "name": request.url.params["q"],
+            "sys": {"country": "XX"},
+            "main": {"temp": 1.0, "humidity": 10, "pressure": 1000},
+        })
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        client = OpenWeatherClient(http_client)
+        first = asyncio.create_task(refresh_shard(client, session_maker, 0, ["Paris", "Rome"]))
+        await asyncio.sleep(0.01)
+
+        overlapping = await refresh_shard(client, session_maker, 0, ["Paris", "Rome"])
+        other_shard = asyncio.create_task(refresh_shard(client, session_maker, 1, ["Oslo"]))
+        release.set()
+        results = [await first, overlapping, await other_shard]
+
+    assert overlapping == {"shard": 0, "skipped": True, "released": 0}
+    assert results[0]["updated"] == 2
+    assert results[2]["updated"] == 1
+
+    summary = summarize_cycle(results, started_at=0)
+    assert summary["skipped"] == [0]
+    assert summary["updated"] == 3
+    assert set(summary["shard_ms"]) == {0, 1}
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_save_groups_cities_with_stored_ids(session_maker: async_sessionmaker[AsyncSession]):
+    """Test that IDs learned by name are stored on the tracked cities, then used for group calls."""
+    calls = Counter()
+    city_ids = {f"City{i}": 100 + i for i in range(25)}
+
+    def reading(city: str) -> dict:
+        return {"id": city_ids[city], "name": city, "sys": {"country": "XX"},
+                "main": {"temp": 1.0, "humidity": 10, "pressure": 1000}}
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path.rsplit("/", 1)[-1]
+        calls[endpoint] += 1
+        if endpoint == "group":
+            ids = {int(city_id) for city_id in request.url.params["id"].split(",")}
+            # City0 is missing from group responses and falls back to a call by name
+            items = [reading(city) for city, city_id in city_ids.items() if city_id in ids and city != "City0"]
+            return httpx.Response(200, json={"cnt": len(items), "list": items})
+        return httpx.Response(200, json=reading(request.url.params["q"]))
+
+    async with session_maker() as session:
+        await TrackedCityRepository(session).track_cities(dict.fromkeys(city_ids, 60))
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        client = OpenWeatherClient(http_client)
+        first = await fetch_and_save(client, session_maker, list(city_ids), grouped=True)
+        assert calls == {"weather": 25}
+
+        calls.clear()
+        second = await fetch_and_save(client, session_maker, list(city_ids), grouped=True)
+
+    assert calls == {"group": 2, "weather": 1}
+    assert first["updated"] == second["updated"] == 25
+    async with session_maker() as session:
+        assert await TrackedCityRepository(session).get_owm_city_ids(["City3", "Unknown"]) == {"City3": 103}
+
+
+@pytest.mark.asyncio
+async def test_skipped_shard_releases_its_claimed_cities(session_maker: async_sessionmaker[AsyncSession]):
+    """Test that cities claimed for a skipped shard are due again instead of waiting a full interval."""
+    release = asyncio.Event()
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200, json={
+            "name": request.url.params["q"],
+            "sys": {"country": "XX"},
+            "main": {"temp": 1.0, "humidity": 10, "pressure": 1000},
+        })
+
+    async with session_maker() as session:
+        await TrackedCityRepository(session).track_cities({"Paris": 3600, "Rome": 3600})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        client = OpenWeatherClient(http_client)
+        running = asyncio.create_task(refresh_shard(client, session_maker, 0, ["Oslo"]))
+        await asyncio.sleep(0.01)
+
+        claimed = await claim_due_cities(session_maker)
+        assert sorted(claimed) == ["Paris", "Rome"]
+        skipped = await refresh_shard(client, session_maker, 0, claimed)
+        assert skipped == {"shard": 0, "skipped": True, "released": 2}
+        assert sorted(await claim_due_cities(session_maker)) == ["Paris", "Rome"]
+
+        release.set()
+        await running
@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event, func, select
+
+from src.config import settings
+from src.weather import tasks
+from src.weather.models import WeatherData
+from src.weather.ratelimit import UpstreamRateLimiter
+from src.worker_runtime import WorkerRuntime, init_worker_runtime, shutdown_worker_runtime
+from tests.conftest import TEST_DATABASE_URL, TRUNCATE_TABLES
+
+
+def upstream(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={
+        "name": request.url.params["q"],
+        "sys": {"country": "XX"},
+        "main": {"temp": 1.0, "humidity": 10, "pressure": 1000},
+    })
+
+
+async def current_loop() -> asyncio.AbstractEventLoop:
+    return asyncio.get_running_loop()
+
+
+def test_consecutive_tasks_share_one_loop_and_pool(monkeypatch: pytest.MonkeyPatch):
+    """Test that many task runs reuse the runtime's event loop and pooled DB connection."""
+    limiter = UpstreamRateLimiter(redis=None, calls_per_minute=60_000)
+    monkeypatch.setattr(tasks, "get_upstream_rate_limiter", lambda: limiter)
+    runtime = WorkerRuntime(
+        database_url=TEST_DATABASE_URL,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(upstream)),
+    )
+    connects = 0
+
+    @event.listens_for(runtime.engine.sync_engine, "connect")
+    def count_connect(*args):
+        nonlocal connects
+        connects += 1
+
+    init_worker_runtime(runtime)
+    try:
+        loops = set()
+        for _ in range(20):
+            summary = tasks.refresh_weather_shard(0, settings.CITIES_TO_TRACK)
+            assert summary["updated"] == len(settings.CITIES_TO_TRACK)
+            loops.add(runtime.run(current_loop()))
+
+        async def count_rows() -> int:
+            async with runtime.session_maker() as session:
+                return await session.scalar(select(func.count()).select_from(WeatherData))
+
+        # The stub upstream always reports the same values: only the first run adds rows
+        assert summary["unchanged"] == len(settings.CITIES_TO_TRACK)
+        assert runtime.run(count_rows()) == len(settings.CITIES_TO_TRACK)
+        assert connects == 1
+        assert len(loops) == 1
+    finally:
+        async def truncate():
+            async with runtime.session_maker() as session:
+                await session.execute(TRUNCATE_TABLES)
+                await session.commit()
+
+        runtime.run(truncate())
+        shutdown_worker_runtime()
+
+    assert not runtime.running
+    assert runtime.loop.is_closed()
+    assert runtime.http_client.is_closed
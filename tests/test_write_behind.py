@@ -0,0 +1,172 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.weather.cache import WeatherCache
+from src.weather.client import OpenWeatherClient
+from src.weather.entity import WeatherEntity
+from src.weather.exceptions import WriteBehindOverloaded
+from src.weather.models import WeatherData, WeatherLatest
+from src.weather.repository import WeatherRepository
+from src.weather.service import WeatherService
+from src.weather.writebehind import WriteBehindBuffer
+
+
+def upstream(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={
+        "name": request.url.params["q"],
+        "sys": {"country": "WB"},
+        "main": {"temp": 5.0, "humidity": 60, "pressure": 1010},
+    })
+
+
+async def count_rows(session_maker: async_sessionmaker[AsyncSession]) -> int:
+    async with session_maker() as session:
+        return await session.scalar(select(func.count()).select_from(WeatherData))
+
+
+@pytest.mark.asyncio
+async def test_fetch_answers_before_the_write_and_close_flushes(
+        session_maker: async_sessionmaker[AsyncSession], weather_cache: WeatherCache
+):
+    """Test that a fetched reading is returned with its final ID and written on shutdown."""
+    buffer = WriteBehindBuffer(session_maker, flush_interval=60)
+    buffer.start()
+    async with session_maker() as session, httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as http_client:
+        service = WeatherService(WeatherRepository(session), OpenWeatherClient(http_client), weather_cache, buffer)
+        record = await service.fetch_weather("BufferedCity")
+
+        assert await count_rows(session_maker) == 0
+        await buffer.close()
+
+        stored = await session.get(WeatherData, (record.id, record.fetched_at))
+        assert stored is not None and stored.temperature == 5.0
+        assert (await session.get(WeatherLatest, "BufferedCity")).weather_id == record.id
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting(session_maker: async_sessionmaker[AsyncSession]):
+    buffer = WriteBehindBuffer(session_maker, batch_size=3, flush_interval=60, id_block_size=2)
+    buffer.start()
+    try:
+        records = [
+            await buffer.submit(WeatherEntity(f"BatchCity{i}", country="WB", temperature=1.0, humidity=1, pressure=1))
+            for i in range(3)
+        ]
+        for _ in range(100):
+            if await count_rows(session_maker) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert await count_rows(session_maker) == 3
+        assert len({record.id for record in records}) == 3
+    finally:
+        await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_repeated_reading_only_bumps_last_checked_at(session_maker: async_sessionmaker[AsyncSession]):
+    buffer = WriteBehindBuffer(session_maker, flush_interval=60, dedup_tolerance=0.05)
+    reading = WeatherEntity(city="RepeatCity", country="WB", temperature=3.0, humidity=30, pressure=1000)
+
+    first = await buffer.submit(reading)
+    await buffer.close()
+    repeat = await buffer.submit(reading, latest=first)
+    await buffer.close()
+
+    assert repeat.id == first.id
+    assert await count_rows(session_maker) == 1
+    async with session_maker() as session:
+        latest = await session.get(WeatherLatest, "RepeatCity")
+    assert latest.last_checked_at == repeat.last_checked_at
+
+
+@pytest.mark.asyncio
+async def test_replayed_batch_is_not_duplicated(session_maker: async_sessionmaker[AsyncSession]):
+    """Test that applying a batch twice (e.g. a redelivered stream entry) stores it once."""
+    buffer = WriteBehindBuffer(session_maker)
+    record = await buffer.submit(WeatherEntity("ReplayCity", country="WB", temperature=1.0, humidity=1, pressure=1))
+    write = WriteBehindBuffer.decode_write(WriteBehindBuffer.encode_write(buffer._queue.get_nowait()))
+    assert write.record == record
+
+    assert await buffer._flush([write])
+    assert await buffer._flush([write])
+    assert await count_rows(session_maker) == 1
+
+
+@pytest.mark.asyncio
+async def test_posted_record_as_latest_is_deduplicated(session_maker: async_sessionmaker[AsyncSession]):
+    """Test that a manually created latest reading, naive or aware, can be compared against."""
+    reading = WeatherEntity(city="PostedCity", country="WB", temperature=3.0, humidity=30, pressure=1000)
+    async with session_maker() as session:
+        posted = await WeatherRepository(session).create_weather_record(reading)
+    naive = posted.model_copy(update={"fetched_at": posted.fetched_at.replace(tzinfo=None)})
+
+    buffer = WriteBehindBuffer(session_maker, flush_interval=60, dedup_tolerance=0.05)
+    for latest in (posted, naive):
+        repeat = await buffer.submit(reading, latest=latest)
+        assert repeat.id == posted.id
+    await buffer.close()
+    assert await count_rows(session_maker) == 1
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_rejects_instead_of_waiting(session_maker: async_sessionmaker[AsyncSession]):
+    """Test that a full buffer (flusher stuck, e.g. database down) fails a submit after the timeout."""
+    buffer = WriteBehindBuffer(session_maker, max_size=1, submit_timeout=0.05)
+    await buffer.submit(WeatherEntity("QueuedCity", country="WB", temperature=1.0, humidity=1, pressure=1))
+
+    with pytest.raises(WriteBehindOverloaded):
+        await buffer.submit(WeatherEntity("RejectedCity", country="WB", temperature=1.0, humidity=1, pressure=1))
+    await buffer.close()
+    assert await count_rows(session_maker) == 1
+
+
+@pytest.mark.asyncio
+async def test_write_that_cannot_be_stored_is_dropped_alone(
+        session_maker: async_sessionmaker[AsyncSession], monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a non-database error isolates the failing write instead of stalling the batch."""
+    write_buffered = WeatherRepository.write_buffered
+
+    async def failing(self, records, checked):
+        if any(record.city == "PoisonCity" for record in records):
+            raise TypeError("cannot store this record")
+        return await write_buffered(self, records, checked)
+
+    monkeypatch.setattr(WeatherRepository, "write_buffered", failing)
+    buffer = WriteBehindBuffer(session_maker)
+    for city in ("GoodCity", "PoisonCity", "OtherCity"):
+        await buffer.submit(WeatherEntity(city, country="WB", temperature=1.0, humidity=1, pressure=1))
+    batch = [buffer._take_nowait() for _ in range(3)]
+
+    assert await buffer._flush(batch)
+    assert await count_rows(session_maker) == 2
+
+
+@pytest.mark.asyncio
+async def test_crashed_flusher_restarts_with_its_batch(session_maker: async_sessionmaker[AsyncSession]):
+    buffer = WriteBehindBuffer(session_maker, batch_size=1, retry_delay=0.01)
+    flush = buffer._flush
+    crashes = []
+
+    async def crash_once(batch):
+        if not crashes:
+            crashes.append(batch)
+            raise RuntimeError("flusher bug")
+        return await flush(batch)
+
+    buffer._flush = crash_once
+    buffer.start()
+    try:
+        await buffer.submit(WeatherEntity("CrashCity", country="WB", temperature=1.0, humidity=1, pressure=1))
+        for _ in range(100):
+            if await count_rows(session_maker) == 1:
+                break
+            await asyncio.sleep(0.01)
+        assert crashes
+        assert await count_rows(session_maker) == 1
+    finally:
+        await buffer.close()